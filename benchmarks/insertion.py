@@ -0,0 +1,103 @@
+# Copyright (c) 2010 Friedrich Romstedt <www.friedrichromstedt.org>
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+import os
+import sys
+import time
+import types
+import numpy
+
+if 'matplot3dext' not in sys.modules:
+	# Running from the repository, make it importable as the package 
+	# matplot3dext, which it is installed as ...
+
+	try:
+		import matplot3dext
+	except ImportError:
+		package = types.ModuleType('matplot3dext')
+		package.__path__ = [os.path.dirname(os.path.dirname(
+				os.path.abspath(__file__)))]
+
+		sys.modules['matplot3dext'] = package
+
+import matplot3dext.objects.world
+
+"""Time of inserting random Points into matplot3dext worlds.  Compares
+World.insert_points() with calling World.create_point() for each 
+position, for each kind of locator.
+
+Usage:  python insertion.py [NPOINTS]"""
+
+
+def make_world(locator):
+	"""Returns a World on the unit cube using LOCATOR."""
+
+	return matplot3dext.objects.world.World(
+			xlim = (0.0, 1.0), ylim = (0.0, 1.0), zlim = (0.0, 1.0),
+			renderers_point = set(),
+			renderers_line = set(),
+			renderers_face = set(),
+			locator = locator)
+
+
+def insert_points(world, positions):
+	world.insert_points(positions,
+			renderers_point = set(),
+			renderers_line = set(),
+			renderers_face = set(),
+			tol = 1e-10)
+
+
+def create_points(world, positions):
+	for position in positions:
+		world.create_point(position,
+				renderers_point = set(),
+				renderers_line = set(),
+				renderers_face = set(),
+				tol = 1e-10)
+
+
+def main(npoints):
+	positions = numpy.random.RandomState(0).uniform(size = (npoints, 3))
+
+	print('%-8s %8s %14s %14s %8s' % 
+			('', 'points', 'insert_points', 'create_point', 'speedup'))
+
+	for locator in ['linear', 'grid', 'walk']:
+		times = []
+		for function in [insert_points, create_points]:
+			world = make_world(locator)
+
+			start = time.time()
+			function(world, positions)
+			times.append(time.time() - start)
+
+		print('%-8s %8d %12.2f s %12.2f s %8.2f' % 
+				(locator, npoints, times[0], times[1], times[1] / times[0]))
+
+
+if __name__ == '__main__':
+	npoints = 2000
+
+	if len(sys.argv) > 1:
+		npoints = int(sys.argv[1])
+
+	main(npoints)
@@ -0,0 +1,143 @@
+# Copyright (c) 2010 Friedrich Romstedt <www.friedrichromstedt.org>
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+import os
+import sys
+import types
+import numpy
+
+if 'matplot3dext' not in sys.modules:
+	# Running from the repository, make it importable as the package 
+	# matplot3dext, which it is installed as ...
+
+	try:
+		import matplot3dext
+	except ImportError:
+		package = types.ModuleType('matplot3dext')
+		package.__path__ = [os.path.dirname(os.path.dirname(
+				os.path.abspath(__file__)))]
+
+		sys.modules['matplot3dext'] = package
+
+import matplot3dext.objects.world
+
+"""Memory per simplex of matplot3dext worlds.  Builds a World, refines it by
+random Points, and reports the bytes used per Point, Line, Face, and 
+Tetrahedron.  
+
+The handles are counted with the containers they own, the store with the
+allocated Table columns and the entries of the lookup dictionaries.  
+Objects referenced twice are counted once.
+
+Usage:  python memory.py [NPOINTS]"""
+
+
+#
+# Measuring ...
+#
+
+def owned_size(values, seen):
+	"""Returns the bytes of the sets, lists, tuples, and numpy arrays among
+	VALUES not in SEEN yet, and adds their ids to SEEN."""
+
+	size = 0
+	for value in values:
+		if isinstance(value, (set, list, tuple, numpy.ndarray)) and \
+				id(value) not in seen:
+			seen.add(id(value))
+			size += sys.getsizeof(value)
+
+	return size
+
+
+def handle_size(world, ndim, seen):
+	"""Returns the bytes of the handles of dimension NDIM of WORLD with the
+	containers they own."""
+
+	size = 0
+	for handle in world.store.tables[ndim]:
+		size += sys.getsizeof(handle) + owned_size(
+				[getattr(handle, name, None) for name in handle.__slots__],
+				seen)
+
+	return size
+
+
+def store_size(world, ndim, seen):
+	"""Returns the bytes of the objects of dimension NDIM in the store of 
+	WORLD:  the allocated columns of their Table, the list of the handles,
+	and their entries in the lookup dictionary."""
+
+	table = world.store.tables[ndim]
+
+	size = sum([column.nbytes for column in table.columns.values()]) + \
+			table.alive.nbytes + table.stamps.nbytes + \
+			sys.getsizeof(table.objects)
+
+	simplices = world.store.simplices[ndim]
+	if simplices is not None:
+		size += sys.getsizeof(simplices)
+		for key in simplices:
+			size += owned_size([key], seen) + \
+					sum([sys.getsizeof(value) for value in key 
+						if id(value) not in seen])
+			seen.update([id(value) for value in key])
+
+	return size
+
+
+def main(npoints):
+	world = matplot3dext.objects.world.World(
+			xlim = (0.0, 1.0), ylim = (0.0, 1.0), zlim = (0.0, 1.0),
+			renderers_point = set(),
+			renderers_line = set(),
+			renderers_face = set())
+
+	world.insert_points(
+			numpy.random.RandomState(0).uniform(size = (npoints, 3)),
+			renderers_point = set(),
+			renderers_line = set(),
+			renderers_face = set(),
+			tol = 1e-10)
+
+	seen = set()
+
+	print('%-12s %8s %14s %14s %14s' % 
+			('', 'objects', 'handles', 'store', 'total'))
+
+	for (ndim, name) in [(0, 'Point'), (1, 'Line'), (2, 'Face'), 
+			(3, 'Tetrahedron')]:
+		count = float(len(world.store.tables[ndim]))
+
+		handles = handle_size(world, ndim, seen) / count
+		store = store_size(world, ndim, seen) / count
+
+		print('%-12s %8d %8.0f bytes %8.0f bytes %8.0f bytes' % 
+				(name, count, handles, store, handles + store))
+
+
+if __name__ == '__main__':
+	npoints = 1000
+
+	if len(sys.argv) > 1:
+		npoints = int(sys.argv[1])
+
+	main(npoints)
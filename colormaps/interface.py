@@ -20,6 +20,8 @@
 
 # Developed since: Mar 2010
 
+import numpy
+
 """matplot3dext Colormaps no longer map only real values, but also various
 kinds of objects onto the color space."""
 
@@ -31,3 +33,11 @@ class Colormap:
 		"""Get the color ob OBJECT."""
 
 		raise NotImplementedError('Derived must overload.')
+
+	def get_colors(self, objects):
+		"""Get the colors of all OBJECTS, as (N, 4) RGBA array.  Overload this
+		function to color the OBJECTS in one batch, by default they are 
+		colored one by one."""
+
+		return numpy.asarray([self.get_color(object) for object in objects],
+				dtype = numpy.float64).reshape((-1, 4))
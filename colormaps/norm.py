@@ -20,6 +20,7 @@
 
 # Developed since: Mar 2010
 
+import numpy
 import matplot3dext.colormaps.interface
 
 """Colormaps with built-in normalisation.  They are used to hand over
@@ -33,16 +34,138 @@ class NormColormap(matplot3dext.colormaps.interface.Colormap):
 	"""Colormap with built-in normalisation.  Used to hand over colormaps
 	and normalisation instance in one single object."""
 
-	def __init__(self, cmap, norm):
+	def __init__(self, cmap, norm, resolution = None, cache = None):
 		"""CMAP is a matplotlib.colors.Colormap instance.  NORM is something
-		used to retrieve real values from something else, it must have a 
-		method .normalise() accepting the object to be normalised as 
-		argument."""
+		used to retrieve real values from something else, it must be a
+		matplot3dext.norms.interface.Norm instance.  RESOLUTION, if given, is 
+		the number of entries of a lookup table sampled once from CMAP, the
+		normalised values are then rounded onto it.  CACHE tells whether to 
+		keep the colors of the objects colored, it defaults to True.  The 
+		cache is dropped when the .version of NORM changes."""
+
+		if cache is None:
+			cache = True
 
 		self.cmap = cmap
 		self.norm = norm
+		self.cache = cache
+
+		self.set_resolution(resolution)
+
+	def set_resolution(self, resolution):
+		"""Sample the lookup table with RESOLUTION entries from .cmap, or 
+		use .cmap directly if RESOLUTION is None."""
+
+		self.resolution = resolution
+
+		if resolution is None:
+			self.lut = None
+		else:
+			self.lut = numpy.asarray(
+					self.cmap(numpy.linspace(0.0, 1.0, resolution)))
+
+			# The "bad" color of .cmap, for NaN values.
+			self.lut_bad = numpy.asarray(self.cmap(numpy.nan))
+
+		self.clear_cache()
+
+	#
+	# Caching ...
+	#
+
+	def clear_cache(self):
+		"""Drop all cached colors."""
+
+		# Colors by object key, see ._key(), for .get_color().
+		self.colors = {}
+
+		# The last array handed to .norm by .get_colors() and its colors.
+		self.array = None
+		self.array_colors = None
+
+		self.version = self.norm.version
+
+	def _key(self, object):
+		"""Returns the key of OBJECT in .colors, telling its .store and its
+		row there, or None if OBJECT is not held by a World.  The stamp of
+		the row is part of the key, so that rows reused by other objects,
+		or moved by compaction, miss the cache.  The keys do not keep the
+		objects alive."""
+
+		world = getattr(object, 'world', None)
+		if world is None:
+			return None
+
+		table = world.store.tables[object.ndim]
+
+		return (id(world.store), object.ndim, object.index, 
+				int(table.stamps[object.index]))
+
+	def _check_cache(self):
+		"""Drop the cache if the .norm has changed since filling it."""
+
+		if self.norm.version != self.version:
+			self.clear_cache()
+
+	#
+	# Coloring ...
+	#
+
+	def _map(self, values):
+		"""Map the normalised VALUES onto RGBA colors.  NaN values, e.g. of
+		objects outside of the known world, are mapped onto the "bad" color
+		of .cmap."""
+
+		if self.lut is None:
+			return numpy.asarray(self.cmap(values))
+
+		values = numpy.asarray(values, dtype = numpy.float64)
+		bad = numpy.isnan(values)
+
+		indices = numpy.rint(numpy.where(bad, 0.0, values) * 
+				(self.resolution - 1))
+
+		colors = self.lut[indices.astype(numpy.int_)]
+		colors[bad] = self.lut_bad
+
+		return colors
 
 	def get_color(self, object):
-		"""Get the color used for object OBJECT."""
-		
-		return self.cmap(self.norm.normalise(object))
+		"""Get the color used for object OBJECT.  Objects not held by a 
+		World are not cached."""
+
+		key = None
+		if self.cache:
+			self._check_cache()
+			key = self._key(object)
+
+		if key is None:
+			return self._map(self.norm.normalise(object))
+
+		if key not in self.colors:
+			self.colors[key] = self._map(self.norm.normalise(object))
+
+		return self.colors[key].copy()
+
+	def get_colors(self, objects):
+		"""Get the (N, 4) RGBA array of colors used for OBJECTS, mapping the
+		values normalised in one batch at once.  If the array describing the 
+		OBJECTS is the same as in the last call, a copy of the cached colors
+		is returned."""
+
+		array = self.norm.to_array(objects)
+
+		if self.cache:
+			self._check_cache()
+
+			if self.array is not None and \
+					numpy.array_equal(array, self.array):
+				return self.array_colors.copy()
+
+		colors = self._map(self.norm.normalise_array(array))
+
+		if self.cache:
+			self.array = array
+			self.array_colors = colors.copy()
+
+		return colors
@@ -20,31 +20,49 @@
 
 # Developed since: Mar 2010
 
+import numpy
+
 """Normalisation of objects onto the range [0.0, 1.0].  Used to retrieve
 values for colormapping."""
 
 
 class Norm:
-	"""Abstract interface of Norms."""
+	"""Abstract interface of Norms.  Norms normalise arrays describing the
+	objects in one batch, the objects are converted to such arrays by 
+	.to_array()."""
+
+	# Incremented whenever the normalisation changes, such that results 
+	# can be cached.
+	version = 0
+
+	def to_array(self, objects):
+		"""Converts the sequence OBJECTS to the array handed to 
+		.normalise_array(), with one row per object."""
+
+		raise NotImplementedError('Derived must overload.')
 
-	def _normalise(self, point):
-		"""Internal function actually implementing normalisation, must return
-		some real value, which will be clipped to [0.0, 1.0] by
-		.normalise()."""
+	def _normalise_array(self, array):
+		"""Internal function actually implementing normalisation of ARRAY, 
+		must return the (N,) array of real values, which will be clipped to
+		[0.0, 1.0] by .normalise_array()."""
 
 		raise NotImplementedError('Derived must overload.')
 
+	def normalise_array(self, array):
+		"""ARRAY describes the objects to be normalised, one per row.  Returns
+		the (N,) array of the objects normalised to the range [0.0, 1.0]."""
+
+		# Retrieve the values (real numbers), and clip them to [0.0, 1.0].
+		return numpy.clip(self._normalise_array(array), 0.0, 1.0)
+
+	def normalise_many(self, objects):
+		"""OBJECTS are objects to be normalised.  Returns the (N,) array of 
+		the objects normalised to the range [0.0, 1.0]."""
+
+		return self.normalise_array(self.to_array(objects))
+
 	def normalise(self, object):
 		"""OBJECT is an object to be normalised.  Returns the object 
 		normalised to the range [0.0, 1.0]."""
 
-		# Retrieve the value (some real number).
-		raw_normalised = self._normalise(point)
-
-		# Clip the real number to [0.0, 1.0].
-		if raw_normalised < 0:
-			return 0.0
-		elif raw_normalised > 1:
-			return 1.0
-		else:
-			return raw_normalised
+		return float(self.normalise_many([object])[0])
@@ -0,0 +1,173 @@
+# Copyright (c) 2010 Friedrich Romstedt <www.friedrichromstedt.org>
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+import numpy
+import matplot3dext.norms.interface
+import matplot3dext.objects.kernels
+
+"""Normalisation of matplot3dext points by a scalar field given at the 
+Points of a World, interpolated linearly inside of the Tetrahedra."""
+
+
+class FieldNorm(matplot3dext.norms.interface.Norm):
+	"""Normalises points by the value of a scalar field at their position.
+	The field values are stored per Point as a Point attribute of the 
+	World.  Points of the World read their value directly, other positions
+	are interpolated with the barycentric weights of the position in the 
+	Tetrahedron containing it.  The field range [VALUE0, VALUE1] is 
+	mapped onto [0.0, 1.0].  Positions outside of the known world have the
+	value NaN."""
+
+	def __init__(self, world, name, value0, value1, tol = None):
+		"""WORLD is the matplot3dext.objects.world.World the field lives in,
+		NAME the name of the Point attribute holding the values, added if
+		needed.  VALUE0 is mapped onto 0.0, VALUE1 onto 1.0.  TOL is the
+		coordinate-absolute tolerance used to locate positions, it 
+		defaults to WORLD.tol."""
+
+		if tol is None:
+			tol = world.tol
+
+		self.world = world
+		self.name = name
+		self.tol = tol
+
+		if name not in world.point_attributes:
+			world.add_point_attribute(name, numpy.float64)
+
+		# (positions, mesh version, corner indices, weights) of the last
+		# call of .weights().
+		self.weights_cache = None
+
+		self.set_range(value0, value1)
+
+	def set_range(self, value0, value1):
+		"""Map the field value VALUE0 onto 0.0, and VALUE1 onto 1.0."""
+
+		self.value0 = value0
+		self.value1 = value1
+
+		self.version += 1
+
+	def set_values(self, points, values):
+		"""Set the field at the matplot3dext points POINTS to VALUES."""
+
+		indices = [point.index for point in points]
+		self.world.store.points[self.name][indices] = values
+
+		self.version += 1
+
+	#
+	# Interpolation ...
+	#
+
+	def weights(self, positions):
+		"""Returns (corners, weights), the (N, 4) .store indices of the Points
+		of the Tetrahedra containing the (N, 3) POSITIONS, and the (N, 4) 
+		barycentric weights of the POSITIONS with respect to them.  Rows of 
+		positions outside of the known world are -1 and NaN, respectively.
+		The positions are located in one batch by the World's locator, see
+		Locator.locate_many(), in Morton order and widened by .tol.  The 
+		result is cached for the last POSITIONS until the Tetrahedra 
+		change."""
+
+		version = self.world.store.tetrahedra.version
+
+		if self.weights_cache is not None:
+			(cached_positions, cached_version, corners, weights) = \
+					self.weights_cache
+
+			if cached_version == version and \
+					numpy.array_equal(cached_positions, positions):
+				return (corners, weights)
+
+		# Locate in Morton order, which keeps the walks short ...
+
+		order = matplot3dext.objects.kernels.morton_order(positions,
+				lower = self.world.lower, upper = self.world.upper)
+
+		indices = numpy.empty(len(positions), dtype = numpy.int_)
+		coordinates = numpy.empty((len(positions), 3))
+
+		(indices[order], coordinates[order]) = \
+				self.world.locator.locate_many(positions[order], self.tol)
+
+		# The weight of the base point comes first, as the base point in
+		# the .store rows.
+		weights = numpy.hstack((
+				1 - coordinates.sum(axis = 1)[:, numpy.newaxis], coordinates))
+
+		corners = self.world.store.tetrahedra['points'][indices]
+		corners[indices < 0] = -1
+
+		self.weights_cache = (positions.copy(), version, corners, weights)
+
+		return (corners, weights)
+
+	def values(self, points):
+		"""Returns the (N,) field values at the matplot3dext points POINTS.
+		Points of the World read their entry of the attribute column, 
+		other points are interpolated at their position."""
+
+		points = list(points)
+		values = numpy.empty(len(points))
+
+		own = numpy.asarray([getattr(point, 'world', None) is self.world 
+				for point in points],
+				dtype = numpy.bool_)
+
+		values[own] = self.world.store.points[self.name][
+				[point.index for (point, is_own) in zip(points, own) 
+					if is_own]]
+
+		if not own.all():
+			values[~own] = self.evaluate(
+					[point.position for (point, is_own) in zip(points, own) 
+						if not is_own])
+
+		return values
+
+	def evaluate(self, positions):
+		"""Returns the (N,) field values interpolated at the (N, 3) 
+		POSITIONS."""
+
+		positions = numpy.asarray(positions, dtype = numpy.float64).\
+				reshape((-1, 3))
+
+		(corners, weights) = self.weights(positions)
+
+		values = self.world.store.points[self.name][corners]
+
+		return (values * weights).sum(axis = 1)
+
+	#
+	# Normalisation ...
+	#
+
+	def to_array(self, points):
+		"""Returns the (N,) field values at the matplot3dext points POINTS,
+		see .values()."""
+
+		return self.values(points)
+
+	def _normalise_array(self, values):
+		"""Scale the field VALUES according to the range set."""
+
+		return (values - self.value0) / (self.value1 - self.value0)
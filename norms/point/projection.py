@@ -50,7 +50,7 @@ class ProjectionPointNorm(matplot3dext.norms.interface.Norm):
 		# Store initial values.
 		self.norm0 = norm0
 		self.norm1 = norm1
-		self.direction = numpy.asarray(direction)
+		self.direction = numpy.asarray(direction, dtype = numpy.float64)
 
 		# Calculate projection parameters.
 		self.set_base(base0, base1, norm0, norm1)
@@ -73,6 +73,8 @@ class ProjectionPointNorm(matplot3dext.norms.interface.Norm):
 		self.norm0 = norm0
 		self.norm1 = norm1
 
+		self.version += 1
+
 		# Project the points onto .direction ...
 
 		self.projection0 = numpy.dot(self.direction, self.base0)
@@ -80,38 +82,41 @@ class ProjectionPointNorm(matplot3dext.norms.interface.Norm):
 		
 		self.projection_delta = self.projection1 - self.projection0
 
-		# Set state indicator ...
+		# Set state indicator, and the linear map of the positions onto the
+		# normalisation result ...
 
 		if self.projection_delta == 0:
 			# No scaling possible, linear slope is \infty.
 			self.state = 'impossible'
+
+			self.gradient = numpy.zeros(3)
+			self.offset = 0.0
+
 		else:
 			self.state = 'ok'
 
-	def _normalise(self, point):
-		"""Project the matplot3dext point POINT onto .direction and scale 
-		according to the base set."""
+			# Map [.projection0, .projection1] onto [.norm0, .norm1].
+			slope = (self.norm1 - self.norm0) / self.projection_delta
 
-		if self.state == 'impossible':
-			# No scaling possible.
-			return 0.0
+			self.gradient = slope * self.direction
+			self.offset = self.norm0 - slope * self.projection0
 
-		else:
-			projection = numpy.dot(self.direction, point.position)
+	def to_array(self, points):
+		"""Returns the (N, 3) positions of the matplot3dext points POINTS."""
 
-			# Map [.projection0, .projection1] onto [.norm0, .norm1].
-			normalised = \
-					self.norm0 * (self.projection1 - projection) / \
-							self.projection_delta + \
-					self.norm1 * (projection - self.projection0) / \
-							self.projection_delta
+		return numpy.asarray([point.position for point in points],
+				dtype = numpy.float64).reshape((-1, 3))
+
+	def _normalise_array(self, positions):
+		"""Project the (N, 3) POSITIONS onto .direction and scale according
+		to the base set, in one matrix-vector product."""
 
-			return normalised
+		return numpy.dot(positions, self.gradient) + self.offset
 
 	def set_direction(self, direction):
 		"""DIRECTION is a 3-vector giving the normalisation direction."""
 
-		self.direction = numpy.asarray(direction)
+		self.direction = numpy.asarray(direction, dtype = numpy.float64)
 		
 		# Update the projection parameters ...
 
@@ -20,133 +20,257 @@
 
 # Developed since: Mar 2010
 
+import numpy
 import matplot3dext.objects.line
 import matplot3dext.objects.tetrahedron
+import matplot3dext.objects.subdivision
+import matplot3dext.objects.kernels
+import matplot3dext.renderers.registry
 
 """matplot3dext faces."""
 
 
-class Face:
+class Face(object):
 	"""matplot3dext faces.  Find their face renderers from the lines used for
 	their creation."""
 
-	def __init__(self, line1, line2, line3, world):
+	ndim = 2
+
+	__slots__ = ('world', 'index', 'visible', '_plane')
+
+	def __init__(self, line1, line2, line3, world, search = None, 
+			index = None):
 		"""Create new face between LINE1, LINE2, and LINE3.  Loads renderers
 		from the lines.  Extracts the points from the lines too.  The lines 
-		are matplot3dext.objects.line.Line instances."""
+		are matplot3dext.objects.line.Line instances.  SEARCH tells whether
+		to look for the Lines crossed and to subdivide them, see 
+		.search(), it defaults to True.  INDEX is given for Faces added 
+		already, as for matplot3dext.objects.line.Line."""
 
-		self.attached_tetrahedra = set()
+		if search is None:
+			search = True
 
-		self.attached_lines = set([line1, line2, line3])
+		self.world = world
 
-		# Find the points ...
+		# (normal, offset) of the plane through the Face, see .plane().
+		self._plane = None
 
-		self.attached_points = set()
-		for line in self.attached_lines:
-			self.attached_points |= line.attached_points
+		if index is None:
+			# Find the points ...
 
-		# Attach to the lines ...
+			points = line1.attached_points | line2.attached_points | \
+					line3.attached_points
 
-		for line in self.attached_lines:
-			line.attach_face(self)
+			self.index = world.add_face(self, list(points))
 
-		# Attach to the points ...
+			# Initialise the renderers ...
 
-		for point in self.attached_points:
-			point.attach_face(self)
+			self.update_renderers_from_lines()
+
+		else:
+			self.index = index
+			world.faces.objects[index] = self
+
+			points = self.attached_points
 
-		# Initialise the renderers ...
+		# Attach to the points, the Lines find their Faces there ...
 
-		self.update_renderers_from_lines()
+		for point in points:
+			point.attach_face(self)
 
 		# Calculate visibility ...
 
-		self.visible = True
-		for line in self.attached_lines:
-			self.visible = self.visible and line.visible
+		self.visible = line1.visible and line2.visible and line3.visible
 
-		world.add_face(self)
+		if search:
+			world.search(self)
 
-		# Check if we intersect some nearby line ...
+	def search(self):
+		"""Find all Lines crossing this Face in one batch, see 
+		matplot3dext.objects.world.World.crossing_lines(), and subdivide 
+		them and the Face at the crossings.  Only the Lines whose bounding 
+		boxes overlap the Face's are tested.  The pieces of the Face do not
+		search again.  A Face between three invisible Points crossing no 
+		Line is destroyed, for it is completely outside of the World."""
 
-		# Check if we can accelerate the process.
-		accelerated = False
+		world = self.world
+		store = world.store
+		lines = store.lines
 
-		if point1.visible:
-			accelerated = True
-			starting_point = point1
-			excluded_lines = point2.attached_lines + point3.attached_lines
+		# Broad phase ...
+
+		(lower, upper) = store.bounds(self)
+		margin = 3 * world.tol * (upper - lower).max()
 
-		elif point2.visible:
-			accelerated = True
-			starting_point = point2
-			excluded_lines = point1.attached_lines + point3.attached_lines
+		candidates = lines.indices()
+		candidates = candidates[
+				(lines['lower'][candidates] <= upper + margin).all(axis = 1) & 
+				(lines['upper'][candidates] >= lower - margin).all(axis = 1)]
+
+		# Narrow phase ...
 
-		elif point3.visible:
-			accelerated = True
-			starting_point = point3
-			excluded_lines = point1.attached_lines + point2.attached_lines
+		(crossing_lines, parameters, coordinates) = \
+				world.crossing_lines(self, lines = candidates)
 
-		if accelerated:
-			# We can check in the nearby neighbourhood.
+		if len(crossing_lines) == 0:
+			if not [point for point in self.attached_points if point.visible]:
+				# We had no intersection, hence we are obsolete.
+				self.destroy(world)
 
-			for face in starting_point.attached_faces:
-				opposite_line, = face.attached_lines - \
-						starting_point.attached_lines
+			return
 
-				if opposite_line in excluded_lines:
-					continue
+		# Subdivide the Lines at the parameters found, and the piece of 
+		# the Face the new Point is in.  Self is the first piece to be 
+		# replaced, collect its renderers before ...
 
-				intersection = world.intersect(self, opposite_line)
-				
-				if intersection is not None:
-					# This will destroy self:
-					intersection.intersect()
+		renderers = [world.crossing_renderers([self, lines.objects[index]])
+				for index in crossing_lines]
 
-					return
+		corners = set(self.attached_points)
+		pieces = [self]
 
-		else:
-			# We must check against /all/ lines in the world.
+		for (index, parameter, (renderers_point, renderers_line, 
+				renderers_face)) in zip(crossing_lines, parameters, renderers):
+			line = lines.objects[index]
+			line_points = [store.points.objects[point] 
+					for point in lines['points'][index]]
 
-			for line in world.lines:
-				intersection = world.intersect(self, line)
+			subdivision = matplot3dext.objects.subdivision.Subdivision(
+					coordinates = [parameter],
+					base_point = line_points[0], end_points = line_points[1:],
+					renderers_point = renderers_point,
+					renderers_line = renderers_line,
+					renderers_face = renderers_face,
+					tol = world.tol,
+					world = world)
 
-				if intersection is not None:
-					# This will destroy self:
-					intersection.intersect()
+			point = subdivision.reduce().subdivide()
+			corners.add(point)
 
-					return
-			
-			# We had no intersection, hence we are obsolete.
-			self.destroy()
+			(piece, piece_coordinates) = self._locate_piece(pieces, point)
+
+			if piece is not None:
+				subdivision = matplot3dext.objects.subdivision.Subdivision(
+						coordinates = piece_coordinates,
+						base_point = piece[1][0], end_points = piece[1][1:],
+						renderers_point = renderers_point,
+						renderers_line = renderers_line,
+						renderers_face = renderers_face,
+						tol = world.tol,
+						world = world).reduce()
+
+				if subdivision.ndim > 0:
+					subdivision.subdivide(point)
+
+			# The pieces are the Faces without Tetrahedra between the 
+			# corners and the Points inserted ...
+
+			pieces = [piece for piece in pieces if store.contains(piece)] + \
+					[face for face in point.attached_faces 
+						if not face.attached_tetrahedra and 
+							face.attached_points <= corners and
+							face not in pieces]
+
+	def _locate_piece(self, pieces, point):
+		"""Returns ((piece, points), coordinates) for the Face of PIECES 
+		containing Point POINT, where POINTS are the Points of the piece in
+		.store order and COORDINATES the piece coordinates of POINT.  
+		Returns (None, None) if no piece contains POINT."""
+
+		store = self.world.store
+		tol = self.world.tol
+
+		indices = store.faces['points'][[piece.index for piece in pieces]]
+		corners = store.positions()[indices]
+
+		# Solve the normal equations of the piece coordinates ...
+
+		edges1 = corners[:, 1] - corners[:, 0]
+		edges2 = corners[:, 2] - corners[:, 0]
+		deltas = point.position - corners[:, 0]
+
+		d11 = (edges1 * edges1).sum(axis = 1)
+		d12 = (edges1 * edges2).sum(axis = 1)
+		d22 = (edges2 * edges2).sum(axis = 1)
+		d1 = (deltas * edges1).sum(axis = 1)
+		d2 = (deltas * edges2).sum(axis = 1)
+
+		determinants = d11 * d22 - d12 ** 2
+		coordinates = numpy.transpose([
+				(d22 * d1 - d12 * d2) / determinants,
+				(d11 * d2 - d12 * d1) / determinants])
+
+		weights = numpy.hstack((
+				1 - coordinates.sum(axis = 1)[:, numpy.newaxis], coordinates))
+		margins = weights.min(axis = 1)
+
+		best = margins.argmax()
+		if not margins[best] >= -tol:
+			return (None, None)
+
+		points = [store.points.objects[index] for index in indices[best]]
+
+		return ((pieces[best], points), coordinates[best])
+
+	def _get_attached_points(self):
+		"""Returns the set of the three Points, from the .store."""
+
+		return self.world.store.attached(self, 'points', 0)
+
+	attached_points = property(_get_attached_points)
+
+	def _get_attached_lines(self):
+		"""Returns the set of the three Lines, found by their Points."""
+
+		store = self.world.store
+		point1, point2, point3 = self.attached_points
+
+		lines = set([store.find([point1, point2]), 
+				store.find([point2, point3]), store.find([point1, point3])])
+		lines.discard(None)
+
+		return lines
+
+	attached_lines = property(_get_attached_lines)
+
+	def _get_attached_tetrahedra(self):
+		"""Returns the set of the Tetrahedra attached, from the adjacency
+		arrays of the .store."""
+
+		return self.world.store.attached(self, 'tetrahedra', 3)
+
+	attached_tetrahedra = property(_get_attached_tetrahedra)
+
+	renderers_face = matplot3dext.renderers.registry.\
+			renderers_property('renderers_face')
 
 	def update_renderers_from_lines(self):
-		"""Loads the renderers from the lines."""
+		"""Loads the renderers from the lines.  The AND of the masks of the
+		Lines is the AND of the masks of the Points, which are always up to
+		date.  The renderers attached to the Face itself are added."""
 
-		line1, line2, line3 = self.attached_lines
-		
-		self.renderers_face = \
-				line1.renderers_face & \
-				line2.renderers_face & \
-				line3.renderers_face
+		store = self.world.store
+		points = store.faces['points'][self.index]
 
-	#
-	# Connection methods ...
-	#
+		store.faces['renderers_face'][self.index] = \
+				numpy.bitwise_and.reduce(
+					store.points['renderers_face'][points]) | \
+				store.faces['renderers_attached'][self.index]
 
-	def attach_tetrahedron(self, tetrahedron):
-		"""Attach Tetrahedron TETRAHEDRON.  Do not attach the TETREHEDRON to
-		any of the objects attached to this Face.  Assume that the common
-		Faces and Lines of self and the TETRAHEDRON are already attached to
-		the Face."""
+	def plane(self):
+		"""Returns (normal, offset) of the plane through the Face, positions
+		x on the plane fulfil dot(normal, x) == offset.  Calculated on first
+		use."""
 
-		self.attached_tetrahedra.add(tetrahedron)
+		if self._plane is None:
+			store = self.world.store
+			(corner1, corner2, corner3) = \
+					store.positions()[store.faces['points'][self.index]]
 
-	def detach_tetrahedron(self, tetrahedron):
-		"""Remove Tetrahedron TETRAHEDRON.  Do not detach the TETREHEDRON from
-		any of the objects attached to this Face."""
+			normal = numpy.cross(corner2 - corner1, corner3 - corner1)
+			self._plane = (normal, numpy.dot(normal, corner1))
 
-		self.attached_tetrahedra.remove(tetrahedron)
+		return self._plane
 
 	# 
 	# Subdivision methods ...
@@ -157,43 +281,50 @@ class Face:
 
 		assert(subdivision.ndim == 2)
 
+		world = subdivision.world
+
 		# Find the attached lines.
 		line1, line2, line3 = self.attached_lines
 
 		# Find the attached points, and be able to associate them with the
 		# lines.
-		point23, = line2.attached_points & line3.attached_points
-		point13, = line1.attached_points & line3.attached_points
-		point12, = line1.attached_points & line2.attached_points
+		store = world.store
+		point23 = store.opposite_point(self, line1)
+		point13 = store.opposite_point(self, line2)
+		point12 = store.opposite_point(self, line3)
 		
-		new_line23 = matplot3dext.objects.line.Line(point23, new_point)
-		new_line13 = matplot3dext.objects.line.Line(point13, new_point)
-		new_line12 = matplot3dext.objects.line.Line(point12, new_point)
+		new_line23 = world.line_between(point23, new_point)
+		new_line13 = world.line_between(point13, new_point)
+		new_line12 = world.line_between(point12, new_point)
 
-		new_face1 = Face(line1, new_line13, new_line12)
-		new_face2 = Face(line2, new_line23, new_line12)
-		new_face3 = Face(line3, new_line13, new_line23)
+		new_face1 = world.face_between(point13, point12, new_point)
+		new_face2 = world.face_between(point23, point12, new_point)
+		new_face3 = world.face_between(point23, point13, new_point)
 
-		self.replace_by([new_face1, new_face2, new_face3], subdivison.world)
+		self.replace_by([new_face1, new_face2, new_face3], world)
 
 		return new_point
 
 	def replace_by(self, new_faces, world):
-		"""Replace this Face by Face instances NEW_FACES."""
+		"""Replace this Face by Face instances NEW_FACES.  They inherit 
+		the renderers attached to this Face itself."""
+
+		faces = world.store.faces
+		attached = faces['renderers_attached'][self.index]
+
+		if attached:
+			for new_face in new_faces:
+				faces['renderers_attached'][new_face.index] |= attached
+				new_face.update_renderers_from_lines()
 
 		# For all attached tetrahetra, subdivide them ...
+		#
+		# Replacing a Tetrahedron detaches it from self.
 
-		for tetrahedron in self.attached_tetrahedra:
+		for tetrahedron in list(self.attached_tetrahedra):
 
-			# Find the extern faces.
-			ext_face1, ext_face2, ext_face3 = \
-					tetrahedron.attached_faces - set([self])
-			
 			# Find the extern point.
-			ext_point, = \
-					ext_face1.attached_points & \
-					ext_face2.attached_points & \
-					ext_face3.attached_points
+			ext_point = world.store.opposite_point(tetrahedron, self)
 
 			# Find the new intern lines.
 			int_lines = set()
@@ -208,57 +339,104 @@ class Face:
 			# Create the new extern lines.
 			for int_point in int_points:
 				# Stored in connectivity:
-				tmp_line = matplot3dext.objects.line.\
-						Line(int_point, ext_point)
+				world.line_between(int_point, ext_point)
 
 			# Create the new extern faces.
 			for int_line in int_lines:
-				# Find the two bounding edges:
+				# Stored in connectivity:
 				int_point1, int_point2 = int_line.attached_points
-				ext_edge1, = \
-						int_point1.attached_lines & \
-						ext_point.attached_lines
-				ext_edge2, = \
-						int_point2.attached_lines & \
-						ext_point.attached_lines
-
-				# Create the new face, stored in connectivity:
-				tmp_face = Face(int_line, ext_edge1, ext_edge2)
+				world.face_between(int_point1, int_point2, ext_point)
 
 			# Create new tetrahedra.
 			new_tetrahedra = []
 			for new_face in new_faces:
 				# Find the three bounding faces:
 				line1, line2, line3 = new_face.attached_lines
-				ext_face1, = line1.attached_faces & ext_point.attached_faces
-				ext_face2, = line2.attached_faces & ext_point.attached_faces
-				ext_face3, = line3.attached_faces & ext_point.attached_faces
+				ext_face1 = world.store.find(
+						list(line1.attached_points) + [ext_point])
+				ext_face2 = world.store.find(
+						list(line2.attached_points) + [ext_point])
+				ext_face3 = world.store.find(
+						list(line3.attached_points) + [ext_point])
 
 				# Add the tetrahedron:
-				new_tetrahedra.append(matplot3dext.objects.tetrahedra.\
+				new_tetrahedra.append(matplot3dext.objects.tetrahedron.\
 						Tetrahedron(new_face, 
-							ext_face1, ext_face2, ext_face3))
+							ext_face1, ext_face2, ext_face3,
+							world = world))
 
 			# Replace the existing tetrahedron with the new ones.
 			tetrahedron.replace_by(new_tetrahedra, world)
 
 		self.destroy(world)
 	
+	def flip(self, margin = None):
+		"""Replace the two Tetrahedra attached by three around the Line 
+		between their Points opposite to this Face, which is removed (a 2-3
+		flip).  The Line must cross the Face with all Face coordinates 
+		above MARGIN, this keeps the new Tetrahedra from being flat.  The 
+		new Tetrahedra are the old ones' volume times these coordinates, by
+		default MARGIN is the least for which the flattest new Tetrahedron
+		is twice as large as the flattest old one.  Faces with renderers 
+		attached to themselves are kept.  Returns the new Line, or None if
+		the Face cannot be flipped."""
+
+		world = self.world
+		store = world.store
+
+		tetrahedra = [index for index in 
+				store.faces['tetrahedra'][self.index].tolist() if index >= 0]
+
+		if len(tetrahedra) != 2 or \
+				store.faces['renderers_attached'][self.index]:
+			return None
+
+		corners = store.faces['points'][self.index].tolist()
+		(apex1, apex2) = [[point for point in 
+				store.tetrahedra['points'][index].tolist() 
+				if point not in corners][0] for index in tetrahedra]
+
+		positions = store.positions()
+
+		if margin is None:
+			volumes = abs(numpy.linalg.det(positions[[[apex1] + corners, 
+					[apex2] + corners]][:, 1:] - 
+					positions[[[apex1], [apex2]]]))
+			margin = 2 * volumes.min() / volumes.sum()
+
+		(hits, parameters, coordinates) = matplot3dext.objects.kernels.\
+				intersect_segment_triangles(positions[apex1], 
+					positions[apex2], positions[corners], tol = 0.0)
+
+		if not (hits[0] and min(coordinates[0].min(), 
+				1 - coordinates[0].sum()) > margin):
+			return None
+
+		for index in tetrahedra:
+			store.tetrahedra.objects[index].destroy(world)
+
+		self.destroy(world)
+
+		(corner1, corner2, corner3) = corners
+		world.add_tetrahedra([
+				[apex1, apex2, corner1, corner2],
+				[apex1, apex2, corner2, corner3],
+				[apex1, apex2, corner3, corner1]])
+
+		return store.find([store.points.objects[apex1], 
+				store.points.objects[apex2]])
+
 	#
 	# Freeing memory ...
 	#
 
 	def destroy(self, world):
-		"""Resolves references loops.  Detach the Face from all Lines
-		attached.  Detach the Face from all Points attached."""
+		"""Resolves references loops.  Detach the Face from all Points 
+		attached, which detaches it from the Lines too."""
 			
-		for line in self.attached_lines:
-			line.detach_face(self)
-	
 		for point in self.attached_points:
 			point.detach_face(self)
 
-		self.attached_lines = set()
-		self.attached_points = set()
+		self._plane = None
 
 		world.remove_face(self)
@@ -36,20 +36,23 @@ class Intersection:
 			raise RuntimeError("Cannot intersect two Subdivisions which reduce both to ndim = 0.")
 
 	def intersect(self):
-		"""Subdivide 0-dimensional subdivision preferentially, and use the
-		resulting subdivision point as subdivision point for the second
-		subdivision."""
+		"""Subdivide the 0-dimensional Subdivision preferentially, and use 
+		the resulting subdivision point as subdivision point for the other
+		Subdivision.  Otherwise, .subdivision2 is subdivided first:  it 
+		belongs to the object already in the World, hence the new Point is
+		part of the World before the object of .subdivision1 is subdivided
+		and looks for further intersections."""
+
+		if self.subdivision1.ndim == 0:
+			# Normal order.
+
+			subdivision_point = self.subdivision1.subdivide()
+			self.subdivision2.subdivide(subdivision_point)
 
-		if self.subdivison2.ndim == 1:
+		else:
 			# Reverse order.
 
 			subdivision_point = self.subdivision2.subdivide()
 			self.subdivision1.subdivide(subdivision_point)
 
-		else:
-			# Normal order.
-
-			subdivision_point = self.subdivision1.subdivide()
-			self.subdivision2.subdivide(subdivision_point)
-
-	def exceute(self):
+		return subdivision_point
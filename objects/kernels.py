@@ -0,0 +1,369 @@
+# Copyright (c) 2010 Friedrich Romstedt <www.friedrichromstedt.org>
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+import numpy
+
+"""Vectorised geometry kernels working on the arrays of a World's store.  
+All coordinates returned follow the conventions of World.intersect(): they
+are measured from the first corner towards the others."""
+
+
+def _moeller_trumbore(starts, directions, corners, edges1, edges2, tol):
+	"""Intersects segments with triangles, all arguments broadcast against
+	each other along the first axis.  STARTS and DIRECTIONS describe the
+	segments, CORNERS are the first corners of the triangles, and EDGES1 
+	and EDGES2 point from there to the other corners.  Returns (hits,
+	parameters, coordinates) as described for the public functions."""
+
+	pvecs = numpy.cross(directions, edges2)
+	determinants = numpy.sum(edges1 * pvecs, axis = -1)
+
+	# Segments parallel to the triangle have no single intersection.
+	determinants = numpy.where(determinants == 0, numpy.nan, determinants)
+
+	tvecs = starts - corners
+	qvecs = numpy.cross(tvecs, edges1)
+
+	u = numpy.sum(tvecs * pvecs, axis = -1) / determinants
+	v = numpy.sum(directions * qvecs, axis = -1) / determinants
+	parameters = numpy.sum(edges2 * qvecs, axis = -1) / determinants
+
+	coordinates = numpy.vstack((u, v)).T
+
+	with numpy.errstate(invalid = 'ignore'):
+		hits = (u >= -tol) & (v >= -tol) & (u + v <= 1 + tol) & \
+				(parameters >= -tol) & (parameters <= 1 + tol)
+
+	return (hits, parameters, coordinates)
+
+
+def intersect_segment_triangles(start, stop, triangles, tol):
+	"""Intersects the segment from 3-vector START to 3-vector STOP with all
+	(F, 3, 3) TRIANGLES at once (Moeller-Trumbore).  TOL is the 
+	coordinate-absolute tolerance used to decide whether an intersection is
+	inside of the segment and of a triangle.
+
+	Returns (hits, parameters, coordinates): HITS is the (F,) bool array of
+	the triangles hit, PARAMETERS is the (F,) array of segment coordinates
+	(0.0 at START, 1.0 at STOP), and COORDINATES the (F, 2) array of
+	triangle coordinates.  Entries for parallel triangles are NaN."""
+
+	start = numpy.asarray(start, dtype = numpy.float64)
+	direction = numpy.asarray(stop, dtype = numpy.float64) - start
+	triangles = numpy.asarray(triangles, dtype = numpy.float64).\
+			reshape((-1, 3, 3))
+
+	return _moeller_trumbore(
+			starts = start,
+			directions = direction,
+			corners = triangles[:, 0],
+			edges1 = triangles[:, 1] - triangles[:, 0],
+			edges2 = triangles[:, 2] - triangles[:, 0],
+			tol = tol)
+
+
+def intersect_triangle_segments(triangle, starts, stops, tol):
+	"""Intersects the (3, 3) TRIANGLE with all segments from the (E, 3) 
+	STARTS to the (E, 3) STOPS at once.  TOL is used as in 
+	intersect_segment_triangles().
+
+	Returns (hits, parameters, coordinates): HITS is the (E,) bool array of
+	the segments crossing the triangle, PARAMETERS the (E,) array of
+	segment coordinates, and COORDINATES the (E, 2) array of triangle 
+	coordinates.  Entries for parallel segments are NaN."""
+
+	triangle = numpy.asarray(triangle, dtype = numpy.float64)
+	starts = numpy.asarray(starts, dtype = numpy.float64).reshape((-1, 3))
+	stops = numpy.asarray(stops, dtype = numpy.float64).reshape((-1, 3))
+
+	return _moeller_trumbore(
+			starts = starts,
+			directions = stops - starts,
+			corners = triangle[0],
+			edges1 = triangle[1] - triangle[0],
+			edges2 = triangle[2] - triangle[0],
+			tol = tol)
+
+
+def intersect_pairs(triangles, starts, stops, tol):
+	"""Intersects the (K, 3, 3) TRIANGLES with the segments from the (K, 3)
+	STARTS to the (K, 3) STOPS pairwise, the k-th triangle with the k-th 
+	segment.  TOL is used as in intersect_segment_triangles().
+
+	Returns (hits, parameters, coordinates) of shapes (K,), (K,), and 
+	(K, 2).  Entries for parallel pairs are NaN."""
+
+	triangles = numpy.asarray(triangles, dtype = numpy.float64).\
+			reshape((-1, 3, 3))
+	starts = numpy.asarray(starts, dtype = numpy.float64).reshape((-1, 3))
+	stops = numpy.asarray(stops, dtype = numpy.float64).reshape((-1, 3))
+
+	return _moeller_trumbore(
+			starts = starts,
+			directions = stops - starts,
+			corners = triangles[:, 0],
+			edges1 = triangles[:, 1] - triangles[:, 0],
+			edges2 = triangles[:, 2] - triangles[:, 0],
+			tol = tol)
+
+
+def _expand(counts):
+	"""Returns (owners, ranks) for the (N,) integer array COUNTS:  OWNERS 
+	repeats each index I COUNTS[I] times, and RANKS numbers the repetitions
+	of each index from zero."""
+
+	owners = numpy.repeat(numpy.arange(len(counts)), counts)
+	firsts = numpy.cumsum(counts) - counts
+	ranks = numpy.arange(len(owners)) - firsts[owners]
+
+	return (owners, ranks)
+
+
+def box_cells(lows, highs):
+	"""Returns (boxes, cells) for the boxes of grid cells from the (M, 3)
+	integer LOWS to the (M, 3) HIGHS, both inclusive:  CELLS are the 
+	(K, 3) cells covered, and BOXES the (K,) indices of the boxes covering
+	them."""
+
+	extents = highs - lows + 1
+
+	(boxes, ranks) = _expand(extents.prod(axis = 1))
+	(heights, depths) = (extents[boxes, 1], extents[boxes, 2])
+	cells = lows[boxes] + numpy.transpose([
+			ranks // (heights * depths),
+			(ranks // depths) % heights,
+			ranks % depths])
+
+	return (boxes, cells)
+
+
+def segment_box_pairs(starts, stops, lowers, uppers, cell):
+	"""Returns the candidate pairs (segments, boxes) of the segments from
+	the (E, 3) STARTS to the (E, 3) STOPS and the boxes from the (M, 3) 
+	LOWERS to the (M, 3) UPPERS, as two (K,) index arrays.  All segments 
+	crossing a box are among the pairs.
+
+	The boxes are hashed into a uniform grid of cell size CELL, widened 
+	by one cell to each side, and the segments are sampled at a spacing 
+	of at most CELL.  Each sample lies within one cell of the segment's
+	points nearby, hence a segment shares a cell with each box it 
+	crosses.  A segment of length L visits about L / CELL cells."""
+
+	starts = numpy.asarray(starts, dtype = numpy.float64).reshape((-1, 3))
+	stops = numpy.asarray(stops, dtype = numpy.float64).reshape((-1, 3))
+	lowers = numpy.asarray(lowers, dtype = numpy.float64).reshape((-1, 3))
+	uppers = numpy.asarray(uppers, dtype = numpy.float64).reshape((-1, 3))
+
+	if len(starts) == 0 or len(lowers) == 0:
+		empty = numpy.zeros(0, dtype = numpy.int_)
+		return (empty, empty.copy())
+
+	# Lay out the grid with one free cell around everything ...
+
+	origin = numpy.min([starts.min(axis = 0), stops.min(axis = 0), 
+			lowers.min(axis = 0)], axis = 0) - cell
+	top = numpy.max([starts.max(axis = 0), stops.max(axis = 0),
+			uppers.max(axis = 0)], axis = 0) + cell
+	shape = numpy.floor((top - origin) / cell).astype(numpy.int64) + 2
+
+	def keys(cells):
+		return (cells[:, 0] * shape[1] + cells[:, 1]) * shape[2] + \
+				cells[:, 2]
+
+	# Enter the widened boxes in all cells they cover ...
+
+	(boxes, cells) = box_cells(
+			numpy.floor((lowers - origin) / cell).astype(numpy.int64) - 1,
+			numpy.floor((uppers - origin) / cell).astype(numpy.int64) + 1)
+
+	box_keys = keys(cells)
+	order = numpy.argsort(box_keys, kind = 'mergesort')
+	(box_keys, boxes) = (box_keys[order], boxes[order])
+
+	# Sample the segments ...
+
+	directions = stops - starts
+	lengths = numpy.sqrt((directions ** 2).sum(axis = 1))
+	intervals = numpy.ceil(lengths / cell).astype(numpy.int64)
+
+	(segments, ranks) = _expand(intervals + 1)
+	parameters = ranks / numpy.maximum(intervals[segments], 1)
+	samples = starts[segments] + parameters[:, numpy.newaxis] * \
+			directions[segments]
+
+	segment_keys = keys(numpy.floor((samples - origin) / cell).\
+			astype(numpy.int64))
+
+	# Join the cells ...
+
+	firsts = numpy.searchsorted(box_keys, segment_keys, side = 'left')
+	counts = numpy.searchsorted(box_keys, segment_keys, side = 'right') - \
+			firsts
+
+	(samples, ranks) = _expand(counts)
+	pairs = numpy.unique(segments[samples] * len(lowers) + 
+			boxes[firsts[samples] + ranks])
+
+	return (pairs // len(lowers), pairs % len(lowers))
+
+
+def _spread_bits(values):
+	"""Spreads the lower 21 bits of the uint64 array VALUES, such that two
+	zero bits follow each bit."""
+
+	values = values & numpy.uint64(0x1fffff)
+	for (shift, mask) in [
+			(32, 0x1f00000000ffff),
+			(16, 0x1f0000ff0000ff),
+			(8, 0x100f00f00f00f00f),
+			(4, 0x10c30c30c30c30c3),
+			(2, 0x1249249249249249)]:
+		values = (values | (values << numpy.uint64(shift))) & \
+				numpy.uint64(mask)
+
+	return values
+
+
+def morton_order(positions, lower, upper):
+	"""Returns the permutation sorting the (N, 3) POSITIONS along a Morton
+	(Z-order) curve through the box from LOWER to UPPER.  Consecutive 
+	positions in this order are close in space."""
+
+	positions = numpy.asarray(positions, dtype = numpy.float64).\
+			reshape((-1, 3))
+	lower = numpy.asarray(lower, dtype = numpy.float64)
+	upper = numpy.asarray(upper, dtype = numpy.float64)
+
+	# Quantise onto 21 bits per axis ...
+
+	scaled = (positions - lower) / (upper - lower)
+	quantised = numpy.clip(scaled * 0x1fffff, 0, 0x1fffff).\
+			astype(numpy.uint64)
+
+	codes = _spread_bits(quantised[:, 0]) | \
+			(_spread_bits(quantised[:, 1]) << numpy.uint64(1)) | \
+			(_spread_bits(quantised[:, 2]) << numpy.uint64(2))
+
+	return numpy.argsort(codes, kind = 'mergesort')
+
+
+def _circumspheres(positions, tetrahedra):
+	"""Returns the (K, 3) centres and (K,) squared radii of the 
+	circumspheres of the (K, 4) index array TETRAHEDRA into the (N, 3)
+	POSITIONS."""
+
+	corners = positions[tetrahedra]
+	edges = corners[:, 1:] - corners[:, :1]
+
+	# |x - a|**2 = |x - b|**2 for all corners b yields 
+	# 2 (b - a) . (x - a) = |b - a|**2.
+	offsets = numpy.linalg.solve(2 * edges, 
+			(edges ** 2).sum(axis = 2)[:, :, numpy.newaxis])[:, :, 0]
+
+	return (corners[:, 0] + offsets, (offsets ** 2).sum(axis = 1))
+
+
+def _volumes(positions, tetrahedra):
+	"""Returns the (K,) signed volumes (times 6) of TETRAHEDRA."""
+
+	corners = positions[tetrahedra]
+	edges = corners[:, 1:] - corners[:, :1]
+
+	return numpy.linalg.det(edges)
+
+
+def delaunay_tetrahedra(positions, min_volume):
+	"""Tetrahedralises the (N, 3) POSITIONS, whose first four rows are the
+	corners of a tetrahedron containing all others strictly inside, by
+	Bowyer-Watson insertion.  The faces of the enclosing tetrahedron are
+	kept as they are.  
+
+	A position is left out when its cavity is not seen from it, which
+	happens by round-off:  Each created tetrahedron must have the 
+	orientation of the removed tetrahedron it shares its face with, and a 
+	volume, relative to the enclosing tetrahedron, above MIN_VOLUME.  
+	Slivers otherwise are kept, they are part of Delaunay 
+	tetrahedralisations.
+
+	Returns (tetrahedra, inserted), the (K, 4) index array of the 
+	tetrahedra and the (N,) bool array telling which positions are 
+	vertices."""
+
+	positions = numpy.asarray(positions, dtype = numpy.float64)
+
+	tetrahedra = numpy.asarray([[0, 1, 2, 3]])
+	min_volume = min_volume * abs(_volumes(positions, tetrahedra)[0])
+
+	inserted = numpy.zeros(len(positions), dtype = numpy.bool_)
+	inserted[:4] = True
+
+	(centres, radii) = _circumspheres(positions, tetrahedra)
+
+	for new in range(4, len(positions)):
+		# Find the tetrahedra whose circumsphere contains the new 
+		# position ...
+
+		distances = ((centres - positions[new]) ** 2).sum(axis = 1)
+		bad = distances < radii
+
+		if not bad.any():
+			continue
+
+		# The boundary of the cavity are the faces of exactly one bad
+		# tetrahedron, each with the corner of that tetrahedron opposite 
+		# to it ...
+
+		opposite = {}
+		for tetrahedron in tetrahedra[bad].tolist():
+			for slot in range(4):
+				face = tuple(sorted(tetrahedron[:slot] + 
+						tetrahedron[slot + 1:]))
+
+				if face in opposite:
+					del opposite[face]
+				else:
+					opposite[face] = tetrahedron[slot]
+
+		boundary = list(opposite.keys())
+
+		created = numpy.asarray([list(face) + [new] for face in boundary])
+		removed = numpy.asarray([list(face) + [opposite[face]] 
+				for face in boundary])
+
+		# The new position must be on the side of each boundary face where
+		# the removed tetrahedron is ...
+
+		orientations = _volumes(positions, created) * \
+				numpy.sign(_volumes(positions, removed))
+
+		if (orientations <= min_volume).any():
+			continue
+
+		(created_centres, created_radii) = \
+				_circumspheres(positions, created)
+
+		tetrahedra = numpy.vstack((tetrahedra[~bad], created))
+		centres = numpy.vstack((centres[~bad], created_centres))
+		radii = numpy.hstack((radii[~bad], created_radii))
+
+		inserted[new] = True
+
+	return (tetrahedra, inserted)
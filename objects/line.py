@@ -20,41 +20,73 @@
 
 # Developed since: Mar 2010
 
-import matplot3dext.objects.face
+import numpy
+import matplot3dext.objects.kernels
+import matplot3dext.renderers.registry
 
 """matplot3dext lines."""
 
 
-class Line:
+class Line(object):
 	"""matplot3dext lines.  Find their line and face renderers from the 
 	points used for their creation."""
 
-	def __init__(self, point1, point2, world):
+	ndim = 1
+
+	__slots__ = ('world', 'index', 'visible')
+
+	def __init__(self, point1, point2, world, search = None, index = None):
 		"""Create new line between POINT1 and POINT2.  Load renderers from
 		the points.  POINT1 and POINT2 are matplot3dext.objects.point.Point
-		instances."""
+		instances.  SEARCH tells whether to look for the Faces crossed and 
+		to subdivide them, see .search(), it defaults to True.  Lines 
+		created as part of the tetrahedralisation of the World do not cross
+		any Face and pass False.  INDEX is given for Lines whose row, with
+		the renderers, has been added already, see 
+		matplot3dext.objects.world.World.add_tetrahedra()."""
+
+		if search is None:
+			search = True
 
 		# Initialise attributes ...
 
-		self.attached_faces = set()
-		self.attached_points = set([point1, point2])
+		self.world = world
 
 		# Attach to the points ...
 
 		point1.attach_line(self)
 		point2.attach_line(self)
 
-		# Initialise the renderers ...
+		if index is None:
+			self.index = world.add_line(self, [point1, point2])
+
+			# Initialise the renderers ...
 		
-		self.update_renderers_from_points()
+			self.update_renderers_from_points()
+
+		else:
+			self.index = index
+			world.lines.objects[index] = self
 
 		# Calculate visibility ...
 
-		self.visible = True
-		for point in self.attached_points:
-			self.visible = self.visible and point.visible
+		self.visible = point1.visible and point2.visible
+
+		if search:
+			world.search(self)
 
-		world.add_line(self)
+	def search(self):
+		"""Look for a Face crossed by this Line, and subdivide both at the
+		crossing.  The pieces of the Line look for further crossings, see
+		matplot3dext.objects.world.World.search().  From a visible Point, 
+		the Faces opposite to it in its Tetrahedra are tested.  A Line 
+		between two invisible Points is tested against all Faces, and 
+		destroyed if it crosses none and bounds no Face, for it is completely
+		outside of the World."""
+
+		world = self.world
+		point1, point2 = [world.store.points.objects[index] 
+				for index in world.store.lines['points'][self.index]]
 
 		# Check if we intersect some nearby face ...
 
@@ -77,12 +109,8 @@ class Line:
 			for tetrahedron in \
 					starting_point.attached_tetrahedra - \
 					target_point.attached_tetrahedra:
-				point1, point2, point3 = tetrahedron.attached_points - \
-						set([starting_point])
-				opposite_face, = \
-						point1.attached_faces & \
-						point2.attached_faces & \
-						point3.attached_faces
+				opposite_face = world.store.find(
+						tetrahedron.attached_points - set([starting_point]))
 
 				intersection = world.intersect(self, opposite_face)
 				if intersection is not None:
@@ -94,72 +122,176 @@ class Line:
 		else:
 			# This means that all of our two points are invisible, it follows 
 			# that we are completetly outside world.  Then, check with /all/ 
-			# faces of the world.
+			# faces of the world, in one batch.
 
-			for face in world.faces:
-				intersection = world.intersect(self, face)
-				if intersection is not None:
-					# We will be destroyed by this by subdivision:
-					intersection.intersect()
+			intersection = world.intersect_many(self)
+			if intersection is not None:
+				# We will be destroyed by this by subdivision:
+				intersection.intersect()
 
-					return
+				return
 
 			# If we had no intersection with the existing world, we are
-			# completely obsolete:
-			self.destroy()
+			# completely obsolete, unless we bound a Face:
+			if not self.attached_faces:
+				self.destroy()
 
-	def update_renderers_from_points(self):
-		"""Loads the renderers from the points, and updates faces attached."""
+	def _get_attached_points(self):
+		"""Returns the set of the two Points, from the .store."""
+
+		return self.world.store.attached(self, 'points', 0)
+
+	attached_points = property(_get_attached_points)
+
+	def _get_attached_faces(self):
+		"""Returns the set of the Faces bounded by this Line, the Faces 
+		attached to both Points."""
 
 		point1, point2 = self.attached_points
 
-		self.renderers_line = \
-				point1.renderers_line & point2.renderers_line
+		return point1.attached_faces & point2.attached_faces
 
-		self.renderers_face = \
-				point1.renderers_face & point2.renderers_face
+	attached_faces = property(_get_attached_faces)
 
-		for face in self.attached_faces:
-			face.update_renderers_from_lines()
+	renderers_line = matplot3dext.renderers.registry.\
+			renderers_property('renderers_line')
+	renderers_face = matplot3dext.renderers.registry.\
+			renderers_property('renderers_face')
 
-	#
-	# Connection methods ...
-	#
+	def update_renderers_from_points(self):
+		"""Loads the renderers from the points, and updates faces attached."""
 
-	def attach_face(self, face):
-		"""Attach Face FACE.  Do not update the face's renderers.  Assume
-		the lines attached to the face & to .attached_points are already
-		attached to self.  Do not attach the FACE to the Points attached to
-		self."""
+		store = self.world.store
+		(index1, index2) = store.lines['points'][self.index]
 
-		self.attached_faces.add(face)
+		for name in ['renderers_line', 'renderers_face']:
+			store.lines[name][self.index] = \
+					store.points[name][index1] & store.points[name][index2]
 
-	def detach_face(self, face):
-		"""Detach Face FACE.  Do not detach the face from .attached_points
-		(when called from the FACE's .destroy(), this would detach the face
-		two times from each of the .attached_points, because there are always 
-		two Lines attached to FACE and to some Point)."""
-		
-		self.attached_faces.remove(face)
+		for face in self.attached_faces:
+			face.update_renderers_from_lines()
 
 	#
 	# Subdivision methods ...
 	#
 
 	def subdivide(self, subdivision, new_point):
-		"""Perform a subdivision task on this Line."""
+		"""Perform a subdivision task on this Line.  The new Lines look for
+		Faces crossed if this Line is not part of the tetrahedralisation,
+		i.e., bounds no Face attached to Tetrahedra."""
 
 		assert(subdivision.ndim == 1)
 
+		world = subdivision.world
 		point1, point2 = self.attached_points
 
-		line1 = Line(point1, new_point)
-		line2 = Line(point2, new_point)
+		search = not [face for face in self.attached_faces 
+				if face.attached_tetrahedra]
+
+		line1 = world.line_between(point1, new_point)
+		line2 = world.line_between(point2, new_point)
 
-		self.replace_by([line1, line2], subdivision.world)
+		self.replace_by([line1, line2], world)
+
+		if search:
+			world.search(line1)
+			world.search(line2)
 
 		return new_point
 
+	def flip(self):
+		"""Remove this Line by replacing the Tetrahedra around it (an edge
+		removal flip).  The Points around this Line form a ring, the new
+		Tetrahedra join both ends of this Line to a fan of triangles over
+		the ring.  Of the fans from each Point of the ring, the one whose 
+		flattest Tetrahedron is the largest is taken, if that Tetrahedron 
+		is twice as large as the flattest one around this Line.  Rendered 
+		Lines, and Lines of Faces with renderers attached to themselves, 
+		are kept.
+		Returns the list of the new Tetrahedra, or None if this Line cannot
+		be flipped."""
+
+		world = self.world
+		store = world.store
+
+		faces = [face.index for face in self.attached_faces]
+		tetrahedra = numpy.unique(store.faces['tetrahedra'][faces])
+		tetrahedra = tetrahedra[tetrahedra >= 0]
+
+		if len(faces) < 3 or len(tetrahedra) != len(faces) or \
+				((store.faces['tetrahedra'][faces] >= 0).sum(axis = 1) != 
+					2).any() or \
+				store.faces['renderers_attached'][faces].any() or \
+				self.renderers_line or self.renderers_face:
+			return None
+
+		(point1, point2) = store.lines['points'][self.index].tolist()
+
+		# The ring, each Tetrahedron joins two neighbours ...
+
+		neighbours = {}
+		for points in store.tetrahedra['points'][tetrahedra].tolist():
+			(corner1, corner2) = [point for point in points 
+					if point not in (point1, point2)]
+			neighbours.setdefault(corner1, []).append(corner2)
+			neighbours.setdefault(corner2, []).append(corner1)
+
+		ring = [corner1]
+		while len(ring) < len(neighbours):
+			following = [point for point in neighbours[ring[-1]]
+					if point not in ring[-2:]]
+			if not following or following[0] in ring:
+				return None
+			ring.append(following[0])
+
+		positions = store.positions()
+
+		def volumes(apex, triangles):
+			corners = positions[triangles] - \
+					positions[apex][..., numpy.newaxis, :]
+			return numpy.linalg.det(corners) / 6
+
+		corners = store.tetrahedra['points'][tetrahedra]
+		old = abs(volumes(corners[:, 0], corners[:, 1:])).min()
+
+		# The fans, with their flattest Tetrahedra ...
+
+		count = len(ring)
+		best = (2 * old, None)
+
+		for first in range(count):
+			triangles = numpy.asarray([[ring[first], 
+					ring[(first + slot) % count], 
+					ring[(first + slot + 1) % count]] 
+					for slot in range(1, count - 1)])
+
+			volumes1 = volumes(point1, triangles)
+			volumes2 = volumes(point2, triangles)
+
+			# Both ends must be on opposite sides of all triangles ...
+
+			sign = numpy.sign(volumes1[0])
+			if not ((numpy.sign(volumes1) == sign) &
+					(numpy.sign(volumes2) == -sign)).all():
+				continue
+
+			flattest = min(abs(volumes1).min(), abs(volumes2).min())
+			if flattest > best[0]:
+				best = (flattest, triangles)
+
+		triangles = best[1]
+		if triangles is None:
+			return None
+
+		for index in tetrahedra.tolist():
+			store.tetrahedra.objects[index].destroy(world)
+
+		self.destroy()
+
+		return world.add_tetrahedra(numpy.vstack((
+				numpy.hstack((triangles, [[point1]] * len(triangles))),
+				numpy.hstack((triangles, [[point2]] * len(triangles))))))
+
 	def replace_by(self, new_lines, world):
 		"""Replace this Line by Line instances NEW_LINES."""
 	
@@ -167,14 +299,13 @@ class Line:
 		#
 		# We must 1. subdivide and 2. .destroy(), and not vice versa, because
 		# destroying self first, would destroy also all Faces attached.
+		#
+		# Replacing a Face detaches it from self.
 
-		for face in self.attached_faces:
+		for face in list(self.attached_faces):
 			
-			# Find the extern lines.
-			ext_line1, ext_line2 = face.attached_lines - set([self])
-
 			# Find the extern point.
-			ext_point, = ext_line1.attached_points & ext_line2.attached_points
+			ext_point = world.store.opposite_point(face, self)
 			
 			# Find the new intern points.
 			int_points = set()
@@ -184,24 +315,21 @@ class Line:
 			# Create the new face edges.
 			for int_point in int_points:
 				# Nowhere stored except than in connectivity:
-				tmp_line = Line(ext_point, int_point)
+				world.line_between(ext_point, int_point)
 
-			# Create the new faces.
+			# Create the new faces.  The Faces of the new edges may exist
+			# already, created when replacing the Tetrahedra of another 
+			# Face attached to self.
 			new_faces = []
 			for new_line in new_lines:
-				# Find the two bounding edges:
 				point1, point2 = new_line.attached_points
-				ext_edge1, = point1.attached_lines & ext_point.attached_lines
-				ext_edge2, = point2.attached_lines & ext_point.attached_lines
-
-				# Create the new face:
-				new_faces.append(matplot3dext.objects.face.Face(
-					new_line, ext_edge1, ext_edge2))
+				new_faces.append(
+						world.face_between(point1, point2, ext_point))
 
 			# Replace the existing face with the new faces.
 			face.replace_by(new_faces, world)
 
-		self.destroy(world)
+		self.destroy()
 		
 	#
 	# Freeing memory ...
@@ -211,13 +339,10 @@ class Line:
 		"""Resolve reference loops.  Destroy all attached faces.  Detach the 
 		line from all attached points."""
 		
-		for point in self.attached_points:
-			point.detach_line(self)
-
 		for face in self.attached_faces:
-			face.destroy()
+			face.destroy(self.world)
 
-		self.attached_points = set()
-		self.attached_faces = set()
+		for point in self.attached_points:
+			point.detach_line(self)
 
-		world.remove_line(self)
+		self.world.remove_line(self)
@@ -0,0 +1,511 @@
+# Copyright (c) 2010 Friedrich Romstedt <www.friedrichromstedt.org>
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+import numpy
+import matplot3dext.objects.kernels
+
+"""Point locators find the Tetrahedron of a World containing a position.  
+They are kept up to date by the World when Tetrahedra are added or 
+removed."""
+
+
+class Locator:
+	"""Abstract interface of Locators.  Counts the queries made and the
+	candidate Tetrahedra tested for them."""
+
+	def __init__(self, world):
+		"""WORLD is the World whose Tetrahedra are searched."""
+
+		self.world = world
+
+		self.reset_counters()
+
+	#
+	# Maintenance ...
+	#
+
+	def insert(self, index):
+		"""Tetrahedron with .store index INDEX has been added."""
+
+		pass
+
+	def remove(self, index):
+		"""Tetrahedron with .store index INDEX is about to be removed."""
+
+		pass
+
+	#
+	# Queries ...
+	#
+
+	def candidates(self, position):
+		"""Returns the .store indices of the Tetrahedra which might contain
+		3-vector POSITION."""
+
+		raise NotImplementedError('Derived must overload.')
+
+	def locate(self, position, tol = None):
+		"""Locate 3-vector POSITION.  Returns (index, coordinates) as 
+		World.locate_points() does for a single position."""
+
+		candidates = self.candidates(position)
+
+		self.queries += 1
+		self.tested += len(candidates)
+
+		(indices, coordinates) = self.world.locate_points([position],
+				tol = tol, candidates = candidates)
+
+		return (indices[0], coordinates[0])
+
+	def locate_many(self, positions, tol = None):
+		"""Locate the (N, 3) POSITIONS in one batch.  Returns (indices, 
+		coordinates) as World.locate_points() does.  All positions walk at
+		once from the first Tetrahedron, see .walk_many(), those whose walk
+		fails are located one by one by .locate()."""
+
+		positions = numpy.asarray(positions, dtype = numpy.float64).\
+				reshape((-1, 3))
+
+		(indices, coordinates, failed) = self.walk_many(positions, 
+				self.world.store.tetrahedra.indices()[:1], tol)
+
+		self.queries += len(positions) - len(failed)
+
+		for row in failed.tolist():
+			(indices[row], coordinates[row]) = self.locate(positions[row], 
+					tol)
+
+		return (indices, coordinates)
+
+	def walk_many(self, positions, start, tol = None):
+		"""Visibility walk towards all (N, 3) POSITIONS at once, see 
+		WalkLocator.  START is the sequence holding the .store index of the
+		Tetrahedron to start from, if empty all walks fail.  Returns (indices, coordinates, 
+		failed) with INDICES and COORDINATES as World.locate_points() 
+		returns them, and FAILED the rows whose walk left the world through
+		its surface or cycled.  Positions outside of the world's box, 
+		widened by TOL, are not inside any Tetrahedron, their walk does not
+		fail."""
+
+		if tol is None:
+			tol = 0.0
+
+		indices = numpy.empty(len(positions), dtype = numpy.int_)
+		indices[...] = -1
+		coordinates = numpy.empty((len(positions), 3))
+		coordinates[...] = numpy.nan
+
+		tetrahedra = self.world.store.tetrahedra
+
+		margin = tol * (self.world.upper - self.world.lower)
+		rows = numpy.nonzero(((positions >= self.world.lower - margin) &
+				(positions <= self.world.upper + margin)).all(axis = 1))[0]
+
+		if len(start) == 0:
+			return (indices, coordinates, rows)
+
+		current = numpy.empty(len(rows), dtype = numpy.int_)
+		current[...] = start[0]
+
+		failed = []
+
+		bases = tetrahedra['base']
+		matrices = tetrahedra['matrix']
+		neighbours = tetrahedra['neighbours']
+
+		# No walk is longer than there are Tetrahedra, unless cycling ...
+
+		for step in range(len(tetrahedra)):
+			if len(rows) == 0:
+				break
+
+			self.tested += len(rows)
+
+			local = numpy.einsum('nij,nj->ni', matrices[current], 
+					positions[rows] - bases[current])
+			weights = numpy.hstack((
+					1 - local.sum(axis = 1)[:, numpy.newaxis], local))
+
+			found = (weights >= -tol).all(axis = 1)
+			indices[rows[found]] = current[found]
+			coordinates[rows[found]] = local[found]
+
+			# Step across the Faces opposite to the most violated 
+			# points ...
+
+			(rows, current, weights) = (rows[~found], current[~found],
+					weights[~found])
+			current = neighbours[current, weights.argmin(axis = 1)]
+
+			outside = current < 0
+			failed.append(rows[outside])
+			(rows, current) = (rows[~outside], current[~outside])
+
+		failed.append(rows)
+
+		return (indices, coordinates, numpy.concatenate(failed))
+
+	#
+	# Statistics ...
+	#
+
+	def reset_counters(self):
+		"""Reset .queries and .tested to zero."""
+
+		self.queries = 0
+		self.tested = 0
+
+	def candidates_per_query(self):
+		"""Returns the mean number of Tetrahedra tested per query."""
+
+		if self.queries == 0:
+			return 0.0
+
+		return float(self.tested) / self.queries
+
+
+class LinearLocator(Locator):
+	"""Tests all Tetrahedra of the World."""
+
+	def candidates(self, position):
+		"""All Tetrahedra are candidates."""
+
+		return self.world.store.tetrahedra.indices()
+
+
+class GridLocator(Locator):
+	"""Uniform grid over the bounding boxes of the Tetrahedra.  A query 
+	tests only the Tetrahedra overlapping the grid cell of the position.
+
+	The grid is built for all Tetrahedra at once, into arrays holding the
+	Tetrahedra of each cell one after the other.  Tetrahedra inserted 
+	later are entered into a dictionary of cells, in one batch before the
+	next query.  Removed Tetrahedra stay until the grid is rebuilt, the 
+	queries skip them.  The grid is rebuilt when as many Tetrahedra have 
+	been inserted as it was built for, with a resolution adapted to about
+	one Tetrahedron per cell."""
+
+	def __init__(self, world, lower, upper, resolution = None):
+		"""LOWER and UPPER are the corners of the box covered by the grid,
+		positions outside are looked up in the nearest cell, hence they 
+		are located if inside within the tolerance.  RESOLUTION is the 
+		number of cells along each axis, by default it adapts to the 
+		number of Tetrahedra."""
+
+		Locator.__init__(self, world)
+
+		self.lower = numpy.asarray(lower, dtype = numpy.float64)
+		self.upper = numpy.asarray(upper, dtype = numpy.float64)
+		self.fixed_resolution = resolution
+
+		# Tetrahedra inserted, but not entered into the cells yet.
+		self.pending = []
+
+		self.build()
+
+	def build(self):
+		"""Build the grid for all Tetrahedra of the World."""
+
+		tetrahedra = self.world.store.tetrahedra
+		indices = tetrahedra.indices()
+
+		self.resolution = self.fixed_resolution
+		if self.resolution is None:
+			self.resolution = self._adapt_resolution(
+					tetrahedra['lower'][indices], 
+					tetrahedra['upper'][indices])
+
+		self.cell_size = (self.upper - self.lower) / self.resolution
+
+		# The cell keys in use, ascending, and the Tetrahedra of cell 
+		# .keys[i] at .entries[.starts[i]:.starts[i + 1]] ...
+
+		(keys, entries) = self._cells(indices)
+		order = numpy.argsort(keys, kind = 'mergesort')
+		(keys, entries) = (keys[order], entries[order])
+
+		(self.keys, starts) = numpy.unique(keys, return_index = True)
+		self.starts = numpy.append(starts, len(entries))
+		self.entries = entries
+
+		# Maps cell keys to the lists of Tetrahedra inserted since.
+		self.inserted = {}
+
+		self.built = len(indices)
+		self.pending = []
+		self.added = 0
+
+	def _adapt_resolution(self, lowers, uppers):
+		"""Returns the resolution for the bounding boxes from the (T, 3) 
+		LOWERS to the (T, 3) UPPERS.  A box of extent E overlaps about 
+		E * resolution + 1 cells along each axis, this estimates the cell
+		entries.  Chosen is the resolution with the least sum of the 
+		Tetrahedra tested per query and the cells entered per Tetrahedron.
+		Large boxes are in many cells whatever the resolution, finer cells 
+		would only add to the upkeep."""
+
+		count = len(lowers)
+		if count == 0:
+			return 1
+
+		extents = (uppers - lowers) / (self.upper - self.lower)
+
+		resolutions = numpy.arange(1, 2 * int(numpy.ceil(count ** 
+				(1.0 / 3))) + 1)
+		entries = (extents[numpy.newaxis] * resolutions[:, numpy.newaxis, 
+				numpy.newaxis] + 1).prod(axis = 2).sum(axis = 1)
+
+		costs = entries / resolutions ** 3 + entries / count
+
+		return int(resolutions[costs.argmin()])
+
+	def _key(self, cells):
+		"""Returns the keys of the (N, 3) integer CELLS."""
+
+		return (cells[..., 0] * self.resolution + cells[..., 1]) * \
+				self.resolution + cells[..., 2]
+
+	def _cell(self, positions):
+		"""Returns the integer cell coordinates of the (..., 3) POSITIONS,
+		clipped to the grid."""
+
+		cells = numpy.floor((positions - self.lower) / self.cell_size)
+
+		return numpy.clip(cells, 0, self.resolution - 1).astype(numpy.int64)
+
+	def _cells(self, indices):
+		"""Returns (keys, entries), the keys of the cells overlapped by the 
+		bounding boxes of the Tetrahedra INDICES, and the Tetrahedra for 
+		each of them."""
+
+		tetrahedra = self.world.store.tetrahedra
+		indices = numpy.asarray(indices, dtype = numpy.int_)
+
+		(boxes, cells) = matplot3dext.objects.kernels.box_cells(
+				self._cell(tetrahedra['lower'][indices]),
+				self._cell(tetrahedra['upper'][indices]))
+
+		return (self._key(cells), indices[boxes])
+
+	def insert(self, index):
+		"""Register Tetrahedron INDEX, it is entered into the cells with
+		the others pending before the next query."""
+
+		self.pending.append(index)
+		self.added += 1
+
+	def remove(self, index):
+		"""Tetrahedron INDEX is skipped by the queries from now on."""
+
+		pass
+
+	def candidates(self, position):
+		"""The Tetrahedra overlapping the cell of POSITION."""
+
+		if self.added >= max(self.built, 16):
+			self.build()
+
+		elif self.pending:
+			(keys, entries) = self._cells(self.pending)
+			self.pending = []
+
+			for (key, entry) in zip(keys.tolist(), entries.tolist()):
+				self.inserted.setdefault(key, []).append(entry)
+
+		position = numpy.asarray(position, dtype = numpy.float64)
+		key = self._key(self._cell(position))
+
+		found = self.inserted.get(int(key), [])
+
+		slot = numpy.searchsorted(self.keys, key)
+		if slot < len(self.keys) and self.keys[slot] == key:
+			found = numpy.append(found, 
+					self.entries[self.starts[slot]:self.starts[slot + 1]])
+
+		found = numpy.unique(numpy.asarray(found, dtype = numpy.int_))
+
+		return found[self.world.store.tetrahedra.alive[found]]
+
+
+class WalkLocator(Locator):
+	"""Visibility walk through the Tetrahedra, seeded from the Tetrahedron
+	found by the previous query.  From the current Tetrahedron, the walk 
+	steps across the Face opposite to the point with the most negative 
+	barycentric coordinate, until the position is inside.  Cheap for 
+	spatially coherent queries.  When the walk cannot start or gets stuck,
+	the query is handed over to a fallback Locator."""
+
+	def __init__(self, world, fallback):
+		"""FALLBACK is the Locator used when the walk fails."""
+
+		Locator.__init__(self, world)
+
+		self.fallback = fallback
+
+		# The .store index of the last Tetrahedron found.
+		self.last = -1
+
+	def reset_counters(self):
+		"""Reset .queries, .tested, and .fallbacks to zero."""
+
+		Locator.reset_counters(self)
+
+		self.fallbacks = 0
+
+	#
+	# Maintenance ...
+	#
+
+	def insert(self, index):
+		"""Register Tetrahedron INDEX with the fallback.  It is the next
+		starting point, new Tetrahedra are created where the last Point was
+		inserted."""
+
+		self.fallback.insert(index)
+
+		self.last = index
+
+	def remove(self, index):
+		"""Unregister Tetrahedron INDEX from the fallback.  If it is the
+		starting point, start from one of its neighbours instead."""
+
+		self.fallback.remove(index)
+
+		if index == self.last:
+			self.last = -1
+
+			tetrahedra = self.world.store.tetrahedra
+
+			for neighbour in tetrahedra['neighbours'][index]:
+				if neighbour >= 0 and tetrahedra.alive[neighbour]:
+					self.last = int(neighbour)
+					break
+
+	#
+	# Queries ...
+	#
+
+	def candidates(self, position):
+		"""Walking needs no candidate list, use the fallback's."""
+
+		return self.fallback.candidates(position)
+
+	def locate(self, position, tol = None):
+		"""Walk from the last Tetrahedron found towards 3-vector POSITION.
+		Returns (index, coordinates) as Locator.locate() does."""
+
+		if tol is None:
+			tol = 0.0
+
+		position = numpy.asarray(position, dtype = numpy.float64)
+
+		self.queries += 1
+
+		# Positions outside of the world are never inside some 
+		# Tetrahedron, TOL widens the world like the Tetrahedra ...
+
+		margin = tol * (self.world.upper - self.world.lower)
+
+		if (position < self.world.lower - margin).any() or \
+				(position > self.world.upper + margin).any():
+			return (-1, numpy.nan * numpy.ones(3))
+
+		tetrahedra = self.world.store.tetrahedra
+
+		if self.last < 0 or not tetrahedra.alive[self.last]:
+			return self._locate_fallback(position, tol)
+
+		bases = tetrahedra['base']
+		matrices = tetrahedra['matrix']
+		neighbours = tetrahedra['neighbours']
+
+		current = self.last
+		visited = set()
+
+		while True:
+			self.tested += 1
+			visited.add(current)
+
+			coordinates = numpy.dot(matrices[current], 
+					position - bases[current])
+			weights = numpy.hstack(([1 - coordinates.sum()], coordinates))
+
+			if (weights >= -tol).all():
+				self.last = current
+				return (current, coordinates)
+
+			# Step across the Face opposite to the most violated point ...
+
+			current = int(neighbours[current, weights.argmin()])
+
+			if current < 0:
+				# Left the world through its surface although the 
+				# position is inside of the world's box.
+				break
+
+			if current in visited:
+				# Cycling, can happen in badly shaped tetrahedralisations.
+				break
+
+		return self._locate_fallback(position, tol)
+
+	def locate_many(self, positions, tol = None):
+		"""Walk towards all (N, 3) POSITIONS at once, from the last 
+		Tetrahedron found.  The positions whose walk fails are handed over
+		to the fallback one by one."""
+
+		positions = numpy.asarray(positions, dtype = numpy.float64).\
+				reshape((-1, 3))
+
+		start = []
+		if self.last >= 0 and self.world.store.tetrahedra.alive[self.last]:
+			start = [self.last]
+
+		(indices, coordinates, failed) = self.walk_many(positions, start,
+				tol)
+
+		self.queries += len(positions)
+
+		for row in failed.tolist():
+			(indices[row], coordinates[row]) = self._locate_fallback(
+					positions[row], tol)
+
+		located = indices[indices >= 0]
+		if len(located):
+			self.last = int(located[-1])
+
+		return (indices, coordinates)
+
+	def _locate_fallback(self, position, tol):
+		"""Locate POSITION using the fallback, and seed the next walk with
+		the result."""
+
+		self.fallbacks += 1
+
+		tested = self.fallback.tested
+		(index, coordinates) = self.fallback.locate(position, tol)
+		self.tested += self.fallback.tested - tested
+
+		if index >= 0:
+			self.last = index
+
+		return (index, coordinates)
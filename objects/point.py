@@ -20,13 +20,20 @@
 
 # Developed since: Mar 2010
 
-import numpy
+import matplot3dext.renderers.registry
 
 """matplot3dext points."""
 
 
-class Point:
-	"""Matplot3dext point class."""
+class Point(object):
+	"""Matplot3dext point class.  A handle into the position buffer of the
+	World's store."""
+
+	# Dimension of the object, used to select the Table in the store.
+	ndim = 0
+
+	__slots__ = ('world', 'index', 'visible',
+			'attached_lines', 'attached_faces', 'attached_tetrahedra')
 
 	def __init__(self, position, 
 			renderers_point,
@@ -42,61 +49,93 @@ class Point:
 		if visible is None:
 			visible = True
 	
-		self.position = numpy.asarray(position)
+		self.world = world
 		self.visible = visible
 
 		# Initialise empty attributes ...
 
-		self.renderers_point = renderers_point
-		self.renderers_line = renderers_line
-		self.renderers_face = renderers_face
-
 		self.attached_lines = set()
 		self.attached_faces = set()
 		self.attached_tetrahedra = set()
 
-		world.add_point(self)
+		self.index = world.add_point(self, position)
+
+		# Write the renderer masks, nothing is attached yet which would 
+		# need marking ...
+
+		points = world.store.points
+
+		points['renderers_point'][self.index] = \
+				world.registry.mask(renderers_point)
+		points['renderers_line'][self.index] = \
+				world.registry.mask(renderers_line)
+		points['renderers_face'][self.index] = \
+				world.registry.mask(renderers_face)
+
+	def _get_position(self):
+		"""Returns a read-only view of the row of the World's position 
+		buffer belonging to this Point.  Points do not move, the Lines, 
+		Faces, and Tetrahedra attached cache their bounds and coordinate
+		matrices."""
+
+		position = self.world.store.points['position'][self.index]
+		position.setflags(write = False)
+
+		return position
+
+	position = property(_get_position)
 
 	#
-	# Renderer addition ...
+	# Renderers ...
 	#
 
+	renderers_point = matplot3dext.renderers.registry.\
+			renderers_property('renderers_point')
+	renderers_line = matplot3dext.renderers.registry.\
+			renderers_property('renderers_line')
+	renderers_face = matplot3dext.renderers.registry.\
+			renderers_property('renderers_face')
+
 	def attach_renderers(self, 
 			renderers_point,
 			renderers_line,
 			renderers_face):
 		"""Adds the renderers RENDERERS_POINT, RENDERERS_LINE, and
-		RENDERERS_FACE to the Point.  Update lines attached."""
+		RENDERERS_FACE to the Point.  The Lines and Faces attached are 
+		marked, and updated in one sweep by Store.resolve_renderers() when
+		their renderers are needed."""
+
+		registry = self.world.registry
+		store = self.world.store
+		points = store.points
 
-		self.renderers_point |= renderers_point
-		self.renderers_line |= renderers_line
-		self.renderers_face |= renderers_face
+		points['renderers_point'][self.index] |= \
+				registry.mask(renderers_point)
+		points['renderers_line'][self.index] |= \
+				registry.mask(renderers_line)
+		points['renderers_face'][self.index] |= \
+				registry.mask(renderers_face)
 
-		for line in self.attached_lines:
-			line.update_renderers_from_points()
+		store.mark_renderers(1, [line.index for line in self.attached_lines])
+		store.mark_renderers(2, [face.index for face in self.attached_faces])
 
 	#
 	# Connection methods ...
 	#
 
 	def attach_line(self, line):
-		"""Attach Line LINE.  Do not update the LINE's renderers.  Attaches
-		also all Faces attached to LINE."""
+		"""Attach Line LINE.  Do not update the LINE's renderers."""
 
 		self.attached_lines.add(line)
 
-		self.attached_faces |= line.attached_faces
-
 	def detach_line(self, line):
-		"""Detach Line LINE.  Also detaches the Faces attached to LINE."""
+		"""Detach Line LINE.  Its Faces are destroyed before."""
 
 		self.attached_lines.remove(line)
-		self.attached_faces -= line.attached_faces
 
 	def attach_face(self, face):
-		"""Attach Face FACE.  Do not update the FACE's renderers.  Assume that
-		the .attached_lines of the FACE are already attached (do not attach
-		the FACE's .attached_lines to self)."""
+		"""Attach Face FACE.  Do not update the FACE's renderers.  The 
+		Lines of the FACE find it here."""
 
 		self.attached_faces.add(face)
 
@@ -106,8 +145,7 @@ class Point:
 		self.attached_faces.remove(face)
 
 	def attach_tetrahedron(self, tetrahedron):
-		"""Attach Tetrahedron TETRAHEDRON.  Assume that the .attached_faces
-		of  TETRAHEDRON are already attached."""
+		"""Attach Tetrahedron TETRAHEDRON."""
 
 		self.attached_tetrahedra.add(tetrahedron)
 
@@ -139,7 +177,7 @@ class Point:
 	def destroy(self, world):
 		"""Resolves reference loops.  Destroys all attached lines too."""
 
-		for line in self.attached_lines:
+		for line in list(self.attached_lines):
 			line.destroy()
 
 		self.attached_lines = set()
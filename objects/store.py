@@ -0,0 +1,634 @@
+# Copyright (c) 2010 Friedrich Romstedt <www.friedrichromstedt.org>
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+import numpy
+
+"""Struct-of-arrays storage of matplot3dext worlds.  The positions and the
+connectivity of all objects of a World live in numpy arrays owned by the
+World's Store, the Point, Line, Face, and Tetrahedron instances are thin
+handles (an index plus the world) into them."""
+
+
+class Table:
+	"""A growable table of rows, stored column-wise in numpy arrays.  Each 
+	row belongs to one handle object, the row number is the handle's 
+	.index."""
+
+	def __init__(self, capacity = None):
+		"""CAPACITY is the number of rows allocated initially, it defaults
+		to 64.  The columns grow geometrically when they are exhausted."""
+
+		if capacity is None:
+			capacity = 64
+
+		self.capacity = capacity
+		self.size = 0
+		self.count = 0
+
+		self.columns = {}
+		self.fills = {}
+
+		# Maps column names to the Tables whose indices they hold.
+		self.references = {}
+
+		self.objects = [None] * capacity
+		self.alive = numpy.zeros(capacity, dtype = numpy.bool_)
+
+		# Indices of removed rows, reused by .append().
+		self.free = []
+
+		# Incremented whenever rows are added, removed, or moved, such that
+		# results derived from the Table can be cached.  .stamps hold the
+		# .version at which each row was last written, such that rows 
+		# changed since can be found.
+		self.version = 0
+		self.stamps = numpy.zeros(capacity, dtype = numpy.int64)
+
+	#
+	# Column management ...
+	#
+
+	def add_column(self, name, shape, dtype, fill, refers = None):
+		"""Add column NAME holding rows of shape SHAPE and dtype DTYPE.  
+		Unused rows are set to FILL.  If the column holds indices into 
+		another Table, give that Table as REFERS, so that the indices are
+		updated by Store.compact()."""
+
+		column = numpy.empty((self.capacity,) + tuple(shape), dtype = dtype)
+		column[...] = fill
+
+		self.columns[name] = column
+		self.fills[name] = fill
+
+		if refers is not None:
+			self.references[name] = refers
+
+	def __getitem__(self, name):
+		"""Returns the complete column NAME, including unused rows.  The
+		array is replaced when the Table grows, so do not keep references
+		across additions."""
+
+		return self.columns[name]
+
+	#
+	# Row management ...
+	#
+
+	def append(self, object, **values):
+		"""Append a row for handle OBJECT, VALUES give the column values.
+		Columns not mentioned keep their fill value.  The row of the most
+		recently removed object is reused if there is one.  Returns the 
+		index of the new row."""
+
+		if self.free:
+			index = self.free.pop()
+
+		else:
+			if self.size == self.capacity:
+				self._grow()
+
+			index = self.size
+			self.size += 1
+
+		for (name, value) in values.items():
+			self.columns[name][index] = value
+
+		self.objects[index] = object
+		self.alive[index] = True
+		self.count += 1
+		self.version += 1
+		self.stamps[index] = self.version
+
+		return index
+
+	def extend(self, count, **values):
+		"""Append COUNT rows at once, as .append() does for each.  VALUES 
+		give the column values as arrays of COUNT rows.  The objects of the
+		rows are set by the caller.  Returns the (COUNT,) array of the 
+		indices of the new rows."""
+
+		# Reuse free rows first, the most recently removed first ...
+
+		reused = self.free[len(self.free) - min(count, len(self.free)):]
+		del self.free[len(self.free) - len(reused):]
+
+		appended = count - len(reused)
+		while self.size + appended > self.capacity:
+			self._grow()
+
+		indices = numpy.concatenate((
+				numpy.asarray(reused[::-1], dtype = numpy.int_),
+				numpy.arange(self.size, self.size + appended)))
+		self.size += appended
+
+		for (name, value) in values.items():
+			self.columns[name][indices] = value
+
+		self.alive[indices] = True
+		self.count += count
+		self.version += 1
+		self.stamps[indices] = self.version
+
+		return indices
+
+	def remove(self, index):
+		"""Remove row INDEX.  The row is reset to the fill values, and will
+		be reused by later .append()s."""
+
+		for (name, column) in self.columns.items():
+			column[index] = self.fills[name]
+
+		self.objects[index] = None
+		self.alive[index] = False
+		self.count -= 1
+		self.version += 1
+		self.stamps[index] = self.version
+
+		self.free.append(index)
+
+	def __len__(self):
+		"""Returns the number of rows in use."""
+
+		return self.count
+
+	def __iter__(self):
+		"""Iterates over the objects of the rows in use, in ascending order
+		of their indices.  Rows in use when the iteration starts are 
+		visited, unless they are removed in the meantime."""
+
+		objects = self.objects
+
+		for index in self.indices():
+			object = objects[index]
+
+			if object is not None:
+				yield object
+
+	def indices(self):
+		"""Returns the indices of all rows in use, in ascending order."""
+
+		return numpy.flatnonzero(self.alive[:self.size])
+
+	def compact(self):
+		"""Move the rows in use to the front, keeping their order, and 
+		update the .index of their objects.  Returns the mapping from the
+		old indices to the new ones, which is -1 for unused rows.  Indices
+		held in other Tables are not updated, see Store.compact()."""
+
+		indices = self.indices()
+		count = len(indices)
+
+		mapping = numpy.empty(self.size, dtype = numpy.int_)
+		mapping[...] = -1
+		mapping[indices] = numpy.arange(count)
+
+		for (name, column) in self.columns.items():
+			column[:count] = column[indices]
+			column[count:self.size] = self.fills[name]
+
+		objects = [self.objects[index] for index in indices]
+		for (index, object) in enumerate(objects):
+			object.index = index
+
+		self.objects[:self.size] = objects + [None] * (self.size - count)
+
+		self.alive[:count] = True
+		self.alive[count:] = False
+
+		self.version += 1
+		self.stamps[:self.size] = self.version
+
+		self.size = count
+		self.free = []
+
+		return mapping
+
+	def _grow(self):
+		"""Double the capacity of all columns."""
+
+		new_capacity = 2 * self.capacity
+
+		for (name, column) in list(self.columns.items()):
+			new_column = numpy.empty(
+					(new_capacity,) + column.shape[1:], 
+					dtype = column.dtype)
+			new_column[:self.capacity] = column
+			new_column[self.capacity:] = self.fills[name]
+
+			self.columns[name] = new_column
+
+		new_alive = numpy.zeros(new_capacity, dtype = numpy.bool_)
+		new_alive[:self.capacity] = self.alive
+		self.alive = new_alive
+
+		new_stamps = numpy.zeros(new_capacity, dtype = numpy.int64)
+		new_stamps[:self.capacity] = self.stamps
+		self.stamps = new_stamps
+
+		self.objects.extend([None] * (new_capacity - self.capacity))
+
+		self.capacity = new_capacity
+
+
+class Store:
+	"""Holds the position buffer and the connectivity arrays of a World.  
+	Connectivity rows hold the .index of the Points attached."""
+
+	def __init__(self, capacity = None):
+		"""CAPACITY is the initial capacity of each Table."""
+
+		self.points = Table(capacity)
+		self.points.add_column('position', (3,), numpy.float64, numpy.nan)
+
+		self.lines = Table(capacity)
+		self.lines.add_column('points', (2,), numpy.int32, -1,
+				refers = self.points)
+
+		self.faces = Table(capacity)
+		self.faces.add_column('points', (3,), numpy.int32, -1,
+				refers = self.points)
+
+		self.tetrahedra = Table(capacity)
+		self.tetrahedra.add_column('points', (4,), numpy.int32, -1,
+				refers = self.points)
+
+		# Axis-aligned bounding boxes of Lines, Faces, and Tetrahedra.
+		for table in [self.lines, self.faces, self.tetrahedra]:
+			table.add_column('lower', (3,), numpy.float64, numpy.nan)
+			table.add_column('upper', (3,), numpy.float64, numpy.nan)
+
+		# Adjacency:  Face k of a Tetrahedron is opposite to its Point k, 
+		# and neighbour k is the Tetrahedron on the other side of Face k.
+		# Faces hold the Tetrahedra attached, up to three while 
+		# Tetrahedron.replace_by() has created new Tetrahedra but not yet
+		# destroyed the old one.  Points hold one of their Tetrahedra.
+		self.tetrahedra.add_column('faces', (4,), numpy.int32, -1,
+				refers = self.faces)
+		self.tetrahedra.add_column('neighbours', (4,), numpy.int32, -1,
+				refers = self.tetrahedra)
+		self.faces.add_column('tetrahedra', (3,), numpy.int32, -1,
+				refers = self.tetrahedra)
+		self.points.add_column('tetrahedron', (), numpy.int32, -1,
+				refers = self.tetrahedra)
+
+		# Map the sorted Point indices of the Lines, Faces, and Tetrahedra
+		# to their indices, indexed by dimension.
+		self.simplices = [None, {}, {}, {}]
+
+		# The position of the base point and the inverse coordinate 
+		# matrix, mapping (position - base) onto the Tetrahedron's 
+		# coordinates.
+		self.tetrahedra.add_column('base', (3,), numpy.float64, numpy.nan)
+		self.tetrahedra.add_column('matrix', (3, 3), numpy.float64, 
+				numpy.nan)
+
+		# The Renderers applied, as masks of bits assigned by a 
+		# matplot3dext.renderers.registry.Registry.  Points carry the 
+		# renderers for all kinds of objects, Lines those for Lines and 
+		# Faces.
+		for name in ['renderers_point', 'renderers_line', 'renderers_face']:
+			self.points.add_column(name, (), numpy.uint64, 0)
+		for name in ['renderers_line', 'renderers_face']:
+			self.lines.add_column(name, (), numpy.uint64, 0)
+		self.faces.add_column('renderers_face', (), numpy.uint64, 0)
+
+		# Face renderers attached to the Faces themselves instead of 
+		# through their Points, see World.attach_face_renderers().  The 
+		# pieces of a Face inherit them.
+		self.faces.add_column('renderers_attached', (), numpy.uint64, 0)
+
+		# Lines and Faces whose masks are outdated, see 
+		# .resolve_renderers().  .renderers_dirty tells if there are any.
+		for table in [self.lines, self.faces]:
+			table.add_column('renderers_dirty', (), numpy.bool_, False)
+		self.renderers_dirty = False
+
+		# Indexed by the dimension of the objects held.
+		self.tables = [self.points, self.lines, self.faces, self.tetrahedra]
+
+	#
+	# Compaction ...
+	#
+
+	def compact(self):
+		"""Remove the unused rows of all Tables, and update the indices held
+		in columns referring to other Tables.  This changes the .index of 
+		the objects."""
+
+		mappings = {}
+		for table in self.tables:
+			mappings[id(table)] = table.compact()
+
+		for table in self.tables:
+			for (name, target) in table.references.items():
+				mapping = mappings[id(target)]
+				column = table[name][:table.size]
+
+				used = column >= 0
+				column[used] = mapping[column[used]]
+
+		for ndim in [1, 2, 3]:
+			self.simplices[ndim] = {}
+			for index in self.tables[ndim].indices():
+				self.register(ndim, index)
+
+	#
+	# Connectivity ...
+	#
+
+	def _key(self, ndim, index):
+		"""Returns the sorted Point indices of object INDEX of dimension 
+		NDIM."""
+
+		return tuple(sorted(self.tables[ndim]['points'][index].tolist()))
+
+	def register(self, ndim, index):
+		"""Make the object with index INDEX and dimension NDIM available to
+		.find()."""
+
+		self.simplices[ndim][self._key(ndim, index)] = index
+
+	def unregister(self, ndim, index):
+		"""Revert .register()."""
+
+		del self.simplices[ndim][self._key(ndim, index)]
+
+	def find(self, points):
+		"""Returns the Line, Face, or Tetrahedron spanned by the sequence of
+		Points POINTS, or None if there is none."""
+
+		key = tuple(sorted([point.index for point in points]))
+		ndim = len(key) - 1
+
+		index = self.simplices[ndim].get(key)
+		if index is None:
+			return None
+
+		return self.tables[ndim].objects[index]
+
+	def contains(self, object):
+		"""Returns whether the handle OBJECT is in the .store, i.e., has 
+		not been destroyed."""
+
+		return self.tables[object.ndim].objects[object.index] is object
+
+	def opposite_point(self, object, part):
+		"""Returns the Point of Face or Tetrahedron OBJECT which is not in 
+		its Line or Face PART."""
+
+		points = self.tables[object.ndim]['points'][object.index].tolist()
+		excluded = self.tables[part.ndim]['points'][part.index].tolist()
+
+		index, = [point for point in points if point not in excluded]
+
+		return self.points.objects[index]
+
+	def attached(self, object, name, ndim):
+		"""Returns the set of the objects of dimension NDIM whose indices
+		are held in column NAME of the row of handle OBJECT.  Unused 
+		entries (-1) are skipped, a destroyed OBJECT has none attached."""
+
+		table = self.tables[object.ndim]
+		if table.objects[object.index] is not object:
+			return set()
+
+		objects = self.tables[ndim].objects
+
+		return set([objects[index] for index in 
+				table[name][object.index].tolist() if index >= 0])
+
+	def attach_tetrahedron(self, index):
+		"""Enter the Tetrahedron INDEX into the adjacency arrays.  Its Faces
+		must be registered."""
+
+		points = self.tetrahedra['points'][index].tolist()
+
+		for slot in range(4):
+			others = points[:slot] + points[slot + 1:]
+			face = self.simplices[2][tuple(sorted(others))]
+
+			self.tetrahedra['faces'][index, slot] = face
+
+			attached = self.faces['tetrahedra'][face]
+			free = numpy.flatnonzero(attached < 0)
+			if len(free) == 0:
+				raise RuntimeError('Face attached to more than three Tetrahedra.')
+			attached[free[0]] = index
+
+			self._link(face)
+
+		self.points['tetrahedron'][points] = index
+
+	def attach_tetrahedra(self, indices):
+		"""Enter the Tetrahedra INDICES into the adjacency arrays at once, 
+		as .attach_tetrahedron() does for each.  Their Faces must be 
+		registered, and must be left with at most two Tetrahedra."""
+
+		indices = numpy.asarray(indices, dtype = numpy.int_)
+		points = self.tetrahedra['points'][indices]
+
+		# Face k is opposite to point k ...
+
+		simplices = self.simplices[2]
+		faces = numpy.asarray([[simplices[tuple(sorted(row[:slot] + 
+					row[slot + 1:]))] for slot in range(4)] 
+				for row in points.tolist()], dtype = numpy.int_).\
+				reshape((-1, 4))
+
+		self.tetrahedra['faces'][indices] = faces
+
+		# Enter the Tetrahedra into the Faces, behind the Tetrahedra 
+		# attached already, moved to the front ...
+
+		attached = self.faces['tetrahedra']
+
+		touched = numpy.unique(faces)
+		attached[touched] = -numpy.sort(-attached[touched], axis = 1)
+
+		flat_faces = faces.ravel()
+		flat_tetrahedra = numpy.repeat(indices, 4)
+
+		order = numpy.argsort(flat_faces, kind = 'mergesort')
+		(flat_faces, flat_tetrahedra) = \
+				(flat_faces[order], flat_tetrahedra[order])
+
+		starts = numpy.flatnonzero(numpy.hstack(([True], 
+				flat_faces[1:] != flat_faces[:-1])))
+		ranks = numpy.arange(len(flat_faces)) - numpy.repeat(starts, 
+				numpy.diff(numpy.hstack((starts, [len(flat_faces)]))))
+
+		slots = (attached[flat_faces] >= 0).sum(axis = 1) + ranks
+		if (slots > 1).any():
+			raise RuntimeError('Face attached to more than two Tetrahedra.')
+
+		attached[flat_faces, slots] = flat_tetrahedra
+
+		# The neighbour across each Face is the other Tetrahedron 
+		# attached ...
+
+		others = attached[faces]
+		others = numpy.where((others >= 0) & 
+				(others != indices[:, numpy.newaxis, numpy.newaxis]),
+				others, -1).max(axis = 2)
+
+		self.tetrahedra['neighbours'][indices] = others
+
+		# ... and the Tetrahedra outside see the new ones across the 
+		# Faces ...
+
+		(rows, slots) = numpy.nonzero(others >= 0)
+		outside = others[rows, slots]
+
+		outside_slots = (self.tetrahedra['faces'][outside] == 
+				faces[rows, slots][:, numpy.newaxis]).argmax(axis = 1)
+		self.tetrahedra['neighbours'][outside, outside_slots] = indices[rows]
+
+		self.points['tetrahedron'][points] = indices[:, numpy.newaxis]
+
+	def detach_tetrahedron(self, index):
+		"""Remove the Tetrahedron INDEX from the adjacency arrays."""
+
+		points = self.tetrahedra['points'][index].tolist()
+		neighbours = self.tetrahedra['neighbours'][index].tolist()
+
+		for face in self.tetrahedra['faces'][index].tolist():
+			attached = self.faces['tetrahedra'][face]
+			attached[attached == index] = -1
+
+			self._link(face)
+
+		# Hand the Points over to a neighbour sharing them ...
+
+		incident = self.points['tetrahedron']
+
+		for (slot, point) in enumerate(points):
+			if incident[point] == index:
+				candidates = [neighbour for (other, neighbour) in 
+						enumerate(neighbours) 
+						if other != slot and neighbour >= 0]
+
+				if candidates:
+					incident[point] = candidates[0]
+				else:
+					incident[point] = -1
+
+	def _link(self, face):
+		"""Update the neighbours of the Tetrahedra attached to FACE."""
+
+		attached = [tetrahedron for tetrahedron in 
+				self.faces['tetrahedra'][face].tolist() if tetrahedron >= 0]
+
+		if len(attached) > 2:
+			# Replacement in progress, wait for the old Tetrahedron to
+			# be detached.
+			return
+
+		for tetrahedron in attached:
+			slot = self.tetrahedra['faces'][tetrahedron].tolist().index(face)
+			others = [other for other in attached if other != tetrahedron]
+
+			if others:
+				self.tetrahedra['neighbours'][tetrahedron, slot] = others[0]
+			else:
+				self.tetrahedra['neighbours'][tetrahedron, slot] = -1
+
+	#
+	# Array access ...
+	#
+
+	def positions(self):
+		"""Returns the (N, 3) position buffer, including unused rows (filled
+		with NaN)."""
+
+		return self.points['position'][:self.points.size]
+
+	def connectivity(self, ndim):
+		"""Returns the connectivity array of the objects of dimension NDIM
+		(1 for Lines, 2 for Faces, 3 for Tetrahedra), including unused rows 
+		(filled with -1)."""
+
+		table = self.tables[ndim]
+		return table['points'][:table.size]
+
+	#
+	# Bounding boxes ...
+	#
+
+	def box(self, points):
+		"""Returns the bounding box (lower, upper) of the Points with .store
+		indices POINTS."""
+
+		corners = self.positions()[points]
+
+		return (corners.min(axis = 0), corners.max(axis = 0))
+
+	def bounds(self, object):
+		"""Returns the cached bounding box (lower, upper) of handle 
+		OBJECT."""
+
+		if object.ndim == 0:
+			position = self.points['position'][object.index]
+			return (position, position)
+
+		table = self.tables[object.ndim]
+
+		return (table['lower'][object.index], table['upper'][object.index])
+
+	#
+	# Renderer masks ...
+	#
+
+	def mark_renderers(self, ndim, indices):
+		"""Mark the masks of the Lines (NDIM = 1) or Faces (NDIM = 2) with
+		.store indices INDICES as outdated."""
+
+		self.tables[ndim]['renderers_dirty'][indices] = True
+		self.renderers_dirty = True
+
+	def resolve_renderers(self):
+		"""Recalculate the masks of all marked Lines and Faces from their 
+		Points, in one sweep per kind.  The mask of a Line is the AND of the
+		masks of its Points, and so is the Face mask, being the AND of the
+		masks of its Lines, plus the renderers attached to the Face 
+		itself."""
+
+		if not self.renderers_dirty:
+			return
+
+		for (table, names) in [
+				(self.lines, ['renderers_line', 'renderers_face']),
+				(self.faces, ['renderers_face'])]:
+			dirty = table['renderers_dirty'][:table.size]
+			indices = numpy.flatnonzero(dirty & table.alive[:table.size])
+
+			points = table['points'][indices]
+
+			for name in names:
+				table[name][indices] = numpy.bitwise_and.reduce(
+						self.points[name][points], axis = 1)
+
+			if table is self.faces:
+				table['renderers_face'][indices] |= \
+						table['renderers_attached'][indices]
+
+			dirty[:] = False
+
+		self.renderers_dirty = False
@@ -28,7 +28,7 @@ in object-specific base and support projection operations.  They store also
 the renders to apply to the newly created objects."""
 
 
-class Subdivion:
+class Subdivision:
 	"""Subdivisions describe an subdivision task.  They contain a coordinate
 	in object-specific base and support projection operations.  They store 
 	also the renders to apply to the newly created objects. 
@@ -103,20 +103,33 @@ class Subdivion:
 						end_point in self.end_points])
 		
 		new_point_translation = \
-				numpy.dot(translation_matrix, self.coordinates)
+				numpy.dot(self.coordinates, translation_matrix)
 
 		new_point_position = base_position + new_point_translation
 
 		new_point = matplot3dext.objects.point.Point(new_point_position,
 				renderers_point = self.renderers_point,
 				renderers_line = self.renderers_line,
-				renderers_face = self.renderers_face)
+				renderers_face = self.renderers_face,
+				world = self.world)
+
+		# Interpolate the Point attributes of the world ...
+
+		corners = [self.base_point.index] + \
+				[end_point.index for end_point in self.end_points]
+		weights = numpy.hstack(([1 - self.coordinates.sum()], 
+				self.coordinates))
+
+		self.world.interpolate_point_attributes(
+				[new_point.index], [corners], [weights])
+
+		return new_point
 
 	#
 	# Coordinate neglection methods ...
 	#
 
-	def neglect_coordinte(self, coordinate_idx, new_base_point):
+	def neglect_coordinate(self, coordinate_idx, new_base_point):
 		"""Returns a new Subdivision, neglecting coordinate COORDINATE_IDX."""
 
 		# That's easy, simply neglect the according COORDINATE_IDX ...
@@ -136,7 +149,8 @@ class Subdivion:
 				renderers_point = self.renderers_point,
 				renderers_line = self.renderers_line,
 				renderers_face = self.renderers_face,
-				tol = self.tol)
+				tol = self.tol,
+				world = self.world)
 	
 	def neglect_base_point(self):
 		"""Returns a new Subdivision, neglecting the .base_point."""
@@ -156,7 +170,8 @@ class Subdivion:
 				renderers_point = self.renderers_point,
 				renderers_line = self.renderers_line,
 				renderers_face = self.renderers_face,
-				tol = self.tol)
+				tol = self.tol,
+				world = self.world)
 
 	#
 	# Reduce method ...
@@ -165,15 +180,20 @@ class Subdivion:
 	def reduce(self):
 		"""Reduce as far as possible.  Returns the reduced Subdivision."""
 
+		# Check for a neglectable base point ...
+
+		if self.ndim > 0 and self.basepoint_neglectable():
+			return self.neglect_base_point().reduce()
+
 		# Check for negnectable end_points ...
 
-		for coordinate_idx in xrange(self.ndim):
+		for coordinate_idx in range(self.ndim):
 			if self.coordinate_is_zero(coordinate_idx):
 				# Use self.base_point as new_base_point.
 				reduced = self.neglect_coordinate(coordinate_idx,
 						new_base_point = self.base_point)
 				return reduced.reduce()
-			elif self.coordinate_is_unity(coordinate_idx)
+			elif self.coordinate_is_unity(coordinate_idx):
 				# Use the end_point as new_base_point.
 				reduced = self.neglect_coordinate(coordinate_idx,
 						new_base_point = self.end_points[coordinate_idx])
@@ -189,62 +209,38 @@ class Subdivion:
 		.ndim > 0, SUBDIVISION_POINT can be given, else a new subdivision
 		Point will be created."""
 
-		if subdivision_point is None:
-			if self.ndim == 0:
+		if self.ndim == 0:
+			if subdivision_point is not None:
 				raise RuntimeError('Cannot override the subdivision point of an ndim = 0 Subdivision.')
-			subdivision_point = self._get_subdivision_point()
 
-		if self.ndim == 0:
 			return self.base_point.subdivide(self)
 
-		elif self.ndim == 1:
+		if subdivision_point is None:
+			subdivision_point = self._get_subdivision_point()
+
+		if self.ndim == 1:
 			# Find the connecting line.
-			line, = self.base_point.attached_lines & \
-					self.end_points[0].attached_lines
+			line = self.world.store.find(
+					[self.base_point] + self.end_points)
 
 			return line.subdivide(self, subdivision_point)
 
 		elif self.ndim == 2:
 			# Find the common face.
-			line1, line2, line3 = \
-					self.base_point.attached_lines & \
-					self.end_points[0].attached_lines & \
-					self.end_points[1].attached_lines
-
-			face, = \
-					line1.attached_faces & \
-					line2.attached_faces & \
-					line3.attached_faces
+			face = self.world.store.find(
+					[self.base_point] + self.end_points)
 
 			return face.subdivide(self, subdivision_point)
 
 		elif self.ndim == 3:
 			# Find the common tetrahedron.
-
-			line1, line2, line3, line4, line5, line6 = \
-					self.base_point.attached_lines & \
-					self.end_points[0].attached_lines & \
-					self.end_points[1].attached_lines & \
-					self.end_points[2].attached_lines
-
-			face1, face2, face3, face4 = \
-					line1.attached_faces & \
-					line2.attached_faces & \
-					line3.attached_faces & \
-					line4.attached_faces & \
-					line5.attached_faces & \
-					line6.attached_faces
-
-			tetrahedron, = \
-					face1.attached_tetrahedra & \
-					face2.attached_tetrahedra & \
-					face3.attached_tetrahedra & \
-					face4.attached_tetrahedra
+			tetrahedron = self.world.store.find(
+					[self.base_point] + self.end_points)
 
 			return tetrahedron.subdivide(self, subdivision_point)
 
 		else:
-			raise RuntimError("Subdivision of > 3-dimensional object.")
+			raise RuntimeError("Subdivision of > 3-dimensional object.")
 
 	# 
 	# Base point switching ...
@@ -21,58 +21,97 @@
 # Developed since: Mar 2010
 
 import numpy
+import matplot3dext.objects.point
 import matplot3dext.objects.line
 import matplot3dext.objects.face
+import matplot3dext.objects.kernels
 
 """matplot3dext tetrahedra."""
 
 
-class Tetrahedron:
+class Tetrahedron(object):
 	"""matplot3dext tetrahedra."""
 
-	def __init__(self, face1, face2, face3, face4, world):
-		"""Create new tetrahedron between FACE1..4.  Extracts the lines and
-		the points from the faces too.  The faces are matplot3dext.objects.\
-		face.Face instances."""
+	ndim = 3
 
-		self.attached_faces = set([face1, face2, face3, face4])
+	__slots__ = ('world', 'index')
 
-		# Attach to the faces ...
+	def __init__(self, face1, face2, face3, face4, world, index = None):
+		"""Create new tetrahedron between FACE1..4.  Extracts the points 
+		from the faces.  The faces are matplot3dext.objects.face.Face 
+		instances.  INDEX is given for Tetrahedra added already, as for 
+		matplot3dext.objects.line.Line."""
 
-		for face in self.attached_faces:
-			face.attach_tetrahedron(self)
+		self.world = world
 
-		# Attach to all points ...
+		if index is None:
+			points = face1.attached_points | face2.attached_points | \
+					face3.attached_points | face4.attached_points
 
-		self.attached_points = set()
-		for face in self.attached_faces:
-			self.attached_points |= face.attached_points
+			# The World calculates the inverse coordinate matrix, the 
+			# first Point is the base point.
+			self.index = world.add_tetrahedron(self, list(points))
 
-		for point in self.attached_points:
+		else:
+			self.index = index
+			world.tetrahedra.objects[index] = self
+
+			points = self.attached_points
+
+		# Attach to all points, the Faces find their Tetrahedra in the 
+		# adjacency arrays of the .store ...
+
+		for point in points:
 			point.attach_tetrahedron(self)
 
-		# Create the inverse coordinate matrix ...
+	def _get_attached_points(self):
+		"""Returns the set of the four Points, from the .store."""
+
+		return self.world.store.attached(self, 'points', 0)
+
+	attached_points = property(_get_attached_points)
+
+	def _get_attached_faces(self):
+		"""Returns the set of the four Faces, from the adjacency arrays of 
+		the .store."""
+
+		return self.world.store.attached(self, 'faces', 2)
+
+	attached_faces = property(_get_attached_faces)
+
+	def _get_base_point(self):
+		"""Returns the Point at .base."""
+
+		store = self.world.store
+
+		return store.points.objects[store.tetrahedra['points'][self.index, 0]]
 
-		line1, line2, line3, line4, line5, line6 = \
-				face1.attached_lines | face2.attached_lines | \
-				face3.attached_lines | face4.attached_lines
+	base_point = property(_get_base_point)
 
-		self.base_point, \
-				self.end_point1, self.end_point2, self.end_point3 = \
-				line1.attached_points | line2.attached_points | \
-				line3.attached_points | line4.attached_points | \
-				line5.attached_points | line6.attached_points
+	def _get_end_points(self):
+		"""Returns the list of the three Points spanning the Tetrahedron 
+		with the .base_point."""
 
-		self.end_points = [self.end_point1, self.end_point2, self.end_point3]
+		store = self.world.store
 
-		self.base = self.base_point.position
-		self.ends = numpy.asarray(
-				[self.end_point1.position,
-				 self.end_point2.position,
-				 self.end_point3.position]) - self.base
-		self.coordinate_matrix = numpy.linalg.inv(self.ends.T)
+		return [store.points.objects[index] 
+				for index in store.tetrahedra['points'][self.index, 1:]]
 
-		world.add_tetrahedron(self)
+	end_points = property(_get_end_points)
+
+	def _get_base(self):
+		"""Returns the position of the .base_point."""
+
+		return self.world.store.tetrahedra['base'][self.index]
+
+	base = property(_get_base)
+
+	def _get_coordinate_matrix(self):
+		"""Returns the inverse coordinate matrix cached by the World."""
+
+		return self.world.store.tetrahedra['matrix'][self.index]
+
+	coordinate_matrix = property(_get_coordinate_matrix)
 
 	#
 	# Subdivision methods ...
@@ -83,62 +122,160 @@ class Tetrahedron:
 
 		assert(subdivision.ndim == 3)
 
-		# Find the attached faces.
-		face1, face2, face3, face4 = self.attached_faces
+		# Find the attached points and faces from the adjacency arrays, face
+		# k is opposite to point k.
+		world = self.world
+		store = world.store
+
+		point1, point2, point3, point4 = [store.points.objects[index] 
+				for index in store.tetrahedra['points'][self.index]]
+		face1, face2, face3, face4 = [store.faces.objects[index]
+				for index in store.tetrahedra['faces'][self.index]]
 
 		# Find the attached lines, and be able to associate them with the
-		# faces.
-		line12, = face1.attached_lines & face2.attached_lines
-		line13, = face1.attached_lines & face3.attached_lines
-		line14, = face1.attached_lines & face4.attached_lines
-		line23, = face2.attached_lines & face3.attached_lines
-		line24, = face2.attached_lines & face4.attached_lines
-		line34, = face3.attached_lines & face4.attached_lines
+		# faces.  The line common to two faces connects the points 
+		# opposite to the other two faces.
+		line12 = store.find([point3, point4])
+		line13 = store.find([point2, point4])
+		line14 = store.find([point2, point3])
+		line23 = store.find([point1, point4])
+		line24 = store.find([point1, point3])
+		line34 = store.find([point1, point2])
 
 		# Find the attached points, and be able to associate them with the 
 		# faces.
-		point123, = line12.attached_points & line13.attached_points
-		point124, = line12.attached_points & line14.attached_points
-		point134, = line13.attached_points & line14.attached_points
-		point234, = line23.attached_points & line24.attached_points
-
-		# Create the new lines.
-		new_line123 = matplot3dext.objects.line.Line(point123, new_point)
-		new_line124 = matplot3dext.objects.line.Line(point124, new_point)
-		new_line134 = matplot3dext.objects.line.Line(point134, new_point)
-		new_line234 = matplot3dext.objects.line.Line(point234, new_point)
+		point123 = point4
+		point124 = point3
+		point134 = point2
+		point234 = point1
+
+		# Create the new lines.  They are part of the tetrahedralisation,
+		# and do not look for intersections.
+		new_line123 = matplot3dext.objects.line.Line(point123, new_point,
+				world = world, search = False)
+		new_line124 = matplot3dext.objects.line.Line(point124, new_point,
+				world = world, search = False)
+		new_line134 = matplot3dext.objects.line.Line(point134, new_point,
+				world = world, search = False)
+		new_line234 = matplot3dext.objects.line.Line(point234, new_point,
+				world = world, search = False)
 
 		# Create the new faces.
 		new_face12 = matplot3dext.objects.face.Face(
-				line12, new_line123, new_line124)
+				line12, new_line123, new_line124,
+				world = world, search = False)
 		new_face13 = matplot3dext.objects.face.Face(
-				line13, new_line123, new_line134)
+				line13, new_line123, new_line134,
+				world = world, search = False)
 		new_face14 = matplot3dext.objects.face.Face(
-				line14, new_line124, new_line134)
+				line14, new_line124, new_line134,
+				world = world, search = False)
 		new_face23 = matplot3dext.objects.face.Face(
-				line23, new_line123, new_line234)
+				line23, new_line123, new_line234,
+				world = world, search = False)
 		new_face24 = matplot3dext.objects.face.Face(
-				line24, new_line124, new_line234)
+				line24, new_line124, new_line234,
+				world = world, search = False)
 		new_face34 = matplot3dext.objects.face.Face(
-				line34, new_line134, new_line234)
+				line34, new_line134, new_line234,
+				world = world, search = False)
 
 		# Create the new tetrahedra.
 		#
 		# Make a sketch to understand what's going on now.
 		new_tetrahedron1 = Tetrahedron(
-				face1, new_face12, new_face13, new_face14)
+				face1, new_face12, new_face13, new_face14, world = world)
 		new_tetrahedron2 = Tetrahedron(
-				face2, new_face12, new_face23, new_face24)
+				face2, new_face12, new_face23, new_face24, world = world)
 		new_tetrahedron3 = Tetrahedron(
-				face3, new_face13, new_face23, new_face34)
-		new_tetrahedron4 = TetrahedroN(
-				face4, new_face14, new_face24, new_face34)
+				face3, new_face13, new_face23, new_face34, world = world)
+		new_tetrahedron4 = Tetrahedron(
+				face4, new_face14, new_face24, new_face34, world = world)
 
-		self.replace_by([new_tetrahdron1, new_tetrahedron2, 
-				new_tetrahedron3, new_tetrahedron4], subdivision.world)
+		self.replace_by([new_tetrahedron1, new_tetrahedron2, 
+				new_tetrahedron3, new_tetrahedron4], world)
 
 		return new_point
 
+	def subdivide_many(self, positions,
+			renderers_point, renderers_line, renderers_face,
+			min_volume = None):
+		"""Create Points at all (N, 3) POSITIONS with RENDERERS_* in one go.
+		The POSITIONS must be strictly inside of this Tetrahedron.  The 
+		interior is retriangulated by a Delaunay tetrahedralisation of the
+		corners and POSITIONS, the four Faces are kept.  Positions whose 
+		insertion would create a Tetrahedron inverted or with a volume, 
+		relative to this Tetrahedron, up to MIN_VOLUME are left out, see 
+		matplot3dext.objects.kernels.delaunay_tetrahedra().  MIN_VOLUME 
+		defaults to 1e-12.
+
+		Returns the list of the new Points in the order of POSITIONS, with
+		None for the positions left out."""
+
+		if min_volume is None:
+			min_volume = 1e-12
+
+		world = self.world
+		store = world.store
+
+		positions = numpy.asarray(positions, dtype = numpy.float64).\
+				reshape((-1, 3))
+
+		# Local indices 0..3 are the corners in .store order, the
+		# POSITIONS follow.
+		corners = [store.points.objects[index] 
+				for index in store.tetrahedra['points'][self.index]]
+
+		(local, inserted) = matplot3dext.objects.kernels.\
+				delaunay_tetrahedra(
+					numpy.vstack([corner.position for corner in corners] + 
+						[positions]), 
+					min_volume = min_volume)
+
+		inserted = inserted[4:]
+
+		if not inserted.any():
+			return [None] * len(positions)
+
+		# Create the new Points ...
+
+		new_points = [None] * len(positions)
+		for index in numpy.flatnonzero(inserted):
+			new_points[index] = matplot3dext.objects.point.Point(
+					position = positions[index],
+					renderers_point = renderers_point,
+					renderers_line = renderers_line,
+					renderers_face = renderers_face,
+					world = world)
+
+		points = corners + new_points
+
+		# Interpolate the Point attributes of the world ...
+
+		coordinates = numpy.dot(positions[inserted] - self.base, 
+				self.coordinate_matrix.T)
+		weights = numpy.hstack((
+				1 - coordinates.sum(axis = 1)[:, numpy.newaxis], coordinates))
+
+		world.interpolate_point_attributes(
+				[point.index for point in new_points if point is not None],
+				numpy.tile(store.tetrahedra['points'][self.index], 
+					(len(coordinates), 1)),
+				weights)
+
+		# Replace this Tetrahedron by the new ones, creating the Lines and 
+		# Faces not present yet.  The boundary of this Tetrahedron is 
+		# reused ...
+
+		indices = numpy.asarray([-1 if point is None else point.index 
+				for point in points])
+
+		self.destroy(world)
+
+		world.add_tetrahedra(indices[local])
+
+		return new_points
+
 	def replace_by(self, new_tetrahedra, world):
 		"""Replace this Tetrahdedron by Tetrahedron instances 
 		NEW_TETRAHEDRA."""
@@ -164,17 +301,9 @@ class Tetrahedron:
 
 	def destroy(self, world):
 		"""Resolve the reference loops.  Detach the Tetrahedron from all 
-		Faces attached."""
+		Points attached, the World detaches it from the Faces."""
 		
-		for face in self.attached_faces:
-			face.detach_tetrahedron(self)
-
 		for point in self.attached_points:
-			point.detach_detrahedron(self)
-
-		self.attached_faces = set()
-		self.attached_points = set()
-
-		# self.point1 etc. do not result in a reference loop.
+			point.detach_tetrahedron(self)
 
 		world.remove_tetrahedron(self)
@@ -20,6 +20,8 @@
 
 # Developed since: Mar 2010
 
+import collections
+import itertools
 import numpy
 import matplot3dext.objects.point
 import matplot3dext.objects.line
@@ -27,27 +29,69 @@ import matplot3dext.objects.face
 import matplot3dext.objects.tetrahedron
 import matplot3dext.objects.subdivision
 import matplot3dext.objects.intersection
+import matplot3dext.objects.store
+import matplot3dext.objects.locator
+import matplot3dext.objects.kernels
+import matplot3dext.renderers.registry
 
 """matplot3dext world(s)."""
 
 
 class World:
 	"""matplot3dext world class.  Holds all Points, Lines, Faces, and
-	Tetrahedrons of a world."""
+	Tetrahedrons of a world.  Their positions and connectivity are stored in
+	the arrays of .store, the objects are handles into it."""
 
 	def __init__(self, 
 			xlim, ylim, zlim,
-			renderers_point, renderers_line, renderers_face):
+			renderers_point, renderers_line, renderers_face,
+			capacity = None, locator = None, tol = None):
 		"""Initialise the world covered to XLIM = (xstart, xstop), YLIM and 
 		ZLIM.  The default renderers are RENDERERS_POINT, RENDERERS_LINE, and
-		RENDERERS_FACE."""
+		RENDERERS_FACE.  CAPACITY is the number of objects of each kind the
+		.store allocates initially.  LOCATOR selects the point location 
+		index, see .set_locator(), it defaults to 'linear'.  TOL is the 
+		coordinate-absolute tolerance of the intersections found by Lines 
+		and Faces themselves, it defaults to 1e-9."""
 		
+		if tol is None:
+			tol = 1e-9
+
 		# Initialise the attributes ...
 
-		self.points = []
-		self.lines = []
-		self.faces = []
-		self.tetrahedra = []
+		self.tol = tol
+
+		self.store = matplot3dext.objects.store.Store(capacity)
+
+		# Assigns the bits of the renderer masks in the .store.
+		self.registry = matplot3dext.renderers.registry.Registry()
+
+		self.lower = numpy.asarray([xlim[0], ylim[0], zlim[0]], 
+				dtype = numpy.float64)
+		self.upper = numpy.asarray([xlim[1], ylim[1], zlim[1]],
+				dtype = numpy.float64)
+
+		self.set_locator(locator)
+
+		# Count the calls of .intersect(), and how many of them were 
+		# rejected before solving for the intersection.
+		self.intersect_calls = 0
+		self.intersect_rejects = 0
+
+		# Lines and Faces waiting for .search(), and whether a search is 
+		# running.
+		self.searches = collections.deque()
+		self.searching = False
+
+		# The collections of objects are the Tables of the .store.  They
+		# iterate in the order of the .store indices.
+		self.points = self.store.points
+		self.lines = self.store.lines
+		self.faces = self.store.faces
+		self.tetrahedra = self.store.tetrahedra
+
+		# Names of the Point attribute columns, see .add_point_attribute().
+		self.point_attributes = []
 
 		# Initialise the cube ...
 
@@ -99,6 +143,9 @@ class World:
 		# Create the connecting lines of the cube.
 		#
 		# You should make a sketch now.
+		#
+		# The cube is consistent by construction, hence its Lines and Faces
+		# do not look for intersections.
 		A = point111
 		B = point211
 		C = point121
@@ -108,46 +155,80 @@ class World:
 		G = point221
 		H = point222
 
-		AB = matplot3dext.objects.line.Line(A, B, world = self)
-		AC = matplot3dext.objects.line.Line(A, C, world = self)
-		AD = matplot3dext.objects.line.Line(A, D, world = self)
-		AE = matplot3dext.objects.line.Line(A, E, world = self)
-		AF = matplot3dext.objects.line.Line(A, F, world = self)
-		AG = matplot3dext.objects.line.Line(A, G, world = self)
-		BF = matplot3dext.objects.line.Line(B, F, world = self)
-		BG = matplot3dext.objects.line.Line(B, G, world = self)
-		CE = matplot3dext.objects.line.Line(C, E, world = self)
-		CG = matplot3dext.objects.line.Line(C, G, world = self)
-		DE = matplot3dext.objects.line.Line(D, E, world = self)
-		DF = matplot3dext.objects.line.Line(D, F, world = self)
-		EF = matplot3dext.objects.line.Line(E, F, world = self)
-		EG = matplot3dext.objects.line.Line(E, G, world = self)
-		EH = matplot3dext.objects.line.Line(E, H, world = self)
-		FG = matplot3dext.objects.line.Line(F, G, world = self)
-		FH = matplot3dext.objects.line.Line(F, H, world = self)
-		GH = matplot3dext.objects.line.Line(G, H, world = self)
+		AB = matplot3dext.objects.line.Line(A, B, world = self,
+				search = False)
+		AC = matplot3dext.objects.line.Line(A, C, world = self,
+				search = False)
+		AD = matplot3dext.objects.line.Line(A, D, world = self,
+				search = False)
+		AE = matplot3dext.objects.line.Line(A, E, world = self,
+				search = False)
+		AF = matplot3dext.objects.line.Line(A, F, world = self,
+				search = False)
+		AG = matplot3dext.objects.line.Line(A, G, world = self,
+				search = False)
+		BF = matplot3dext.objects.line.Line(B, F, world = self,
+				search = False)
+		BG = matplot3dext.objects.line.Line(B, G, world = self,
+				search = False)
+		CE = matplot3dext.objects.line.Line(C, E, world = self,
+				search = False)
+		CG = matplot3dext.objects.line.Line(C, G, world = self,
+				search = False)
+		DE = matplot3dext.objects.line.Line(D, E, world = self,
+				search = False)
+		DF = matplot3dext.objects.line.Line(D, F, world = self,
+				search = False)
+		EF = matplot3dext.objects.line.Line(E, F, world = self,
+				search = False)
+		EG = matplot3dext.objects.line.Line(E, G, world = self,
+				search = False)
+		EH = matplot3dext.objects.line.Line(E, H, world = self,
+				search = False)
+		FG = matplot3dext.objects.line.Line(F, G, world = self,
+				search = False)
+		FH = matplot3dext.objects.line.Line(F, H, world = self,
+				search = False)
+		GH = matplot3dext.objects.line.Line(G, H, world = self,
+				search = False)
 
 		# Create the faces of the surface and in the interior of the cube.
-		ABF = matplot3dext.objects.face.Face(AB, AF, BF, world = self)
-		ABG = matplot3dext.objects.face.Face(AB, AG, BG, world = self)
-		ACE = matplot3dext.objects.face.Face(AC, AE, CE, world = self)
-		ACG = matplot3dext.objects.face.Face(AC, AG, CG, world = self)
-		ADE = matplot3dext.objects.face.Face(AD, AE, DE, world = self)
-		ADF = matplot3dext.objects.face.Face(AD, AF, DF, world = self)
-		AEF = matplot3dext.objects.face.Face(AE, AF, EF, world = self)
-		AEG = matplot3dext.objects.face.Face(AE, AG, EG, world = self)
-		AFG = matplot3dext.objects.face.Face(AF, AG, FG, world = self)
-		BFG = matplot3dext.objects.face.Face(BF, BG, FG, world = self)
-		CEG = matplot3dext.objects.face.Face(CE, CG, EG, world = self)
-		DEF = matplot3dext.objects.face.Face(DE, DF, EF, world = self)
-		EFG = matplot3dext.objects.face.Face(EF, EG, FG, world = self)
-		EFH = matplot3dext.objects.face.Face(EF, EH, FH, world = self)
-		EGH = matplot3dext.objects.face.Face(EG, EH, GH, world = self)
-		FGH = matplot3dext.objects.face.Face(FG, FH, GH, world = self)
+		ABF = matplot3dext.objects.face.Face(AB, AF, BF, world = self,
+				search = False)
+		ABG = matplot3dext.objects.face.Face(AB, AG, BG, world = self,
+				search = False)
+		ACE = matplot3dext.objects.face.Face(AC, AE, CE, world = self,
+				search = False)
+		ACG = matplot3dext.objects.face.Face(AC, AG, CG, world = self,
+				search = False)
+		ADE = matplot3dext.objects.face.Face(AD, AE, DE, world = self,
+				search = False)
+		ADF = matplot3dext.objects.face.Face(AD, AF, DF, world = self,
+				search = False)
+		AEF = matplot3dext.objects.face.Face(AE, AF, EF, world = self,
+				search = False)
+		AEG = matplot3dext.objects.face.Face(AE, AG, EG, world = self,
+				search = False)
+		AFG = matplot3dext.objects.face.Face(AF, AG, FG, world = self,
+				search = False)
+		BFG = matplot3dext.objects.face.Face(BF, BG, FG, world = self,
+				search = False)
+		CEG = matplot3dext.objects.face.Face(CE, CG, EG, world = self,
+				search = False)
+		DEF = matplot3dext.objects.face.Face(DE, DF, EF, world = self,
+				search = False)
+		EFG = matplot3dext.objects.face.Face(EF, EG, FG, world = self,
+				search = False)
+		EFH = matplot3dext.objects.face.Face(EF, EH, FH, world = self,
+				search = False)
+		EGH = matplot3dext.objects.face.Face(EG, EH, GH, world = self,
+				search = False)
+		FGH = matplot3dext.objects.face.Face(FG, FH, GH, world = self,
+				search = False)
 
 		# Create the tetrahedra between the surfaces.
-		ABGF = matplot3dext.objects.tetrahedron.Tetrehedron(
-				ABG, ABF, AGF, BGF, world = self)
+		ABFG = matplot3dext.objects.tetrahedron.Tetrahedron(
+				ABF, ABG, AFG, BFG, world = self)
 		ACEG = matplot3dext.objects.tetrahedron.Tetrahedron(
 				ACE, ACG, AEG, CEG, world = self)
 		ADEF = matplot3dext.objects.tetrahedron.Tetrahedron(
@@ -161,51 +242,412 @@ class World:
 	# World content management ...
 	#
 
-	def add_point(self, point):
-		self.points.append(point)
+	def add_point(self, point, position):
+		"""Add Point POINT at POSITION.  Returns the index of the POINT in
+		the .store."""
+
+		return self.points.append(point, position = position)
 
 	def remove_point(self, point):
-		self.points.remove(point)
+		self.points.remove(point.index)
+
+	def add_line(self, line, points):
+		"""Add Line LINE between the Points POINTS.  Returns the index of 
+		the LINE in the .store."""
 
-	def add_line(self, line):
-		self.lines.append(line)
+		points = [point.index for point in points]
+		(lower, upper) = self.store.box(points)
+
+		index = self.lines.append(line, points = points,
+				lower = lower, upper = upper)
+		self.store.register(1, index)
+
+		return index
 	
 	def remove_line(self, line):
-		self.lines.remove(line)
+		self.store.unregister(1, line.index)
+		self.lines.remove(line.index)
+
+	def add_face(self, face, points):
+		"""Add Face FACE between the Points POINTS.  Returns the index of 
+		the FACE in the .store."""
 
-	def add_face(self, face):
-		self.faces.append(face)
+		points = [point.index for point in points]
+		(lower, upper) = self.store.box(points)
+
+		index = self.faces.append(face, points = points,
+				lower = lower, upper = upper)
+		self.store.register(2, index)
+
+		return index
 
 	def remove_face(self, face):
-		self.faces.remove(face)
+		self.store.unregister(2, face.index)
+		self.faces.remove(face.index)
 	
-	def add_tetrahedron(self, tetrahedron):
-		self.tetrahedra.append(tetrahedron)
+	def add_tetrahedron(self, tetrahedron, points):
+		"""Add Tetrahedron TETRAHEDRON between the Points POINTS.  Returns
+		the index of the TETRAHEDRON in the .store.  The first of the 
+		POINTS is the base point.  The inverse coordinate matrix is 
+		calculated and cached in the .store."""
+
+		points = [point.index for point in points]
+
+		corners = self.store.positions()[points]
+		base = corners[0]
+		ends = corners[1:] - base
+
+		index = self.tetrahedra.append(tetrahedron, 
+				points = points,
+				lower = corners.min(axis = 0),
+				upper = corners.max(axis = 0),
+				base = base,
+				matrix = numpy.linalg.inv(ends.T))
+		self.store.register(3, index)
+		self.store.attach_tetrahedron(index)
+
+		self.locator.insert(index)
+
+		return index
 
 	def remove_tetrahedron(self, tetrahedron):
-		self.tetrahedra.remove(tetrahedron)
+		self.locator.remove(tetrahedron.index)
+
+		self.store.detach_tetrahedron(tetrahedron.index)
+		self.store.unregister(3, tetrahedron.index)
+		self.tetrahedra.remove(tetrahedron.index)
+
+	def add_tetrahedra(self, points):
+		"""Create the Tetrahedra between the Points with the .store indices
+		in the rows of the (K, 4) array POINTS in one go, and the Lines and
+		Faces missing.  The first Point of each row is the base point.  The
+		new Lines and Faces do not search for crossings.  The Faces of the
+		Tetrahedra must be left with at most two Tetrahedra, see 
+		matplot3dext.objects.store.Store.attach_tetrahedra().  
+
+		Returns the list of the new Tetrahedra."""
+
+		store = self.store
+		points = numpy.asarray(points, dtype = numpy.int_).reshape((-1, 4))
+
+		# Lines and Faces not present yet, Face k opposite to Point k ...
+
+		self._add_simplices(1, points[:, [[0, 1], [0, 2], [0, 3], 
+				[1, 2], [1, 3], [2, 3]]].reshape((-1, 2)))
+		faces = self._add_simplices(2, points[:, [[1, 2, 3], [0, 2, 3], 
+				[0, 1, 3], [0, 1, 2]]].reshape((-1, 3)))
+
+		# The Tetrahedra, with their inverse coordinate matrices ...
+
+		corners = store.positions()[points]
+		ends = corners[:, 1:] - corners[:, :1]
+
+		indices = self.tetrahedra.extend(len(points), 
+				points = points,
+				lower = corners.min(axis = 1),
+				upper = corners.max(axis = 1),
+				base = corners[:, 0],
+				matrix = numpy.linalg.inv(ends.transpose((0, 2, 1))))
+
+		for index in indices.tolist():
+			store.register(3, index)
+
+		store.attach_tetrahedra(indices)
+
+		faces = faces.reshape((-1, 4))
+		tetrahedra = [matplot3dext.objects.tetrahedron.Tetrahedron(
+					*[self.faces.objects[face] for face in row], 
+					world = self, index = index)
+				for (index, row) in zip(indices.tolist(), faces.tolist())]
+
+		for index in indices.tolist():
+			self.locator.insert(index)
+
+		return tetrahedra
+
+	def _add_simplices(self, ndim, points):
+		"""Add the Lines (NDIM = 1) or Faces (NDIM = 2) between the Points 
+		with the .store indices in the rows of POINTS which are not present
+		yet, see .add_tetrahedra().  Returns the array of the .store 
+		indices of the objects of all rows."""
+
+		store = self.store
+		table = store.tables[ndim]
+		simplices = store.simplices[ndim]
+
+		keys = numpy.sort(points, axis = 1)
+		(keys, inverse) = numpy.unique(keys, axis = 0, return_inverse = True)
+
+		indices = numpy.asarray([simplices.get(key, -1) 
+				for key in map(tuple, keys.tolist())], dtype = numpy.int_)
+		missing = numpy.flatnonzero(indices < 0)
+
+		if len(missing):
+			# Add the rows, with the renderers common to the Points ...
+
+			corners = store.positions()[keys[missing]]
+
+			indices[missing] = table.extend(len(missing),
+					points = keys[missing],
+					lower = corners.min(axis = 1),
+					upper = corners.max(axis = 1))
+
+			names = ['renderers_face']
+			if ndim == 1:
+				names.append('renderers_line')
+
+			for name in names:
+				table[name][indices[missing]] = numpy.bitwise_and.reduce(
+						store.points[name][keys[missing]], axis = 1)
+
+			for index in indices[missing].tolist():
+				store.register(ndim, index)
+
+			# ... and the handles ...
+
+			objects = store.points.objects
+			lines = store.lines.objects
+
+			for (index, row) in zip(indices[missing].tolist(), 
+					keys[missing].tolist()):
+				if ndim == 1:
+					matplot3dext.objects.line.Line(
+							objects[row[0]], objects[row[1]],
+							world = self, search = False, index = index)
+				else:
+					matplot3dext.objects.face.Face(
+							lines[store.simplices[1][(row[0], row[1])]],
+							lines[store.simplices[1][(row[1], row[2])]],
+							lines[store.simplices[1][(row[0], row[2])]],
+							world = self, search = False, index = index)
+
+		return indices[inverse.ravel()]
+
+	def line_between(self, point1, point2, search = None):
+		"""Returns the Line between the Points POINT1 and POINT2, creating
+		it if there is none.  SEARCH tells whether a created Line looks for
+		the Faces it crosses, see .search(), it defaults to False here:  
+		Lines created by the subdivision of objects complete the 
+		tetrahedralisation."""
+
+		line = self.store.find([point1, point2])
+
+		if line is None:
+			line = matplot3dext.objects.line.Line(point1, point2,
+					world = self, search = False)
+
+			if search:
+				self.search(line)
+
+		return line
+
+	def face_between(self, point1, point2, point3, search = None):
+		"""Returns the Face between the Points POINT1, POINT2, and POINT3.
+		The Face and its Lines are created if missing, as by 
+		.line_between().  The searches start when all of them exist, the
+		Face first, for it subdivides all Lines crossing it at once."""
+
+		face = self.store.find([point1, point2, point3])
+
+		if face is None:
+			pairs = [(point1, point2), (point2, point3), (point1, point3)]
+
+			new_lines = [self.line_between(*pair) for pair in pairs 
+					if self.store.find(pair) is None]
+
+			face = matplot3dext.objects.face.Face(
+					*[self.store.find(pair) for pair in pairs],
+					world = self, search = False)
+
+			if search:
+				for object in [face] + new_lines:
+					self.search(object)
+
+		return face
+
+	#
+	# Point attributes ...
+	#
+
+	def add_point_attribute(self, name, dtype, fill = None):
+		"""Add the Point attribute NAME of dtype DTYPE, held in the column 
+		NAME of .store.points.  Unset values are FILL, it defaults to NaN
+		for floating point DTYPEs and to 0 else.  Points created by 
+		subdivision get their attributes interpolated, see 
+		.interpolate_point_attributes()."""
+
+		if name in self.store.points.columns:
+			raise ValueError('Column %s exists already.' % name)
+
+		dtype = numpy.dtype(dtype)
+
+		if fill is None:
+			if dtype.kind in 'fc':
+				fill = numpy.nan
+			else:
+				fill = 0
+
+		self.store.points.add_column(name, (), dtype, fill)
+		self.point_attributes.append(name)
+
+	def interpolate_point_attributes(self, indices, corners, weights):
+		"""Set all Point attributes of the Points with .store indices INDICES
+		(N,) from the Points with indices CORNERS (N, K), using the
+		barycentric WEIGHTS (N, K).  Floating point attributes are 
+		interpolated linearly, others take the value of the corner of the
+		largest weight."""
+
+		if not self.point_attributes:
+			return
+
+		indices = numpy.asarray(indices, dtype = numpy.int_)
+		corners = numpy.asarray(corners, dtype = numpy.int_)
+		weights = numpy.asarray(weights, dtype = numpy.float64)
+
+		nearest = corners[numpy.arange(len(corners)), weights.argmax(axis = 1)]
+
+		for name in self.point_attributes:
+			column = self.store.points[name]
+
+			if column.dtype.kind in 'fc':
+				column[indices] = (column[corners] * weights).sum(axis = 1)
+			else:
+				column[indices] = column[nearest]
+
+	def rendered_by(self, renderer, ndim):
+		"""Returns the .store indices of the objects of dimension NDIM (0
+		for Points, 1 for Lines, 2 for Faces) to be rendered by RENDERER."""
+
+		self.store.resolve_renderers()
+
+		table = self.store.tables[ndim]
+		column = ['renderers_point', 'renderers_line', 'renderers_face'][ndim]
+
+		indices = table.indices()
+
+		return indices[self.registry.select(table[column][indices], renderer)]
+
+	def attach_face_renderers(self, faces, renderers_face):
+		"""Attach RENDERERS_FACE to the Faces with .store indices FACES
+		themselves, in addition to the renderers found from their Points.
+		The pieces of the Faces keep them when the Faces are 
+		subdivided."""
+
+		table = self.store.faces
+		mask = self.registry.mask(renderers_face)
+
+		table['renderers_attached'][faces] |= mask
+		table['renderers_face'][faces] |= mask
+
+	def render_points(self, backend, view = None):
+		"""Render the visible Points using backend BACKEND, in one batch per
+		renderer, see Renderer.render_many().  If VIEW is given, the backend
+		receives the positions projected by the 
+		matplot3dext.views.view.View VIEW."""
+
+		projection = None
+		if view is not None:
+			projection = view.projection()
+
+		for renderer in self.registry.renderers:
+			points = [self.points.objects[index] 
+					for index in self.rendered_by(renderer, 0)]
+			points = [point for point in points if point.visible]
+
+			if len(points) == 0:
+				continue
+
+			positions = None
+			if projection is not None:
+				positions = projection[[point.index for point in points]]
+
+			renderer.render_many(points, backend, positions = positions)
+
+	def compact(self):
+		"""Close the gaps left in the .store by removed objects.  Rows of
+		removed objects are reused by new objects anyway, so this is only 
+		worthwhile after removing many more objects than adding.  Changes 
+		the .index of the objects."""
+
+		self.store.compact()
+
+		# The locator holds Tetrahedron indices.
+		self.set_locator(self.locator_name)
 
 	#
 	# Intersection algorithms ...
 	#
 
 	def intersect(self, objectA, objectB,
-			renderers_point, renderers_line, renderers_face,
-			tol):
+			renderers_point = None, 
+			renderers_line = None, 
+			renderers_face = None,
+			tol = None):
 		"""Intersects two objects OBJECTA and OBJECTB.  The objects must match
 		to intersect in 3D, i.e., pass in a Point and a Tetrahedron, or a Line
 		and a Face, or in reverse order.  If the objects do not intersect,
 		None is returned, otherwise the Intersection object for OBJECTA and 
-		OBJECTB is returned.
+		OBJECTB is returned.  OBJECTB is subdivided first, see 
+		matplot3dext.objects.intersection.Intersection.
 		
-		RENDERERS_* are the renderers to apply in the end.
+		RENDERERS_* are the renderers to apply in the end, they default to
+		those found by .crossing_renderers().
+
+		TOL is the tolerance passed to the Subdivision, it defaults to 
+		.tol."""
+
+		if tol is None:
+			tol = self.tol
 
-		TOL is the tolerance passed to the Subdivision."""
+		self.intersect_calls += 1
+
+		# Reject objects whose bounding boxes are apart ...
+		#
+		# Coordinates may exceed the objects by TOL per dimension, widen
+		# the boxes accordingly.
+
+		(lowerA, upperA) = self.store.bounds(objectA)
+		(lowerB, upperB) = self.store.bounds(objectB)
+
+		margin = 3 * tol * max((upperA - lowerA).max(), 
+				(upperB - lowerB).max())
+
+		if (lowerA > upperB + margin).any() or \
+				(lowerB > upperA + margin).any():
+			self.intersect_rejects += 1
+			return None
+
+		# Reject Lines whose Points are on the same side of a Face's 
+		# plane ...
+
+		if objectA.ndim == 1 and objectB.ndim == 2:
+			(line, face) = (objectA, objectB)
+		elif objectA.ndim == 2 and objectB.ndim == 1:
+			(line, face) = (objectB, objectA)
+		else:
+			(line, face) = (None, None)
+
+		if line is not None:
+			(normal, offset) = face.plane()
+			(distance1, distance2) = numpy.dot(self.store.positions()[
+					self.store.lines['points'][line.index]], normal) - offset
+
+			if distance1 == distance2:
+				# Parallel, the solve would fail anyway.
+				self.intersect_rejects += 1
+				return None
+
+			# Line coordinate of the crossing with the plane.
+			crossing = distance1 / (distance1 - distance2)
+
+			if crossing < -tol or crossing > 1 + tol:
+				self.intersect_rejects += 1
+				return None
 
 		# Extract the points ...
 
 		pointsA = list(objectA.attached_points)
-		pointsB = lisT(objectB.attached_points)
+		pointsB = list(objectB.attached_points)
 
 		if len(pointsA) + len(pointsB) != 5:
 			raise ValueError('Objects do not intersect in a single point because of too many or too few dimensions.')
@@ -213,10 +655,12 @@ class World:
 		# Extract the positions ...
 
 		baseA = pointsA[0].position
-		endsA = numpy.asarray([point.position for point in pointsA[1:]])
+		endsA = numpy.asarray([point.position for point in pointsA[1:]]).\
+				reshape((-1, 3))
 
 		baseB = pointsB[0].position
-		endsB = numpy.asarray([point.position for point in pointsB[1:]])
+		endsB = numpy.asarray([point.position for point in pointsB[1:]]).\
+				reshape((-1, 3))
 
 		# Extract the matrices ...
 
@@ -226,10 +670,10 @@ class World:
 		# Attempt to find a solution ...
 
 		try:
-			matrixCompound = numpy.hstack(matrixA.T, -matrixB.T)
+			matrixCompound = numpy.hstack((matrixA.T, -matrixB.T))
 
-			coordinates = numpy.linalg.solve(matrixCompound, endA - endB)
-		except numpy.linalg.linalg.LinAlgError:
+			coordinates = numpy.linalg.solve(matrixCompound, baseB - baseA)
+		except numpy.linalg.LinAlgError:
 			# Probably a singular matrix.
 			#
 			# Objects do not intersect or are parallel.
@@ -240,7 +684,7 @@ class World:
 		#
 		# Extract the coordinates for the Subdivisions.
 		coordinatesA = coordinates[:len(endsA)]
-		coordiantesB = coordinates[len(endsA):]
+		coordinatesB = coordinates[len(endsA):]
 
 		# Check the coordinates for being inside of the intersected 
 		# objects ...
@@ -256,19 +700,29 @@ class World:
 		
 		# The object /do/ intersect ...
 
+		(default_point, default_line, default_face) = \
+				self.crossing_renderers([objectA, objectB])
+
+		if renderers_point is None:
+			renderers_point = default_point
+		if renderers_line is None:
+			renderers_line = default_line
+		if renderers_face is None:
+			renderers_face = default_face
+
 		# Create the Subdivision objects.
 		subdivisionA = matplot3dext.objects.subdivision.Subdivision(
 				coordinates = coordinatesA,
-				base_point = baseA, end_points = endsA,
+				base_point = pointsA[0], end_points = pointsA[1:],
 				renderers_point = renderers_point,
 				renderers_line = renderers_line,
 				renderers_face = renderers_face,
 				tol = tol,
 				world = self)
 
-		subdivisionB = matplot3dext.objects.subdivision.Subdivison(
+		subdivisionB = matplot3dext.objects.subdivision.Subdivision(
 				coordinates = coordinatesB,
-				base_point = baseB, end_points = endsB,
+				base_point = pointsB[0], end_points = pointsB[1:],
 				renderers_point = renderers_point,
 				renderers_line = renderers_line,
 				renderers_face = renderers_face,
@@ -278,6 +732,250 @@ class World:
 		return matplot3dext.objects.intersection.\
 				Intersection(subdivisionA, subdivisionB)
 
+	def crossing_renderers(self, objects):
+		"""Returns (renderers_point, renderers_line, renderers_face) for the
+		Point created where the OBJECTS intersect:  no Point renderers, and
+		the union of the Line and Face renderers of the OBJECTS, such that
+		their pieces keep being rendered."""
+
+		renderers_line = set()
+		renderers_face = set()
+
+		for object in objects:
+			if object.ndim <= 1:
+				renderers_line |= object.renderers_line
+			if object.ndim <= 2:
+				renderers_face |= object.renderers_face
+
+		return (set(), renderers_line, renderers_face)
+
+	def search(self, object):
+		"""Let the Line or Face OBJECT look for the objects it crosses and
+		subdivide them, see Line.search() and Face.search().  Searches 
+		requested while a search is running, e.g. by the pieces of a 
+		subdivided Line, are queued and run in order when the running 
+		search is done, hence subdivisions do not nest.  Objects 
+		destroyed while queued are skipped."""
+
+		self.searches.append(object)
+
+		if self.searching:
+			return
+
+		self.searching = True
+		try:
+			while self.searches:
+				object = self.searches.popleft()
+
+				if self.store.contains(object):
+					object.search()
+
+		finally:
+			self.searching = False
+
+	def intersect_reject_rate(self):
+		"""Returns the fraction of .intersect() calls rejected by the 
+		bounding box or plane tests."""
+
+		if self.intersect_calls == 0:
+			return 0.0
+
+		return float(self.intersect_rejects) / self.intersect_calls
+
+	def intersect_many(self, line,
+			renderers_point = None, 
+			renderers_line = None, 
+			renderers_face = None,
+			tol = None,
+			faces = None):
+		"""Intersects Line LINE with all Faces of the world in one pass.  
+		FACES restricts the test to the given .store indices of Faces.  
+		Faces sharing a Point with LINE are never intersected.  Returns the
+		Intersection with the Face hit first when walking along 
+		LINE, or None if no Face is hit.
+
+		RENDERERS_* and TOL are handed over to .intersect(), TOL defaults
+		to .tol."""
+
+		if tol is None:
+			tol = self.tol
+
+		if faces is None:
+			faces = self.store.faces.indices()
+
+		faces = numpy.asarray(faces, dtype = numpy.int_)
+
+		line_points = self.store.lines['points'][line.index]
+
+		# Exclude the Faces touching the Line ...
+
+		touching = (self.store.faces['points'][faces][:, :, numpy.newaxis] ==
+				line_points).any(axis = 2).any(axis = 1)
+		faces = faces[~touching]
+
+		positions = self.store.positions()
+		(start, stop) = positions[line_points]
+		triangles = positions[self.store.faces['points'][faces]]
+
+		(hits, parameters, coordinates) = matplot3dext.objects.kernels.\
+				intersect_segment_triangles(start, stop, triangles, tol)
+
+		# Build the Intersection for the nearest Face hit, .intersect() 
+		# has the final word ...
+
+		candidates = numpy.flatnonzero(hits)
+		candidates = candidates[numpy.argsort(parameters[candidates])]
+
+		for candidate in candidates:
+			face = self.store.faces.objects[faces[candidate]]
+
+			intersection = self.intersect(line, face,
+					renderers_point = renderers_point,
+					renderers_line = renderers_line,
+					renderers_face = renderers_face,
+					tol = tol)
+
+			if intersection is not None:
+				return intersection
+
+		return None
+
+	def crossing_lines(self, face, tol = None, lines = None):
+		"""Intersects Face FACE with all Lines of the world in one pass.  
+		LINES restricts the test to the given .store indices of Lines.  
+		Lines sharing a Point with FACE are never reported.  TOL is the 
+		tolerance as for .intersect(), it defaults to .tol.
+
+		Returns (indices, parameters, coordinates) for the Lines crossing 
+		FACE:  INDICES are their .store indices, PARAMETERS their (K,) Line
+		coordinates, and COORDINATES the (K, 2) Face coordinates.  The Line
+		coordinates are measured from the first Point of the .store row, 
+		the Face coordinates likewise."""
+
+		if tol is None:
+			tol = self.tol
+		if lines is None:
+			lines = self.store.lines.indices()
+
+		lines = numpy.asarray(lines, dtype = numpy.int_)
+
+		positions = self.store.positions()
+		face_points = self.store.faces['points'][face.index]
+		line_points = self.store.lines['points'][lines]
+
+		# Exclude the Lines touching the Face ...
+
+		touching = (line_points[:, :, numpy.newaxis] == face_points).\
+				any(axis = 2).any(axis = 1)
+
+		lines = lines[~touching]
+		line_points = line_points[~touching]
+
+		(hits, parameters, coordinates) = matplot3dext.objects.kernels.\
+				intersect_triangle_segments(
+					triangle = positions[face_points],
+					starts = positions[line_points[:, 0]],
+					stops = positions[line_points[:, 1]],
+					tol = tol)
+
+		return (lines[hits], parameters[hits], coordinates[hits])
+
+	#
+	# Point location ...
+	#
+
+	def set_locator(self, locator = None):
+		"""Select the index used by .create_point() to find the Tetrahedron
+		containing a position.  LOCATOR is one of:
+
+		'linear':  Test all Tetrahedra.
+		'grid':  Test only the Tetrahedra whose bounding boxes overlap the
+			cell of a uniform grid over the world the position is in.
+		'walk':  Walk through neighbouring Tetrahedra, starting from the
+			Tetrahedron found last.  Falls back to 'linear' when the walk 
+			fails.  Best for spatially coherent positions.
+
+		It defaults to 'linear'.  The counters of the index are available as
+		.locator.queries and .locator.tested."""
+
+		if locator is None:
+			locator = 'linear'
+
+		if locator == 'linear':
+			self.locator = matplot3dext.objects.locator.LinearLocator(self)
+		elif locator == 'grid':
+			self.locator = matplot3dext.objects.locator.GridLocator(self,
+					lower = self.lower, upper = self.upper)
+		elif locator == 'walk':
+			self.locator = matplot3dext.objects.locator.WalkLocator(self,
+					fallback = matplot3dext.objects.locator.\
+						LinearLocator(self))
+		else:
+			raise ValueError('Unknown locator %r.' % locator)
+
+		self.locator_name = locator
+
+		# Register the existing Tetrahedra ...
+
+		for index in self.store.tetrahedra.indices():
+			self.locator.insert(index)
+
+	def locate_points(self, positions, tol = None, candidates = None):
+		"""Locate the (N, 3) array POSITIONS in the Tetrahedra of the world.
+		Returns (indices, coordinates), where INDICES is the (N,) array of 
+		the .store indices of the containing Tetrahedra (-1 when a position
+		is outside of the known world), and COORDINATES are the (N, 3) 
+		coordinates as returned by Tetrahedron.inside() (NaN when outside).
+		The weight of the base point is 1 - COORDINATES.sum(axis = 1).
+
+		TOL widens the Tetrahedra by a coordinate-absolute tolerance, it
+		defaults to 0.0.  CANDIDATES restricts the search to the given
+		.store indices of Tetrahedra, it defaults to all Tetrahedra."""
+
+		if tol is None:
+			tol = 0.0
+		if candidates is None:
+			candidates = self.store.tetrahedra.indices()
+
+		positions = numpy.asarray(positions, dtype = numpy.float64).\
+				reshape((-1, 3))
+		candidates = numpy.asarray(candidates, dtype = numpy.int_)
+
+		indices = numpy.empty(len(positions), dtype = numpy.int_)
+		indices[...] = -1
+		coordinates = numpy.empty((len(positions), 3))
+		coordinates[...] = numpy.nan
+
+		if len(candidates) == 0:
+			return (indices, coordinates)
+
+		# Gather the cached inverse coordinate matrices ...
+
+		bases = self.store.tetrahedra['base'][candidates]
+		matrices = self.store.tetrahedra['matrix'][candidates]
+
+		# Test the positions in chunks, to bound the (n, T, 3) temporaries
+		# ...
+
+		chunk = max(1, 2 ** 18 // len(candidates))
+
+		for start in range(0, len(positions), chunk):
+			stop = start + chunk
+
+			deltas = positions[start:stop, numpy.newaxis] - bases
+			local = numpy.einsum('tij,ntj->nti', matrices, deltas)
+
+			inside = (local >= -tol).all(axis = 2) & \
+					(local.sum(axis = 2) <= 1 + tol)
+			found = inside.any(axis = 1)
+			first = inside.argmax(axis = 1)
+
+			rows = numpy.arange(start, start + len(found))[found]
+			indices[rows] = candidates[first[found]]
+			coordinates[rows] = local[found, first[found]]
+
+		return (indices, coordinates)
+
 	# 
 	# Creation methods ...
 	#
@@ -285,28 +983,34 @@ class World:
 	def create_point(self, position,
 			renderers_point, renderers_line, renderers_face,
 			tol):
-		"""Create a Point at position POSITION with RENDERERS_*.
+		"""Create a Point at position POSITION with RENDERERS_*.  TOL is 
+		the coordinate-absolute tolerance used to locate POSITION and to 
+		decide whether it is on a Face, Line, or Point of the Tetrahedron
+		found, hence positions on the surface of the world within TOL are
+		inside.
 		
 		Returns the point created."""
 
 		# Try to find a Tetrahedron where the point is inside ...
 
-		for tetrahedron in self.tetrahedra:
-			candidate = tetrahedron.inside(position)
-			if candidate is not None:
-				# Create a subdivision for the tetrahedron.
-				subdivision = matplot3dext.objects.subdivision.Subdivison(
-						coordinates = candidate,
-						base_point = tetrahedron.base_point,
-						end_points = tetrahedron.end_points,
-						renderers_point = renderers_point,
-						renderers_line = renderers_line,
-						renderers_face = renderers_face,
-						tol = tol,
-						world = self)
-				
-				# Reduce the subdivision
-				return subdivision.reduce()
+		(index, coordinates) = self.locator.locate(position, tol)
+
+		if index >= 0:
+			tetrahedron = self.store.tetrahedra.objects[index]
+
+			# Create a subdivision for the tetrahedron.
+			subdivision = matplot3dext.objects.subdivision.Subdivision(
+					coordinates = coordinates,
+					base_point = tetrahedron.base_point,
+					end_points = tetrahedron.end_points,
+					renderers_point = renderers_point,
+					renderers_line = renderers_line,
+					renderers_face = renderers_face,
+					tol = tol,
+					world = self)
+			
+			# Reduce the subdivision, and subdivide.
+			return subdivision.reduce().subdivide()
 
 		# Point is outside of known world, create an invisible Point ...
 
@@ -319,3 +1023,794 @@ class World:
 				visible = False)
 
 		return point
+
+	def insert_points(self, positions,
+			renderers_point, renderers_line, renderers_face,
+			tol,
+			min_volume = None, group = None):
+		"""Create Points at the (N, 3) POSITIONS with RENDERERS_*, as 
+		.create_point() does for each of them.  The positions are inserted
+		in rounds.  In each round, the positions left are located in Morton
+		order, by walking from the previous one.  Of the positions strictly
+		inside of the same Tetrahedron, up to GROUP spread over them are 
+		inserted at once by Tetrahedron.subdivide_many(), which receives 
+		MIN_VOLUME.  GROUP defaults to 64, it bounds the cost of the 
+		retriangulations.  When no Tetrahedron holds two positions anymore,
+		the positions left are inserted in Morton order by .create_point(),
+		walking again.
+
+		Returns the (N,) array of the .store indices of the Points, in the
+		order of POSITIONS."""
+
+		if group is None:
+			group = 64
+
+		positions = numpy.asarray(positions, dtype = numpy.float64).\
+				reshape((-1, 3))
+
+		indices = numpy.empty(len(positions), dtype = numpy.int_)
+		remaining = numpy.ones(len(positions), dtype = numpy.bool_)
+
+		order = matplot3dext.objects.kernels.morton_order(positions,
+				lower = self.lower, upper = self.upper)
+
+		# Walk through the Tetrahedra while locating and inserting, the 
+		# current locator serves as fallback and stays up to date ...
+
+		locator = self.locator
+		if not isinstance(locator, 
+				matplot3dext.objects.locator.WalkLocator):
+			self.locator = matplot3dext.objects.locator.WalkLocator(self,
+					fallback = locator)
+
+		try:
+			while True:
+				inserted = self._insert_groups(positions, 
+						order[remaining[order]], indices, 
+						renderers_point = renderers_point,
+						renderers_line = renderers_line,
+						renderers_face = renderers_face,
+						tol = tol, min_volume = min_volume, group = group)
+
+				if len(inserted) == 0:
+					break
+
+				remaining[inserted] = False
+
+			# Insert the others ...
+
+			for index in order[remaining[order]]:
+				point = self.create_point(positions[index],
+						renderers_point = renderers_point,
+						renderers_line = renderers_line,
+						renderers_face = renderers_face,
+						tol = tol)
+
+				indices[index] = point.index
+
+		finally:
+			self.locator = locator
+
+		return indices
+
+	def _insert_groups(self, positions, order, indices,
+			renderers_point, renderers_line, renderers_face,
+			tol, min_volume, group):
+		"""One round of .insert_points():  Locate the POSITIONS with the
+		indices ORDER, and insert up to GROUP of the positions inside of 
+		each Tetrahedron holding two or more.  The .store indices of the 
+		Points are written to INDICES.  Returns the array of the indices 
+		of the positions inserted."""
+
+		# Locate the positions, NaN coordinates compare False ...
+
+		located = numpy.empty(len(order), dtype = numpy.int_)
+		coordinates = numpy.empty((len(order), 3))
+		coordinates[...] = numpy.nan
+
+		for (slot, index) in enumerate(order):
+			(located[slot], found) = self.locator.locate(positions[index], 
+					tol)
+
+			if located[slot] >= 0:
+				coordinates[slot] = found
+
+		# Group the positions strictly inside of a Tetrahedron by the
+		# Tetrahedron, keeping the Morton order in the groups ...
+
+		weights = numpy.hstack((
+				1 - coordinates.sum(axis = 1)[:, numpy.newaxis], 
+				coordinates))
+		interior = numpy.flatnonzero((located >= 0) & 
+				(weights > tol).all(axis = 1))
+		interior = interior[numpy.argsort(located[interior], 
+				kind = 'mergesort')]
+
+		(grouped, starts, counts) = numpy.unique(located[interior], 
+				return_index = True, return_counts = True)
+
+		inserted = []
+
+		for (tetrahedron_index, start, count) in \
+				zip(grouped, starts, counts):
+			if count < 2:
+				continue
+
+			# Spread the positions taken over the group ...
+
+			members = order[interior[start:start + count]]
+			members = members[numpy.linspace(0, count - 1, 
+					min(count, group)).astype(numpy.int_)]
+
+			tetrahedron = self.store.tetrahedra.objects[tetrahedron_index]
+			points = tetrahedron.subdivide_many(positions[members],
+					renderers_point = renderers_point,
+					renderers_line = renderers_line,
+					renderers_face = renderers_face,
+					min_volume = min_volume)
+
+			# The positions left out go to the next round ...
+
+			for (index, point) in zip(members, points):
+				if point is not None:
+					indices[index] = point.index
+					inserted.append(index)
+
+		return numpy.asarray(inserted, dtype = numpy.int_)
+
+	def insert_polyline(self, vertices,
+			renderers_point, renderers_line, renderers_face,
+			tol,
+			points = None, snap = None):
+		"""Insert the polyline through the (N, 3) VERTICES with RENDERERS_*.
+		Its segments are inserted all at once by ._insert_segments(),
+		which subdivides the Faces crossed.  The Points created on the way
+		receive RENDERERS_* too.  Segments with an end outside of the world
+		are left to the Line constructor.
+
+		POINTS is an optional sequence of the Points already existing at
+		the VERTICES, e.g. inserted by .insert_points(), they receive
+		RENDERERS_* too.  Entries None are created.  SNAP is passed on to
+		._insert_segments().
+
+		Returns the list of Points along the polyline, including the
+		crossings."""
+
+		vertices = numpy.asarray(vertices, dtype = numpy.float64).\
+				reshape((-1, 3))
+
+		if points is None:
+			points = [None] * len(vertices)
+
+		polyline = []
+
+		for (vertex, point) in zip(vertices, points):
+			if point is None:
+				point = self.create_point(vertex,
+						renderers_point = renderers_point,
+						renderers_line = renderers_line,
+						renderers_face = renderers_face,
+						tol = tol)
+			else:
+				point.attach_renderers(
+						renderers_point = renderers_point,
+						renderers_line = renderers_line,
+						renderers_face = renderers_face)
+
+			polyline.append(point)
+
+		chains = self._insert_segments(
+				list(zip(polyline[:-1], polyline[1:])),
+				[(renderers_point, renderers_line, renderers_face)] *
+					(len(polyline) - 1),
+				tol = tol, snap = snap)
+
+		result = polyline[:1]
+		for chain in chains:
+			result.extend(chain[1:])
+
+		return result
+
+	def _insert_segments(self, segments, renderers, tol, snap = None):
+		"""Insert the straight segments between the pairs of Points
+		SEGMENTS as chains of Lines.  RENDERERS holds one tuple
+		(renderers_point, renderers_line, renderers_face) per segment,
+		applied to the Points created on it.
+
+		The pieces of the segments not connected by a Line yet are
+		intersected with the Faces of the tetrahedralisation in one batch,
+		candidate pairs are taken from a grid with cells of the median Face
+		size by kernels.segment_box_pairs().  The Faces crossed are 
+		removed in order along each piece, by Face.flip() where the piece
+		leaves the Tetrahedra around its current Point, by Line.flip() of
+		the Line next to the crossing, and else by subdividing the Face at
+		the crossing.  A crossing closer to a Line or a Point of its Face 
+		than SNAP times the length of its segment is moved there.  Moving
+		takes the surface off the segment, hence SNAP defaults to 1e-6.  
+		Faces changed by an earlier crossing are crossed in the next batch,
+		until all pieces are Lines.  Pieces with an invisible end, and 
+		pieces crossing no Face, are left to the Line constructor.
+
+		Returns the list of the chains of Points, one per segment, from
+		its first Point to its second."""
+
+		if snap is None:
+			snap = 1e-6
+
+		store = self.store
+		faces = store.faces
+
+		chains = [list(segment) for segment in segments]
+
+		positions = store.positions()
+		lengths = numpy.asarray([numpy.sqrt(((positions[point2.index] -
+				positions[point1.index]) ** 2).sum())
+				for (point1, point2) in segments])
+
+		# The pieces left to the Line constructor, by their end Points ...
+
+		left = set()
+
+		while True:
+			pieces = [(segment, slot)
+					for (segment, chain) in enumerate(chains)
+					for slot in range(len(chain) - 1)
+					if chain[slot] is not chain[slot + 1] and
+						(chain[slot].index, chain[slot + 1].index) not in
+							left and
+						store.find(chain[slot:slot + 2]) is None]
+
+			for (segment, slot) in pieces:
+				if not (chains[segment][slot].visible and
+						chains[segment][slot + 1].visible):
+					left.add((chains[segment][slot].index,
+						chains[segment][slot + 1].index))
+
+			pieces = [(segment, slot) for (segment, slot) in pieces
+					if (chains[segment][slot].index,
+						chains[segment][slot + 1].index) not in left]
+
+			if len(pieces) == 0:
+				break
+
+			version = faces.version
+
+			positions = store.positions()
+			ends = numpy.asarray([[chains[segment][slot].index,
+					chains[segment][slot + 1].index]
+					for (segment, slot) in pieces])
+			starts = positions[ends[:, 0]]
+			stops = positions[ends[:, 1]]
+
+			# Broad phase against the Faces bounding Tetrahedra ...
+
+			candidates = faces.indices()
+			candidates = candidates[
+					(faces['tetrahedra'][candidates] >= 0).any(axis = 1)]
+
+			lowers = faces['lower'][candidates]
+			uppers = faces['upper'][candidates]
+
+			cell = numpy.median((uppers - lowers).max(axis = 1))
+			if not cell > 0:
+				cell = max((uppers - lowers).max(), 1.0)
+
+			(crossing_pieces, boxes) = matplot3dext.objects.kernels.\
+					segment_box_pairs(starts, stops, lowers, uppers, cell)
+			crossed = candidates[boxes]
+
+			# The Faces at the ends of a piece are touched, not crossed ...
+
+			corners = faces['points'][crossed]
+			touching = (corners == ends[crossing_pieces, :1]).any(axis = 1) |\
+					(corners == ends[crossing_pieces, 1:]).any(axis = 1)
+
+			(crossing_pieces, crossed, corners) = (crossing_pieces[~touching],
+					crossed[~touching], corners[~touching])
+
+			# Narrow phase ...
+
+			(hits, parameters, coordinates) = matplot3dext.objects.\
+					kernels.intersect_pairs(
+						triangles = positions[corners],
+						starts = starts[crossing_pieces],
+						stops = stops[crossing_pieces],
+						tol = tol)
+
+			hits &= (parameters > tol) & (parameters < 1 - tol) & \
+					self._sides(positions[corners], starts[crossing_pieces],
+						stops[crossing_pieces], tol)
+
+			(crossing_pieces, crossed, corners, parameters, coordinates) = (
+					crossing_pieces[hits], crossed[hits], corners[hits],
+					parameters[hits], coordinates[hits])
+
+			# The distances to snap to, in the coordinates of each Face ...
+
+			edges = positions[corners] - positions[corners[:, [1, 2, 0]]]
+			sizes = numpy.sqrt((edges ** 2).sum(axis = 2)).max(axis = 1)
+
+			segments_crossing = numpy.asarray([pieces[piece][0]
+					for piece in crossing_pieces], dtype = numpy.int_)
+			snaps = numpy.clip(snap * lengths[segments_crossing] / sizes,
+					tol, 0.25)
+
+			# Recover the pieces Face by Face, from their first Point on 
+			# ...
+
+			crossings = [[] for piece in pieces]
+			current = [chains[segment][slot] for (segment, slot) in pieces]
+			progress = numpy.zeros(len(pieces), dtype = numpy.bool_)
+			blocked = numpy.zeros(len(pieces), dtype = numpy.bool_)
+
+			for crossing in numpy.lexsort((parameters, crossing_pieces)):
+				piece = crossing_pieces[crossing]
+				face = crossed[crossing]
+
+				if blocked[piece]:
+					continue
+
+				start = current[piece]
+				stop = ends[piece, 1]
+
+				if not faces.alive[face] or faces.stamps[face] > version:
+					# Replaced by an earlier crossing, the piece continues
+					# from its current Point in the next batch.
+					blocked[piece] = True
+					continue
+
+				face_corners = faces['points'][face]
+				if start.index in face_corners or stop in face_corners:
+					continue
+
+				# The crossing found in the batch holds while the piece
+				# starts at its first Point, else it is recalculated ...
+
+				face_coordinates = coordinates[crossing]
+
+				if start is not chains[pieces[piece][0]][pieces[piece][1]]:
+					positions = store.positions()
+					(hits, face_parameters, face_coordinates) = \
+							matplot3dext.objects.kernels.\
+							intersect_segment_triangles(
+								positions[start.index], positions[stop],
+								positions[face_corners], tol = tol)
+
+					if not (hits[0] and self._sides(
+							positions[face_corners], positions[start.index],
+							positions[stop], tol)[0]):
+						continue
+
+					face_coordinates = face_coordinates[0]
+
+				progress[piece] = True
+
+				# Flip the Face away if possible.  Flipping needs the Face
+				# to be the one through which the piece leaves the 
+				# Tetrahedra around its current Point.  The Line crossing
+				# the Face must stay clear of its edges by 2 % of the Face
+				# coordinates ...
+
+				tetrahedra = faces['tetrahedra'][face]
+				tetrahedra = tetrahedra[tetrahedra >= 0]
+
+				if (store.tetrahedra['points'][tetrahedra] == 
+						start.index).any() and \
+						store.faces.objects[face].flip(margin = 0.02) \
+						is not None:
+					continue
+
+				# A crossing next to an edge, within 10 % of the Face 
+				# coordinates, flips that edge away if possible.  The 
+				# piece continues in the next batch ...
+
+				weights = numpy.hstack((1 - face_coordinates.sum(),
+						face_coordinates))
+
+				if weights.min() < 0.1:
+					line = store.find([store.points.objects[index]
+							for (corner, index) in enumerate(face_corners)
+							if corner != weights.argmin()])
+
+					if line is not None and line.flip() is not None:
+						blocked[piece] = True
+						continue
+
+				# Insert a Point ...
+
+				(segment, slot) = pieces[piece]
+				(renderers_point, renderers_line, renderers_face) = \
+						renderers[segment]
+				face_points = [store.points.objects[index]
+						for index in face_corners]
+
+				subdivision = matplot3dext.objects.subdivision.Subdivision(
+						coordinates = face_coordinates,
+						base_point = face_points[0],
+						end_points = face_points[1:],
+						renderers_point = renderers_point,
+						renderers_line = renderers_line,
+						renderers_face = renderers_face,
+						tol = snaps[crossing],
+						world = self)
+
+				point = subdivision.reduce().subdivide()
+
+				if point not in crossings[piece] and \
+						point not in chains[segment][slot:slot + 2]:
+					crossings[piece].append(point)
+					current[piece] = point
+
+			# Insert the Points created into the chains ...
+
+			for (piece, (segment, slot)) in reversed(list(enumerate(pieces))):
+				if not progress[piece] and not blocked[piece]:
+					chain = chains[segment]
+					left.add((chain[slot].index, chain[slot + 1].index))
+
+				chains[segment][slot + 1:slot + 1] = crossings[piece]
+
+		# Connect the pieces left ...
+
+		for chain in chains:
+			for (point1, point2) in zip(chain[:-1], chain[1:]):
+				if point1 is not point2 and \
+						store.find([point1, point2]) is None:
+					matplot3dext.objects.line.Line(point1, point2,
+							world = self)
+
+		return chains
+
+	def _sides(self, triangles, starts, stops, tol):
+		"""Returns the bool array telling whether the segments from the 
+		(..., 3) STARTS to the (..., 3) STOPS end on opposite sides of the
+		planes of the (..., 3, 3) TRIANGLES, farther than TOL from them.
+		Segments in the plane of a triangle hit it anywhere by rounding."""
+
+		triangles = numpy.asarray(triangles).reshape((-1, 3, 3))
+
+		normals = numpy.cross(triangles[:, 1] - triangles[:, 0],
+				triangles[:, 2] - triangles[:, 0])
+		norms = numpy.sqrt((normals ** 2).sum(axis = 1))
+		normals /= numpy.where(norms > 0, norms, 1)[:, numpy.newaxis]
+
+		distances_start = ((starts - triangles[:, 0]) * normals).sum(axis = 1)
+		distances_stop = ((stops - triangles[:, 0]) * normals).sum(axis = 1)
+
+		return (distances_start * distances_stop < 0) & \
+				(abs(distances_start) > tol) & (abs(distances_stop) > tol)
+
+	def insert_surface(self, vertices, triangles,
+			renderers_point, renderers_line, renderers_face,
+			tol,
+			groups = None, snap = None):
+		"""Insert the triangle mesh given by the (N, 3) VERTICES and the
+		(M, 3) index array TRIANGLES, as e.g. returned by marching cubes.
+		The vertices are inserted once by .insert_points(), the edges all
+		at once by ._insert_segments(), and the Lines of the world crossing
+		the triangles are found in batches and flipped or subdivided, see
+		._split_crossing_lines().  The flat Tetrahedra left are flipped 
+		away by ._flip_flat_tetrahedra().  The Points on the surface carry
+		RENDERERS_POINT and RENDERERS_LINE.  RENDERERS_FACE is attached to
+		the Faces inside of the triangles themselves, see
+		._attach_surface_renderers(), not to the Points, for Faces between
+		Points on the surface may cross its inside.
+
+		GROUPS is an optional (M,) integer array assigning the triangles to
+		groups, then RENDERERS_* are sequences indexed by the group.
+		Vertices and edges shared by several groups carry the renderers of
+		all of them.  SNAP is the distance, relative to the size of the
+		edges and the Lines crossed, below which no Points are created next
+		to others.  It defaults to 1e-6.
+
+		Returns the (N,) array of the .store indices of the vertex
+		Points."""
+
+		if snap is None:
+			snap = 1e-6
+
+		version = self.tetrahedra.version
+
+		vertices = numpy.asarray(vertices, dtype = numpy.float64).\
+				reshape((-1, 3))
+		triangles = numpy.asarray(triangles, dtype = numpy.int_).\
+				reshape((-1, 3))
+
+		if groups is None:
+			groups = numpy.zeros(len(triangles), dtype = numpy.int_)
+			renderers_point = [renderers_point]
+			renderers_line = [renderers_line]
+			renderers_face = [renderers_face]
+
+		groups = numpy.asarray(groups, dtype = numpy.int_)
+
+		indices = numpy.empty(len(vertices), dtype = numpy.int_)
+		indices[...] = -1
+
+		# Insert each vertex once, and attach the renderers of its
+		# groups ...
+
+		used = numpy.unique(triangles)
+		indices[used] = self.insert_points(vertices[used],
+				renderers_point = set(),
+				renderers_line = set(),
+				renderers_face = set(),
+				tol = tol)
+
+		for group in numpy.unique(groups):
+			for vertex in numpy.unique(triangles[groups == group]):
+				self.points.objects[indices[vertex]].attach_renderers(
+						renderers_point = renderers_point[group],
+						renderers_line = renderers_line[group],
+						renderers_face = set())
+
+		# Insert each edge once, with the renderers of all its groups ...
+
+		edges = numpy.vstack((
+				triangles[:, [0, 1]],
+				triangles[:, [1, 2]],
+				triangles[:, [2, 0]]))
+		edges.sort(axis = 1)
+		edge_groups = numpy.tile(groups, 3)
+
+		order = numpy.lexsort((edge_groups, edges[:, 1], edges[:, 0]))
+		(edges, edge_groups) = (edges[order], edge_groups[order])
+
+		different = numpy.ones(len(edges), dtype = numpy.bool_)
+		different[1:] = (edges[1:] != edges[:-1]).any(axis = 1)
+		firsts = numpy.nonzero(different)[0]
+
+		segments = []
+		segment_renderers = []
+
+		for (first, last) in zip(firsts,
+				numpy.append(firsts[1:], len(edges))):
+			(edge_renderers_point, edge_renderers_line) = (set(), set())
+
+			for group in numpy.unique(edge_groups[first:last]):
+				edge_renderers_point |= set(renderers_point[group])
+				edge_renderers_line |= set(renderers_line[group])
+
+			segments.append([self.points.objects[index]
+					for index in indices[edges[first]]])
+			segment_renderers.append(
+					(edge_renderers_point, edge_renderers_line, set()))
+
+		self._insert_segments(segments, segment_renderers,
+				tol = tol, snap = snap)
+
+		# Subdivide the Lines crossing the triangles, and mark the Faces
+		# inside of them ...
+
+		self._split_crossing_lines(vertices[triangles], groups,
+				renderers_point = renderers_point,
+				renderers_line = renderers_line,
+				tol = tol, snap = snap)
+
+		self._attach_surface_renderers(vertices[triangles], groups,
+				renderers_face = renderers_face,
+				tol = tol, snap = snap)
+
+		self._flip_flat_tetrahedra(version, quality = 1e-4)
+
+		return indices
+
+	def _flip_flat_tetrahedra(self, version, quality):
+		"""Remove the flat Tetrahedra created since .tetrahedra.version 
+		VERSION by flipping their Faces and Lines, see Face.flip() and 
+		Line.flip().  Flat are the Tetrahedra with a volume below QUALITY 
+		times the cube of their longest Line.  In rounds, the flattest
+		Tetrahedra first, until no flat Tetrahedron is created anymore."""
+
+		tetrahedra = self.tetrahedra
+		store = self.store
+
+		while True:
+			indices = tetrahedra.indices()
+			indices = indices[tetrahedra.stamps[indices] > version]
+
+			version = tetrahedra.version
+
+			corners = store.positions()[tetrahedra['points'][indices]]
+			edges = corners[:, [0, 0, 0, 1, 1, 2]] - \
+					corners[:, [1, 2, 3, 2, 3, 3]]
+			lengths = numpy.sqrt((edges ** 2).sum(axis = 2)).max(axis = 1)
+			volumes = abs(numpy.linalg.det(corners[:, 1:] - 
+					corners[:, :1])) / 6
+
+			qualities = volumes / lengths ** 3
+			flat = qualities < quality
+			indices = indices[flat][numpy.argsort(qualities[flat])]
+
+			if len(indices) == 0:
+				break
+
+			for index in indices.tolist():
+				if not tetrahedra.alive[index] or \
+						tetrahedra.stamps[index] > version:
+					continue
+
+				for face in tetrahedra['faces'][index].tolist():
+					if store.faces.objects[face].flip() is not None:
+						break
+				else:
+					points = [store.points.objects[point] for point in 
+							tetrahedra['points'][index].tolist()]
+
+					for pair in itertools.combinations(points, 2):
+						if store.find(pair).flip() is not None:
+							break
+
+	def _split_crossing_lines(self, triangles, groups,
+			renderers_point, renderers_line,
+			tol, snap):
+		"""Subdivide all Lines crossing one of the (M, 3, 3) TRIANGLES in
+		their interior.  The crossings of all Lines with all triangles are
+		found in one batch, candidate pairs are taken from a grid with
+		cells of the median triangle size by kernels.segment_box_pairs().
+		Each Line crossed is flipped away by Line.flip() if possible, else
+		subdivided at its first crossing, with the RENDERERS_* of the 
+		GROUPS entry of the triangle.  Lines ending
+		closer to a triangle than SNAP times their length touch it, they
+		are not subdivided.  The Lines created meanwhile are tested in the
+		next batch, until no Line crosses."""
+
+		lowers = triangles.min(axis = 1)
+		uppers = triangles.max(axis = 1)
+
+		cell = numpy.median((uppers - lowers).max(axis = 1))
+		if not cell > 0:
+			cell = max((uppers - lowers).max(), 1.0)
+
+		# The unit normals of the triangles, to reject Lines touching or
+		# lying in a triangle's plane ...
+
+		normals = numpy.cross(triangles[:, 1] - triangles[:, 0],
+				triangles[:, 2] - triangles[:, 0])
+		norms = numpy.sqrt((normals ** 2).sum(axis = 1))
+		normals /= numpy.where(norms > 0, norms, 1)[:, numpy.newaxis]
+
+		lines = self.lines.indices()
+
+		while len(lines):
+			version = self.lines.version
+
+			# Broad phase ...
+
+			positions = self.store.positions()
+			line_points = self.lines['points'][lines]
+			starts = positions[line_points[:, 0]]
+			stops = positions[line_points[:, 1]]
+
+			(segments, candidates) = matplot3dext.objects.kernels.\
+					segment_box_pairs(starts, stops, lowers, uppers, cell)
+
+			# Narrow phase.  Crossings at or next to the end points of the
+			# Lines are left out ...
+
+			distances_start = ((starts[segments] -
+					triangles[candidates, 0]) * normals[candidates]).\
+					sum(axis = 1)
+			distances_stop = ((stops[segments] -
+					triangles[candidates, 0]) * normals[candidates]).\
+					sum(axis = 1)
+			margins = numpy.maximum(tol,
+					snap * abs(distances_start - distances_stop))
+			strict = (distances_start * distances_stop < 0) & \
+					(abs(distances_start) > margins) & \
+					(abs(distances_stop) > margins)
+			(segments, candidates) = (segments[strict], candidates[strict])
+
+			(hits, parameters, coordinates) = matplot3dext.objects.\
+					kernels.intersect_pairs(
+						triangles = triangles[candidates],
+						starts = starts[segments],
+						stops = stops[segments],
+						tol = tol)
+
+			(segments, candidates, parameters) = \
+					(segments[hits], candidates[hits], parameters[hits])
+
+			# Take the first crossing of each Line ...
+
+			order = numpy.lexsort((parameters, segments))
+			(segments, firsts) = numpy.unique(segments[order],
+					return_index = True)
+			firsts = order[firsts]
+
+			for (segment, candidate, parameter) in zip(segments,
+					candidates[firsts], parameters[firsts]):
+				if self.lines.stamps[lines[segment]] > version:
+					# The row has been rewritten meanwhile, it is tested
+					# in the next batch.
+					continue
+
+				# Flip the Line away if possible, else insert a Point ...
+
+				if self.lines.objects[lines[segment]].flip() \
+						is not None:
+					continue
+
+				group = groups[candidate]
+
+				subdivision = matplot3dext.objects.subdivision.\
+						Subdivision(
+							coordinates = [parameter],
+							base_point = self.points.objects[
+								line_points[segment, 0]],
+							end_points = [self.points.objects[
+								line_points[segment, 1]]],
+							renderers_point = renderers_point[group],
+							renderers_line = renderers_line[group],
+							renderers_face = set(),
+							tol = tol,
+							world = self)
+
+				subdivision.reduce().subdivide()
+
+			# Continue with the Lines created ...
+
+			lines = self.lines.indices()
+			lines = lines[self.lines.stamps[lines] > version]
+
+	def _attach_surface_renderers(self, triangles, groups, renderers_face,
+			tol, snap):
+		"""Attach RENDERERS_FACE of the GROUPS entry of each of the
+		(M, 3, 3) TRIANGLES to the Faces inside of it, see
+		.attach_face_renderers().  A Face is inside if its corners are,
+		within SNAP times the triangle size, by which the Points inserted
+		on the edges may be off.  Candidate pairs are found by the centres
+		of the Faces, by kernels.segment_box_pairs()."""
+
+		faces = self.store.faces
+		positions = self.store.positions()
+
+		candidates = faces.indices()
+		corners = positions[faces['points'][candidates]]
+		centres = corners.mean(axis = 1)
+
+		# Broad phase ...
+
+		lowers = triangles.min(axis = 1)
+		uppers = triangles.max(axis = 1)
+		sizes = (uppers - lowers).max(axis = 1)
+		margins = numpy.maximum(tol, snap * sizes)
+
+		cell = numpy.median(sizes)
+		if not cell > 0:
+			cell = max(sizes.max(), 1.0)
+
+		(pairs, boxes) = matplot3dext.objects.kernels.segment_box_pairs(
+				centres, centres,
+				lowers - margins[:, numpy.newaxis],
+				uppers + margins[:, numpy.newaxis],
+				cell)
+
+		# Narrow phase.  The corners must be next to the plane of the
+		# triangle, and inside of its edges ...
+
+		normals = numpy.cross(triangles[:, 1] - triangles[:, 0],
+				triangles[:, 2] - triangles[:, 0])
+		norms = numpy.sqrt((normals ** 2).sum(axis = 1))
+		normals /= numpy.where(norms > 0, norms, 1)[:, numpy.newaxis]
+
+		offsets = corners[pairs] - triangles[boxes, numpy.newaxis, 0]
+		inside = (abs((offsets * normals[boxes, numpy.newaxis]).sum(
+				axis = 2)) <= margins[boxes, numpy.newaxis]).all(axis = 1)
+
+		for slot in range(3):
+			edges = triangles[:, (slot + 1) % 3] - triangles[:, slot]
+			outwards = numpy.cross(edges, normals)
+			outwards /= numpy.maximum(numpy.sqrt((outwards ** 2).sum(
+					axis = 1)), 1e-300)[:, numpy.newaxis]
+
+			offsets = corners[pairs] - triangles[boxes, numpy.newaxis, slot]
+			inside &= ((offsets * outwards[boxes, numpy.newaxis]).sum(
+					axis = 2) <= margins[boxes, numpy.newaxis]).all(axis = 1)
+
+		(pairs, boxes) = (pairs[inside], boxes[inside])
+
+		for group in numpy.unique(groups[boxes]):
+			self.attach_face_renderers(
+					numpy.unique(candidates[pairs[groups[boxes] == group]]),
+					renderers_face[group])
@@ -31,3 +31,14 @@ class Renderer:
 		using backend BACKEND."""
 
 		raise NotImplementedError('Derived must overload.')
+
+	def render_many(self, objects, backend, positions = None):
+		"""Render all OBJECTS using backend BACKEND.  Overload this function 
+		to hand the OBJECTS to the backend in one batch, by default they are
+		rendered one by one.  POSITIONS, if given, are the (N, 3) positions
+		to hand to the backend instead of the positions of the OBJECTS, e.g.
+		as projected by a matplot3dext.views.view.View.  They are ignored
+		when rendering one by one."""
+
+		for object in objects:
+			self.render(object, backend)
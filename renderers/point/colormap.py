@@ -20,6 +20,7 @@
 
 # Developed since: Mar 2010
 
+import numpy
 import matplot3dext.renderers.interface
 import keyconf
 
@@ -78,3 +79,23 @@ class ColormapPointRenderer(matplot3dext.renderers.interface.Renderer,
 		# Render.
 
 		backend.plot_point(point, **plot_kwargs)
+
+	def render_many(self, points, backend, positions = None):
+		"""Render all matplot3dext points POINTS using backend BACKEND, as one
+		collection of the (N, 3) POSITIONS, which default to the positions 
+		of the POINTS.  Colormapped colors are handed 
+		over as (N, 4) RGBA arrays holding one color per point, computed in
+		one batch by Colormap.get_colors()."""
+
+		if positions is None:
+			positions = numpy.asarray([point.position for point in points],
+					dtype = numpy.float64).reshape((-1, 3))
+
+		plot_kwargs = dict(self)  # Copies.
+
+		for key in ['markeredgecolor', 'markerfacecolor']:
+			if self.colormaps.is_configured(key):
+				colormap = self.colormaps.get_config(key)
+				plot_kwargs[key] = colormap.get_colors(points)
+
+		backend.plot_points(positions, **plot_kwargs)
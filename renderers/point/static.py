@@ -20,6 +20,7 @@
 
 # Developed since: Mar 2010
 
+import numpy
 import matplot3dext.renderers.interface
 import keyconf
 
@@ -41,3 +42,14 @@ class StaticPointRenderer(matplot3dext.renderers.interface.Renderer,
 		"""Render matplot3dext point POINT using backend BACKEND."""
 
 		backend.plot_point(point, **self)
+
+	def render_many(self, points, backend, positions = None):
+		"""Render all matplot3dext points POINTS using backend BACKEND, as one
+		collection of the (N, 3) POSITIONS, which default to the positions 
+		of the POINTS."""
+
+		if positions is None:
+			positions = numpy.asarray([point.position for point in points],
+					dtype = numpy.float64).reshape((-1, 3))
+
+		backend.plot_points(positions, **self)
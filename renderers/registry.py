@@ -0,0 +1,97 @@
+# Copyright (c) 2010 Friedrich Romstedt <www.friedrichromstedt.org>
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+import numpy
+
+"""Interning of Renderers as bits, sets of Renderers are integer masks."""
+
+
+class Registry:
+	"""Assigns each Renderer a bit of a 64 bit mask.  Sets of Renderers are
+	represented by the masks of their bits, hence intersections and unions
+	are integer ANDs and ORs."""
+
+	# Number of bits of the masks.
+	capacity = 64
+
+	def __init__(self):
+		"""Initialise an empty registry."""
+
+		# The Renderer of bit k is .renderers[k].  Renderers are looked up
+		# by identity, they need not be hashable.
+		self.renderers = []
+		self.bits = {}
+
+	def bit(self, renderer):
+		"""Returns the bit number of RENDERER, assigning the next free bit 
+		on first use."""
+
+		key = id(renderer)
+
+		if key not in self.bits:
+			if len(self.renderers) >= self.capacity:
+				raise ValueError('Cannot register more than %d Renderers.' % 
+						self.capacity)
+
+			self.bits[key] = len(self.renderers)
+			self.renderers.append(renderer)
+
+		return self.bits[key]
+
+	def mask(self, renderers):
+		"""Returns the uint64 mask of the iterable RENDERERS."""
+
+		mask = 0
+		for renderer in renderers:
+			mask |= 1 << self.bit(renderer)
+
+		return numpy.uint64(mask)
+
+	def lookup(self, mask):
+		"""Returns the set of the Renderers in MASK."""
+
+		mask = int(mask)
+
+		return set([renderer for (bit, renderer) in enumerate(self.renderers)
+				if mask & (1 << bit)])
+
+	def select(self, masks, renderer):
+		"""Returns the boolean array telling which of the MASKS contain
+		RENDERER."""
+
+		bit = numpy.uint64(1 << self.bit(renderer))
+
+		return (numpy.asarray(masks, dtype = numpy.uint64) & bit) != 0
+
+
+def renderers_property(column):
+	"""Returns a read-only property exposing the renderer mask COLUMN of the
+	row of an object in the .store of its .world as the set of Renderers.
+	The object must provide .world, .index, and .ndim.  Each read returns a
+	new set, changing it does not change the object's renderers, use 
+	Point.attach_renderers() for that."""
+
+	def get_renderers(object):
+		object.world.store.resolve_renderers()
+		table = object.world.store.tables[object.ndim]
+
+		return object.world.registry.lookup(table[column][object.index])
+
+	return property(get_renderers)
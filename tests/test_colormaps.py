@@ -0,0 +1,105 @@
+# Copyright (c) 2010 Friedrich Romstedt <www.friedrichromstedt.org>
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+import numpy
+import matplot3dext.colormaps.interface
+import matplot3dext.colormaps.norm
+import matplot3dext.norms.interface
+import matplot3dext.norms.point.field
+
+import test_world
+
+"""Tests of the NormColormap."""
+
+
+def gray(values):
+	"""A gray colormap, NaN maps onto transparent black."""
+
+	values = numpy.asarray(values, dtype = numpy.float64)
+	colors = numpy.stack([values, values, values, numpy.ones_like(values)],
+			axis = -1)
+	colors[numpy.isnan(values)] = 0.0
+
+	return colors
+
+
+class Sum(matplot3dext.colormaps.interface.Colormap):
+	"""Colors objects one by one, gray by their sum."""
+
+	def get_color(self, object):
+		return gray(sum(object) / 6.0)
+
+
+def test_get_colors_default():
+	colormap = Sum()
+
+	# One by one, stacked into an (N, 4) array, also if empty ...
+
+	colors = colormap.get_colors([(0.0, 0.0, 0.0), (1.0, 2.0, 3.0)])
+
+	assert colors.shape == (2, 4)
+	assert numpy.allclose(colors, [[0.0, 0.0, 0.0, 1.0], 
+			[1.0, 1.0, 1.0, 1.0]])
+	assert colormap.get_colors([]).shape == (0, 4)
+
+
+def test_lut_bad_color():
+	colormap = matplot3dext.colormaps.norm.NormColormap(gray, 
+			matplot3dext.norms.interface.Norm(), resolution = 5)
+
+	colors = colormap._map([0.0, numpy.nan, 0.5, 1.0])
+
+	assert numpy.allclose(colors, [
+			[0.0, 0.0, 0.0, 1.0], [0.0, 0.0, 0.0, 0.0],
+			[0.5, 0.5, 0.5, 1.0], [1.0, 1.0, 1.0, 1.0]])
+	assert numpy.allclose(colormap._map(numpy.nan), 0.0)
+
+
+def test_cache():
+	(world, renderer) = test_world.make_world()
+	world.insert_points(
+			numpy.random.RandomState(4).uniform(0.1, 1.9, (20, 3)),
+			set(), set(), set(),
+			tol = 1e-9)
+
+	points = list(world.points)
+	norm = matplot3dext.norms.point.field.FieldNorm(world, 'field', 
+			0.0, 6.0)
+	norm.set_values(points, [point.position.sum() for point in points])
+
+	colormap = matplot3dext.colormaps.norm.NormColormap(gray, norm)
+
+	# The cached colors are handed out as copies ...
+
+	colors = colormap.get_colors(points)
+	expected = colors.copy()
+	colors[...] = 0.0
+
+	assert numpy.allclose(colormap.get_colors(points), expected)
+
+	color = colormap.get_color(points[0])
+	color[...] = 0.0
+
+	assert numpy.allclose(colormap.get_color(points[0]), expected[0])
+
+	# ... and the cache does not hold the objects colored ...
+
+	assert all(type(key) is tuple for key in colormap.colors)
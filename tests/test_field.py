@@ -0,0 +1,90 @@
+# Copyright (c) 2010 Friedrich Romstedt <www.friedrichromstedt.org>
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+import numpy
+import matplot3dext.norms.point.field
+
+import test_world
+
+"""Tests of the FieldNorm."""
+
+
+def test_field_norm():
+	(world, renderer) = test_world.make_world()
+
+	positions = numpy.random.RandomState(4).uniform(0.1, 1.9, (100, 3))
+	world.insert_points(positions, set(), set(), set(), tol = 1e-9)
+
+	norm = matplot3dext.norms.point.field.FieldNorm(world, 'field', 
+			0.0, 6.0)
+
+	# A linear field is reproduced exactly, at the Points ...
+
+	points = list(world.points)
+	norm.set_values(points, 
+			[point.position.sum() for point in points])
+
+	assert numpy.allclose(norm.values(points), 
+			[point.position.sum() for point in points])
+	assert not numpy.isnan(norm.normalise_many(points)).any()
+
+	# ... and in between, also on the surface of the world with 
+	# round-off ...
+
+	samples = numpy.vstack((
+			numpy.random.RandomState(5).uniform(0.0, 2.0, (50, 3)),
+			[[2.0 + 1e-15, 0.3, 1.7], [-1e-15, -1e-15, 1.0]]))
+
+	assert numpy.allclose(norm.evaluate(samples), samples.sum(axis = 1))
+	assert numpy.isnan(norm.evaluate([[3.0, 1.0, 1.0]])).all()
+
+
+def test_field_norm_batch():
+	for locator in ['linear', 'grid', 'walk']:
+		(world, renderer) = test_world.make_world(locator)
+
+		world.insert_points(
+				numpy.random.RandomState(4).uniform(0.1, 1.9, (100, 3)),
+				set(), set(), set(),
+				tol = 1e-9)
+
+		norm = matplot3dext.norms.point.field.FieldNorm(world, 'field', 
+				0.0, 6.0)
+
+		positions = numpy.vstack((
+				numpy.random.RandomState(6).uniform(0.0, 2.0, (200, 3)),
+				[[3.0, 1.0, 1.0], [1.0, -0.5, 1.0]]))
+
+		(corners, weights) = norm.weights(positions)
+
+		# The batch finds the positions the scalar queries find, with the
+		# weights reproducing them ...
+
+		for (position, corner, weight) in zip(positions, corners, weights):
+			(index, coordinates) = world.locator.locate(position, norm.tol)
+
+			assert (corner >= 0).all() == (index >= 0)
+
+			if index >= 0:
+				assert numpy.allclose(numpy.dot(weight, 
+						world.store.positions()[corner]), position)
+			else:
+				assert numpy.isnan(weight).all()
@@ -0,0 +1,160 @@
+# Copyright (c) 2010 Friedrich Romstedt <www.friedrichromstedt.org>
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+
+import numpy
+import pytest
+import matplot3dext.objects.world
+import matplot3dext.colormaps.norm
+import matplot3dext.norms.point.field
+import matplot3dext.renderers.interface
+
+import test_colormaps
+
+"""Tests of the Renderers, rendering the Points of a World in batches."""
+
+
+class Backend:
+	"""Records the calls of the plot commands."""
+
+	def __init__(self):
+		self.calls = []
+
+	def plot_point(self, point, **plot_kwargs):
+		self.calls.append(('plot_point', 
+				numpy.asarray(point.position).reshape((1, 3)), plot_kwargs))
+
+	def plot_points(self, positions, **plot_kwargs):
+		self.calls.append(('plot_points', numpy.asarray(positions), 
+				plot_kwargs))
+
+
+class OneByOne(matplot3dext.renderers.interface.Renderer):
+	"""Renders the points one by one, by the default .render_many()."""
+
+	def render(self, point, backend):
+		backend.plot_point(point)
+
+
+class Batch(matplot3dext.renderers.interface.Renderer):
+	"""Renders the points in one batch."""
+
+	def render_many(self, points, backend, positions = None):
+		if positions is None:
+			positions = [point.position for point in points]
+
+		backend.plot_points(positions)
+
+
+def make_world(renderer):
+	"""Returns (world, points), the World covering [0, 2]^3 with its 
+	corners rendered by a OneByOne Renderer, and 20 POINTS inside rendered
+	by RENDERER."""
+
+	corners = OneByOne()
+	world = matplot3dext.objects.world.World(
+			(0.0, 2.0), (0.0, 2.0), (0.0, 2.0),
+			set([corners]), set(), set())
+
+	indices = world.insert_points(
+			numpy.random.RandomState(7).uniform(0.1, 1.9, (20, 3)),
+			set([renderer]), set(), set(),
+			tol = 1e-9)
+
+	return (world, [world.points.objects[index] for index in indices])
+
+
+def rendered(backend, command):
+	"""Returns the calls of BACKEND to COMMAND."""
+
+	return [call for call in backend.calls if call[0] == command]
+
+
+def test_render_points():
+	renderer = Batch()
+	(world, points) = make_world(renderer)
+
+	backend = Backend()
+	world.render_points(backend)
+
+	# The corners one by one, the others in one batch ...
+
+	assert len(rendered(backend, 'plot_point')) == 8
+
+	calls = rendered(backend, 'plot_points')
+	assert len(calls) == 1
+
+	positions = calls[0][1]
+	assert positions.shape == (20, 3)
+	assert numpy.allclose(numpy.sort(positions, axis = 0), 
+			numpy.sort([point.position for point in points], axis = 0))
+
+
+def test_static_point_renderer():
+	pytest.importorskip('keyconf')
+	import matplot3dext.renderers.point.static
+
+	renderer = matplot3dext.renderers.point.static.StaticPointRenderer(
+			marker = 'o')
+	(world, points) = make_world(renderer)
+
+	backend = Backend()
+	world.render_points(backend)
+
+	calls = rendered(backend, 'plot_points')
+	assert len(calls) == 1
+
+	(command, positions, plot_kwargs) = calls[0]
+	assert positions.shape == (20, 3)
+	assert plot_kwargs['marker'] == 'o'
+
+
+def test_colormap_point_renderer():
+	pytest.importorskip('keyconf')
+	import matplot3dext.renderers.point.colormap
+
+	renderer = matplot3dext.renderers.point.colormap.\
+			ColormapPointRenderer(marker = 'o')
+	(world, points) = make_world(renderer)
+
+	norm = matplot3dext.norms.point.field.FieldNorm(world, 'field', 
+			0.0, 6.0)
+	norm.set_values(points, [point.position.sum() for point in points])
+
+	colormap = matplot3dext.colormaps.norm.NormColormap(
+			test_colormaps.gray, norm)
+	renderer.colormaps.configure(markerfacecolor = colormap)
+
+	backend = Backend()
+	world.render_points(backend)
+
+	# One batch, with one RGBA color per point, in the order of the 
+	# positions ...
+
+	calls = rendered(backend, 'plot_points')
+	assert len(calls) == 1
+
+	(command, positions, plot_kwargs) = calls[0]
+	colors = numpy.asarray(plot_kwargs['markerfacecolor'])
+
+	assert positions.shape == (20, 3) and colors.shape == (20, 4)
+	assert numpy.allclose(colors[:, 0], positions.sum(axis = 1) / 6.0)
+	assert plot_kwargs['marker'] == 'o'
@@ -0,0 +1,122 @@
+# Copyright (c) 2010 Friedrich Romstedt <www.friedrichromstedt.org>
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+import numpy
+import matplot3dext.objects.store
+
+import test_world
+
+"""Tests of the Tables and the Store."""
+
+
+class Handle:
+	"""Stands for the object of a row."""
+
+	pass
+
+
+def test_table_rows():
+	table = matplot3dext.objects.store.Table(capacity = 2)
+	table.add_column('value', (), numpy.float64, numpy.nan)
+
+	handles = [Handle() for index in range(3)]
+	indices = [table.append(handle, value = float(index))
+			for (index, handle) in enumerate(handles)]
+
+	# Each append bumps the version, and stamps its row ...
+
+	assert indices == [0, 1, 2]
+	assert table.version == 3
+	assert table.stamps[:3].tolist() == [1, 2, 3]
+	assert table.capacity >= 3
+
+	# Removing resets the row, and stamps it too ...
+
+	table.remove(1)
+
+	assert table.version == 4 and table.stamps[1] == 4
+	assert numpy.isnan(table['value'][1])
+	assert table.indices().tolist() == [0, 2] and len(table) == 2
+
+	# ... and the row is reused, the most recently removed first ...
+
+	table.remove(0)
+
+	assert table.append(Handle(), value = 5.0) == 0
+	assert table.stamps[0] == table.version == 6
+
+	indices = table.extend(2, value = [6.0, 7.0])
+
+	assert indices.tolist() == [1, 3]
+	assert (table.stamps[indices] == table.version).all()
+	assert table['value'][[0, 1, 2, 3]].tolist() == [5.0, 6.0, 2.0, 7.0]
+
+
+def test_compact():
+	(world, renderer) = test_world.make_world('walk')
+
+	world.insert_points(
+			numpy.random.RandomState(2).uniform(0.1, 1.9, (100, 3)),
+			set(), set(), set(),
+			tol = 1e-9)
+
+	# Inserting one by one leaves unused rows behind ...
+
+	for position in numpy.random.RandomState(5).uniform(0.1, 1.9, (10, 3)):
+		world.create_point(position, set(), set(), set(), tol = 1e-9)
+
+	store = world.store
+	tetrahedra = store.tetrahedra
+
+	assert tetrahedra.size > len(tetrahedra)
+
+	# The corners of each Tetrahedron, by object ...
+
+	corners = dict((tetrahedron, store.positions()[
+			tetrahedra['points'][tetrahedron.index]].copy())
+			for tetrahedron in tetrahedra)
+
+	version = tetrahedra.version
+	world.compact()
+
+	# The rows are moved to the front, and the indices held by the 
+	# other Tables follow them ...
+
+	assert tetrahedra.size == len(tetrahedra)
+	assert (tetrahedra.stamps[:tetrahedra.size] > version).all()
+
+	for (tetrahedron, positions) in corners.items():
+		assert store.contains(tetrahedron)
+		assert numpy.array_equal(store.positions()[
+				tetrahedra['points'][tetrahedron.index]], positions)
+
+	test_world.check_tetrahedralisation(world)
+
+	# ... and inserting goes on as before ...
+
+	world.insert_points(
+			numpy.random.RandomState(3).uniform(0.1, 1.9, (50, 3)),
+			set(), set(), set(),
+			tol = 1e-9)
+
+	assert len(world.points) == 168
+
+	test_world.check_tetrahedralisation(world)
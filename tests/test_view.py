@@ -0,0 +1,94 @@
+# Copyright (c) 2010 Friedrich Romstedt <www.friedrichromstedt.org>
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+
+import numpy
+import matplot3dext.views.view
+
+import test_world
+
+"""Tests of the View."""
+
+
+def project(matrix, positions):
+	"""Returns the (N, 3) projection of the (N, 3) POSITIONS by the 4x4 
+	MATRIX, calculated directly."""
+
+	homogeneous = numpy.dot(numpy.hstack((positions, 
+			numpy.ones((len(positions), 1)))), matrix.T)
+
+	return homogeneous[:, :3] / homogeneous[:, 3:]
+
+
+def check_projection(view):
+	"""Checks the projection of VIEW against projecting all used rows 
+	directly."""
+
+	store = view.world.store
+	indices = store.points.indices()
+
+	projection = view.projection()
+
+	assert projection.shape == (store.points.size, 3)
+	assert numpy.allclose(projection[indices], 
+			project(view.matrix, store.positions()[indices]))
+
+
+def test_projection():
+	(world, renderer) = test_world.make_world('walk')
+
+	matrix = numpy.asarray([
+			[2.0, 0.0, 0.0, 1.0],
+			[0.0, 1.0, 0.5, 0.0],
+			[0.0, 0.0, 1.0, -1.0],
+			[0.0, 0.0, 0.1, 1.0]])
+	view = matplot3dext.views.view.View(world, matrix)
+
+	check_projection(view)
+
+	# Points added are projected in the next call, also when the Table
+	# grows ...
+
+	world.insert_points(
+			numpy.random.RandomState(9).uniform(0.1, 1.9, (200, 3)),
+			set(), set(), set(),
+			tol = 1e-9)
+
+	check_projection(view)
+
+	for position in numpy.random.RandomState(10).uniform(0.1, 1.9, (5, 3)):
+		world.create_point(position, set(), set(), set(), tol = 1e-9)
+
+	check_projection(view)
+
+	# ... as well as after compaction ...
+
+	world.compact()
+
+	check_projection(view)
+
+	# ... and a new matrix projects all Points again ...
+
+	view.set_matrix(numpy.eye(4))
+
+	check_projection(view)
+	assert numpy.allclose(view.project(list(world.points)), 
+			[point.position for point in world.points])
@@ -0,0 +1,517 @@
+# Copyright (c) 2010 Friedrich Romstedt <www.friedrichromstedt.org>
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+import numpy
+import matplot3dext.objects.kernels
+import matplot3dext.objects.line
+import matplot3dext.objects.locator
+import matplot3dext.objects.world
+
+"""Tests of the World, building it and inserting objects end to end."""
+
+
+class Renderer:
+	"""Stands for a Renderer, the World only interns them."""
+
+	pass
+
+
+def make_world(locator = None):
+	"""Returns (world, renderer) for the World covering [0, 2]^3, whose 
+	corners are rendered by RENDERER."""
+
+	renderer = Renderer()
+	world = matplot3dext.objects.world.World(
+			(0.0, 2.0), (0.0, 2.0), (0.0, 2.0),
+			set([renderer]), set([renderer]), set([renderer]),
+			locator = locator)
+
+	return (world, renderer)
+
+
+def check_tetrahedralisation(world):
+	"""Checks that the Tetrahedra of WORLD fill the cube without overlap,
+	and that the objects agree with the .store."""
+
+	store = world.store
+	positions = store.positions()
+
+	# The volumes sum up to the volume of the cube, and none is 
+	# degenerate ...
+
+	indices = store.tetrahedra.indices()
+	corners = positions[store.tetrahedra['points'][indices]]
+	volumes = numpy.abs(numpy.linalg.det(
+			corners[:, 1:] - corners[:, :1])) / 6
+
+	assert numpy.allclose(volumes.sum(), 8.0)
+	assert (volumes > 1e-12).all()
+
+	# Each Face bounds one Tetrahedron on the surface, and two inside, 
+	# Faces not part of the tetrahedralisation none ...
+
+	for face in store.faces:
+		count = len(face.attached_tetrahedra)
+		if count == 0:
+			continue
+
+		assert count in (1, 2)
+
+		(lower, upper) = store.bounds(face)
+		on_surface = ((lower == upper) & 
+				((lower == 0.0) | (lower == 2.0))).any()
+		assert (count == 1) == on_surface
+
+	# The neighbours are across the Faces, in both directions ...
+
+	tetrahedra = store.tetrahedra
+	for index in indices.tolist():
+		for (slot, neighbour) in enumerate(
+				tetrahedra['neighbours'][index].tolist()):
+			face = tetrahedra['faces'][index, slot]
+			attached = store.faces['tetrahedra'][face]
+			assert index in attached
+
+			if neighbour < 0:
+				assert (attached >= 0).sum() == 1
+			else:
+				assert neighbour in attached
+				other_slot = tetrahedra['faces'][neighbour].tolist().\
+						index(face)
+				assert tetrahedra['neighbours'][neighbour, other_slot] == \
+						index
+
+	# The Tetrahedra of the objects are those of the .store ...
+
+	for tetrahedron in store.tetrahedra:
+		assert store.find(tetrahedron.attached_points) is tetrahedron
+
+		for face in tetrahedron.attached_faces:
+			assert tetrahedron in face.attached_tetrahedra
+
+
+def test_cube():
+	(world, renderer) = make_world()
+
+	assert len(world.points) == 8
+	assert len(world.lines) == 18
+	assert len(world.faces) == 16
+	assert len(world.tetrahedra) == 5
+
+	check_tetrahedralisation(world)
+
+
+def test_create_point():
+	(world, renderer) = make_world()
+
+	# Inside of a Tetrahedron, on a Face, on a Line, and on a corner ...
+
+	inside = world.create_point([0.5, 1.0, 1.2], set(), set(), set(), 
+			tol = 1e-9)
+	on_face = world.create_point([0.5, 0.5, 0.0], set(), set(), set(),
+			tol = 1e-9)
+	on_line = world.create_point([1.0, 0.0, 2.0], set(), set(), set(),
+			tol = 1e-9)
+	corner = world.create_point([2.0, 2.0, 2.0], set(), set(), set(),
+			tol = 1e-9)
+
+	assert len(world.points) == 11
+	assert corner.index < 8
+
+	for point in [inside, on_face, on_line]:
+		assert point.visible
+		assert len(point.attached_tetrahedra) > 0
+
+	check_tetrahedralisation(world)
+
+
+def test_insert_points():
+	(world, renderer) = make_world()
+
+	positions = numpy.random.RandomState(0).uniform(0.1, 1.9, (200, 3))
+
+	indices = world.insert_points(positions, 
+			set([renderer]), set(), set(),
+			tol = 1e-9)
+
+	assert len(world.points) == 208
+	assert numpy.allclose(world.store.positions()[indices], positions)
+
+	for index in indices:
+		point = world.points.objects[index]
+		assert point.visible
+		assert renderer in point.renderers_point
+
+	check_tetrahedralisation(world)
+
+
+def test_insert_points_in_rounds():
+	(world, renderer) = make_world('walk')
+
+	positions = numpy.random.RandomState(6).uniform(0.1, 1.9, (300, 3))
+
+	# Four positions per Tetrahedron and round ...
+
+	indices = world.insert_points(positions, 
+			set([renderer]), set(), set(),
+			tol = 1e-9,
+			group = 4)
+
+	assert len(set(indices.tolist())) == 300
+	assert numpy.allclose(world.store.positions()[indices], positions)
+
+	check_tetrahedralisation(world)
+
+
+def test_delaunay_tetrahedra():
+	corners = numpy.asarray([
+			[0.0, 0.0, 0.0], [1.0, 0.0, 0.0], [0.0, 1.0, 0.0], [0.0, 0.0, 1.0]])
+	inner = numpy.dot(numpy.random.RandomState(5).dirichlet([1, 1, 1, 1], 
+			300), corners)
+
+	# A position given twice cannot be inserted again, only it is left 
+	# out ...
+
+	positions = numpy.vstack((corners, inner, inner[:1]))
+
+	(tetrahedra, inserted) = matplot3dext.objects.kernels.\
+			delaunay_tetrahedra(positions, min_volume = 1e-12)
+
+	assert inserted[:-1].all() and not inserted[-1]
+
+	# ... and the tetrahedra fill the enclosing one without overlap ...
+
+	corners = positions[tetrahedra]
+	volumes = abs(numpy.linalg.det(corners[:, 1:] - corners[:, :1])) / 6
+
+	assert (volumes > 0).all()
+	assert numpy.allclose(volumes.sum(), 1.0 / 6)
+
+
+def test_line_through_world():
+	(world, renderer) = make_world()
+	line_renderer = Renderer()
+
+	start = numpy.asarray([-1.0, 0.7, 0.9])
+	stop = numpy.asarray([3.0, 1.3, 1.1])
+
+	point1 = world.create_point(start, set(), set([line_renderer]), set(),
+			tol = 1e-9)
+	point2 = world.create_point(stop, set(), set([line_renderer]), set(),
+			tol = 1e-9)
+
+	assert not point1.visible and not point2.visible
+
+	# The Line outside of the world is split where it crosses the 
+	# Faces ...
+
+	matplot3dext.objects.line.Line(point1, point2, world = world)
+
+	check_tetrahedralisation(world)
+
+	pieces = world.store.positions()[world.lines['points'][
+			world.rendered_by(line_renderer, 1)]]
+	lengths = numpy.sqrt(((pieces[:, 1] - pieces[:, 0]) ** 2).sum(axis = 1))
+
+	assert len(pieces) > 2
+	assert numpy.allclose(lengths.sum(), 
+			numpy.sqrt(((stop - start) ** 2).sum()))
+
+
+def test_face_through_world():
+	(world, renderer) = make_world()
+	face_renderer = Renderer()
+
+	world.insert_points(
+			numpy.random.RandomState(1).uniform(0.1, 1.9, (50, 3)),
+			set(), set(), set(),
+			tol = 1e-9)
+
+	corners = numpy.asarray([
+			[-1.0, -1.0, 1.1], [4.0, -1.0, 0.9], [-1.0, 4.0, 1.05]])
+	points = [world.create_point(corner, set(), set(), set([face_renderer]),
+			tol = 1e-9) for corner in corners]
+
+	# The Face outside of the world subdivides all Lines crossing it ...
+
+	world.face_between(*points, search = True)
+
+	check_tetrahedralisation(world)
+
+	# ... and the Faces between the crossings cover the triangle ...
+
+	faces = world.store.positions()[world.faces['points'][
+			world.rendered_by(face_renderer, 2)]]
+
+	normal = numpy.cross(corners[1] - corners[0], corners[2] - corners[0])
+	normal /= numpy.sqrt((normal ** 2).sum())
+	assert numpy.allclose(numpy.dot(faces - corners[0], normal), 0.0)
+
+	samples = numpy.dot(
+			numpy.random.RandomState(2).dirichlet([1, 1, 1], 500), corners)
+	covered = numpy.zeros(len(samples), dtype = numpy.bool_)
+
+	for (corner1, corner2, corner3) in faces:
+		edges = numpy.asarray([corner2 - corner1, corner3 - corner1])
+		coordinates = numpy.linalg.lstsq(edges.T, (samples - corner1).T,
+				rcond = None)[0]
+		covered |= (coordinates >= -1e-9).all(axis = 0) & \
+				(coordinates.sum(axis = 0) <= 1 + 1e-9)
+
+	assert covered.all()
+
+
+def test_create_point_on_surface():
+	for locator in ['linear', 'grid', 'walk']:
+		(world, renderer) = make_world(locator)
+
+		# Round-off puts the positions just outside of the world ...
+
+		on_face = world.create_point([2.0 + 1e-15, 0.7, 1.3], 
+				set(), set(), set(), tol = 1e-9)
+		on_line = world.create_point([1.3, -1e-15, 2.0 + 1e-15],
+				set(), set(), set(), tol = 1e-9)
+
+		assert on_face.visible and on_line.visible
+		assert len(on_face.attached_tetrahedra) > 0
+		assert len(on_line.attached_tetrahedra) > 0
+
+		check_tetrahedralisation(world)
+
+
+def test_walk_locator():
+	(world, renderer) = make_world('walk')
+
+	# The walk restarts from the Tetrahedra created by the previous 
+	# insertion, and needs no fallback ...
+
+	for position in numpy.random.RandomState(4).uniform(0.1, 1.9, (300, 3)):
+		world.create_point(position, set(), set(), set(), tol = 1e-9)
+
+	assert world.locator.queries == 300
+	assert world.locator.fallbacks <= 3
+
+	check_tetrahedralisation(world)
+
+	# ... and outside of the world, the coordinates are NaN ...
+
+	(index, coordinates) = world.locator.locate([3.0, 1.0, 1.0], tol = 1e-9)
+
+	assert index == -1
+	assert coordinates.shape == (3,) and numpy.isnan(coordinates).all()
+
+
+def test_grid_locator():
+	(world, renderer) = make_world('grid')
+
+	# The grid is rebuilt and filled in batches while inserting ...
+
+	for position in numpy.random.RandomState(5).uniform(0.1, 1.9, (300, 3)):
+		world.create_point(position, set(), set(), set(), tol = 1e-9)
+
+	check_tetrahedralisation(world)
+
+	tetrahedra = world.store.tetrahedra
+	count = len(tetrahedra.indices())
+
+	assert world.locator.resolution > 1
+	assert world.locator.candidates_per_query() < count / 2
+
+	# ... and finds the same Tetrahedra as testing all of them ...
+
+	linear = matplot3dext.objects.locator.LinearLocator(world)
+
+	for position in numpy.random.RandomState(6).uniform(0.0, 2.0, (100, 3)):
+		(index, coordinates) = world.locator.locate(position)
+		(expected, expected_coordinates) = linear.locate(position)
+
+		assert index >= 0 and expected >= 0 and tetrahedra.alive[index]
+		assert numpy.allclose(coordinates, numpy.dot(
+				tetrahedra['matrix'][index],
+				position - tetrahedra['base'][index]))
+		assert (numpy.hstack(([1 - coordinates.sum()], coordinates)) >=
+				-1e-9).all()
+
+
+def test_insert_surface():
+	(world, renderer) = make_world()
+	(upper, lower) = (Renderer(), Renderer())
+
+	world.insert_points(
+			numpy.random.RandomState(3).uniform(0.1, 1.9, (50, 3)),
+			set(), set(), set(),
+			tol = 1e-9)
+
+	# An octahedron, its upper and lower half in different groups ...
+
+	vertices = 1.0 + 0.6 * numpy.asarray([
+			[1, 0, 0], [0, 1, 0], [-1, 0, 0], [0, -1, 0], 
+			[0, 0, 1], [0, 0, -1]]) + [0.01, 0.02, 0.03]
+	triangles = numpy.asarray([
+			[0, 1, 4], [1, 2, 4], [2, 3, 4], [3, 0, 4],
+			[1, 0, 5], [2, 1, 5], [3, 2, 5], [0, 3, 5]])
+	groups = numpy.asarray([0, 0, 0, 0, 1, 1, 1, 1])
+
+	indices = world.insert_surface(vertices, triangles,
+			[set([upper]), set([lower])], [set(), set()], 
+			[set([upper]), set([lower])],
+			tol = 1e-9,
+			groups = groups)
+
+	check_tetrahedralisation(world)
+
+	# Each vertex is one Point, the equator ones carry both groups' 
+	# renderers ...
+
+	assert len(set(indices)) == 6
+	assert numpy.allclose(world.store.positions()[indices], vertices)
+
+	for (vertex, index) in enumerate(indices):
+		renderers = world.points.objects[index].renderers_point
+		assert (upper in renderers) == (vertex != 5)
+		assert (lower in renderers) == (vertex != 4)
+
+	# The Faces rendered are the pieces of the triangles of their group,
+	# no chords between Points on the surface ...
+
+	positions = world.store.positions()
+
+	for (group, renderer) in enumerate([upper, lower]):
+		corners = positions[world.faces['points'][
+				world.rendered_by(renderer, 2)]]
+		area = numpy.sqrt((numpy.cross(corners[:, 1] - corners[:, 0],
+				corners[:, 2] - corners[:, 0]) ** 2).sum(axis = 1)).sum()
+
+		corners = vertices[triangles[groups == group]]
+		expected = numpy.sqrt((numpy.cross(corners[:, 1] - corners[:, 0],
+				corners[:, 2] - corners[:, 0]) ** 2).sum(axis = 1)).sum()
+
+		assert numpy.allclose(area, expected)
+
+	# ... and no Line crosses the surface anymore ...
+
+	positions = world.store.positions()
+	segments = positions[world.lines['points'][world.lines.indices()]]
+
+	for triangle in vertices[triangles]:
+		normal = numpy.cross(triangle[1] - triangle[0], 
+				triangle[2] - triangle[0])
+		distances = numpy.dot(segments - triangle[0], normal)
+		crossing = (distances[:, 0] * distances[:, 1] < 0) & \
+				(abs(distances) > 1e-9).all(axis = 1)
+
+		(hits, parameters, coordinates) = matplot3dext.objects.kernels.\
+				intersect_triangle_segments(triangle, 
+					segments[:, 0], segments[:, 1], tol = -1e-6)
+		assert not (hits & crossing).any()
+
+
+def test_point_attributes():
+	(world, renderer) = make_world()
+
+	world.add_point_attribute('linear', numpy.float64)
+	world.add_point_attribute('label', numpy.int32)
+
+	points = world.store.points
+	corners = points.indices()
+
+	def linear(positions):
+		return numpy.dot(positions, [1.0, 2.0, 3.0]) + 0.5
+
+	points['linear'][corners] = linear(points['position'][corners])
+	points['label'][corners] = 10 * numpy.arange(1, len(corners) + 1)
+
+	# A Point created by subdivision interpolates the float attribute,
+	# and takes the int attribute of the corner with the largest 
+	# weight ...
+
+	position = numpy.asarray([0.5, 1.0, 1.2])
+
+	(indices, coordinates) = world.locate_points([position])
+	weights = numpy.hstack((1 - coordinates[0].sum(), coordinates[0]))
+	nearest = world.store.tetrahedra['points'][indices[0]][weights.argmax()]
+
+	point = world.create_point(position, set(), set(), set(), tol = 1e-9)
+
+	assert numpy.allclose(points['linear'][point.index], linear(position))
+	assert points['label'][point.index] == points['label'][nearest]
+
+	# ... also on a Face, and in batches ...
+
+	on_face = world.create_point([0.5, 0.5, 0.0], set(), set(), set(),
+			tol = 1e-9)
+
+	positions = numpy.random.RandomState(8).uniform(0.1, 1.9, (100, 3))
+	indices = world.insert_points(positions, set(), set(), set(), 
+			tol = 1e-9)
+
+	assert numpy.allclose(points['linear'][on_face.index], 
+			linear([0.5, 0.5, 0.0]))
+	assert numpy.allclose(points['linear'][indices], linear(positions))
+	assert set(points['label'][indices].tolist()) <= \
+			set(points['label'][corners].tolist())
+
+
+def test_renderers_read_only():
+	(world, renderer) = make_world()
+	other = Renderer()
+
+	point = world.create_point([0.5, 1.0, 1.2], set([renderer]), set(), 
+			set(), tol = 1e-9)
+
+	# The sets returned are copies, and cannot be assigned ...
+
+	point.renderers_point.add(other)
+	assert point.renderers_point == set([renderer])
+
+	try:
+		point.renderers_point = set([other])
+	except AttributeError:
+		pass
+	else:
+		assert False, 'renderers_point is assignable'
+
+	# ... attaching renderers updates the Lines attached ...
+
+	point.attach_renderers(set(), set([other]), set())
+
+	for line in point.attached_lines:
+		assert (other in line.renderers_line) == all([other in 
+				end.renderers_line for end in line.attached_points])
+
+
+def test_position_read_only():
+	(world, renderer) = make_world()
+
+	point = world.create_point([0.5, 1.0, 1.2], set(), set(), set(), 
+			tol = 1e-9)
+
+	try:
+		point.position[0] = 0.7
+	except ValueError:
+		pass
+	else:
+		assert False, 'position is writeable'
+
+	assert numpy.allclose(point.position, [0.5, 1.0, 1.2])
+
+	# The position buffer itself stays writeable ...
+
+	assert world.store.points['position'].flags.writeable
@@ -0,0 +1,103 @@
+# Copyright (c) 2010 Friedrich Romstedt <www.friedrichromstedt.org>
+# 
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+# 
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+# 
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+import numpy
+
+"""Views project the positions of a World onto the screen."""
+
+
+class View:
+	"""A camera looking at a World.  Holds a 4x4 homogeneous projection 
+	matrix, and a cached buffer of the projected positions of all Points,
+	one row (x, y, depth) per row of the World's store.  Rows of Points 
+	added since the last projection are projected when needed, all rows 
+	only when the matrix changes."""
+
+	def __init__(self, world, matrix = None):
+		"""WORLD is the matplot3dext.objects.world.World to look at.  MATRIX
+		is the 4x4 projection matrix, it defaults to the identity."""
+
+		if matrix is None:
+			matrix = numpy.eye(4)
+
+		self.world = world
+
+		# The projected positions, and the .version of the Point Table they
+		# are up to date with.
+		self.projected = numpy.empty((0, 3))
+		self.version = 0
+
+		self.set_matrix(matrix)
+
+	def set_matrix(self, matrix):
+		"""Set the 4x4 projection MATRIX, mapping homogeneous positions 
+		(x, y, z, 1) onto homogeneous (x, y, depth, w).  All positions will
+		be projected again."""
+
+		self.matrix = numpy.asarray(matrix, dtype = numpy.float64).\
+				reshape((4, 4))
+
+		self.matrix_changed = True
+
+	def _project(self, positions):
+		"""Returns the (N, 3) projection of the (N, 3) POSITIONS."""
+
+		homogeneous = numpy.dot(positions, self.matrix[:, :3].T) + \
+				self.matrix[:, 3]
+
+		return homogeneous[:, :3] / homogeneous[:, 3:]
+
+	def projection(self):
+		"""Returns the (N, 3) buffer of the projected positions (x, y, depth)
+		of all rows of the World's store, NaN for unused rows.  Only the rows
+		written since the last call are projected, unless the matrix has
+		changed."""
+
+		points = self.world.store.points
+		positions = self.world.store.positions()
+
+		size = len(positions)
+
+		if len(self.projected) < size:
+			projected = numpy.empty((points.capacity, 3))
+			projected[...] = numpy.nan
+			projected[:len(self.projected)] = self.projected
+
+			self.projected = projected
+
+		if self.matrix_changed:
+			self.projected[:size] = self._project(positions)
+
+		else:
+			rows = numpy.flatnonzero(points.stamps[:size] > self.version)
+			self.projected[rows] = self._project(positions[rows])
+
+		self.version = points.version
+		self.matrix_changed = False
+
+		return self.projected[:size]
+
+	def project(self, points):
+		"""Returns the (N, 3) projected positions of the matplot3dext points
+		POINTS."""
+
+		indices = [point.index for point in points]
+
+		return self.projection()[indices]